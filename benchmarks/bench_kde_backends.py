@@ -0,0 +1,121 @@
+"""
+Benchmark of the KDE backends of `smellscapy.plotting.kde` and calibration
+of the ``backend="auto"`` policy.
+
+For each number of samples, grid size and spread of the samples, the
+script times every backend on the same KDE, and prints the backend chosen
+by ``"auto"`` next to the fastest exact one and the fastest overall, with
+the relative error of the binned KDE. It then fits the cost of one
+(sample, node) kernel evaluation of the tiled and truncated backends and
+prints their ratio, the value to use for
+`smellscapy.plotting.kde.TRUNCATED_COST_RATIO`.
+
+Two kinds of data are timed:
+
+- ``normal``: continuous samples, all distinct, around the
+  `smellscapy.plotting.kde.BINNED_MIN_SAMPLES` cut-over of the binned KDE;
+- ``lattice``: survey scores drawn from ``--distinct`` answer patterns and
+  deduplicated as in the plots (``dedup="auto"``), so that many samples
+  collapse to few distinct points, which ``"auto"`` must keep exact.
+
+Usage::
+
+    python benchmarks/bench_kde_backends.py
+    python benchmarks/bench_kde_backends.py --samples 400 4000 40000 --eval-n 120 300 --spreads 0.05 0.3
+
+The ``"exact"`` backend (``gaussian_kde.evaluate``) is skipped above
+``--exact-max-work`` sample-node pairs.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from smellscapy.calculations import scores_from_array
+from smellscapy.plotting.kde import (
+    BINNED_MIN_SAMPLES,
+    TRUNCATED_COST_RATIO,
+    evaluate_kde,
+    fit_kde,
+    kde_backends,
+    resolve_backend,
+    support_nodes,
+)
+
+
+def timeit(func, repeat=3):
+    best = np.inf
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def datasets(args, rng):
+    """Yield (kind, spread, n_samples, dataset, dedup) for every configuration."""
+    for n in args.samples:
+        for spread in args.spreads:
+            yield "normal", spread, n, rng.normal(0, spread, size=(2, n)), "never"
+    for n in args.lattice_samples:
+        answers = rng.integers(1, 6, size=(args.distinct, 8))
+        scores = scores_from_array(answers[rng.integers(0, args.distinct, size=n)])
+        yield "lattice", np.nan, n, scores.T, "auto"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, nargs="+",
+                        default=[40, 300, 3000, BINNED_MIN_SAMPLES // 2, BINNED_MIN_SAMPLES, 2 * BINNED_MIN_SAMPLES])
+    parser.add_argument("--lattice-samples", type=int, nargs="+", default=[BINNED_MIN_SAMPLES, 20 * BINNED_MIN_SAMPLES])
+    parser.add_argument("--distinct", type=int, default=300, help="answer patterns of the lattice data")
+    parser.add_argument("--eval-n", type=int, nargs="+", default=[120, 300])
+    parser.add_argument("--spreads", type=float, nargs="+", default=[0.05, 0.15, 0.3])
+    parser.add_argument("--exact-max-work", type=float, default=3e8)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    backends = [name for name in kde_backends() if name != "auto"]
+    rng = np.random.default_rng(0)
+    costs = {"tiled": [], "truncated": []}
+
+    print(f"{'kind':>8} {'samples':>8} {'distinct':>8} {'eval_n':>7} {'spread':>7} "
+          + " ".join(f"{b + ' [s]':>14}" for b in backends)
+          + f" {'binned err':>10} {'auto':>10} {'fastest exact':>14} {'fastest':>10}")
+    for kind, spread, n, dataset, dedup in datasets(args, rng):
+        kde = fit_kde(dataset, dedup=dedup)
+        for eval_n in args.eval_n:
+            grid = np.linspace(-1, 1, eval_n)
+            grids = [grid, grid]
+            points = np.vstack([np.repeat(grid, eval_n), np.tile(grid, eval_n)])
+            times, values = {}, {}
+            for backend in backends:
+                if backend == "exact" and kde.n * points.shape[1] > args.exact_max_work:
+                    times[backend] = np.nan
+                    continue
+                times[backend] = timeit(lambda: evaluate_kde(kde, points, grids, backend, n), args.repeat)
+                values[backend] = evaluate_kde(kde, points, grids, backend, n)
+
+            support = support_nodes(kde.covariance, [grid[1] - grid[0]] * 2)
+            costs["tiled"].append(times["tiled"] / (kde.n * points.shape[1]))
+            costs["truncated"].append(times["truncated"] / (kde.n * support))
+            error = np.abs(values["binned"] - values["tiled"]).max() / values["tiled"].max()
+
+            auto = resolve_backend("auto", n, kde.n, points.shape[1], True, support)
+            exact_like = {b: t for b, t in times.items() if b != "binned" and np.isfinite(t)}
+            fastest_exact = min(exact_like, key=exact_like.get)
+            fastest = min((b for b in times if np.isfinite(times[b])), key=times.get)
+            print(f"{kind:>8} {n:8d} {kde.n:8d} {eval_n:7d} {spread:7.2f} "
+                  + " ".join(f"{times[b]:14.4f}" for b in backends)
+                  + f" {error:10.1e} {auto:>10} {fastest_exact:>14} {fastest:>10}")
+    tiled = np.median(costs["tiled"])
+    truncated = np.median(costs["truncated"])
+    print()
+    print(f"tiled:     {tiled * 1e9:.2f} ns per (sample, node)")
+    print(f"truncated: {truncated * 1e9:.2f} ns per (sample, visited node)")
+    print(f"measured cost ratio {truncated / tiled:.1f} (TRUNCATED_COST_RATIO = {TRUNCATED_COST_RATIO})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Peak memory of `smellscapy.calculations.calculate_scores` in its different
+modes, on a survey-like DataFrame with many metadata columns.
+
+Usage::
+
+    python benchmarks/bench_scores_memory.py --rows 5000000
+
+Each mode runs in a fresh interpreter. The peak resident set size (VmHWM)
+is reset after the DataFrame is built, so the reported value is the extra
+memory needed by the scoring call alone (Linux only).
+"""
+
+import argparse
+import subprocess
+import sys
+
+MODES = {
+    "pleasantness+presence (copy x2)": "df = calculate_presence(calculate_pleasantness(df))",
+    "calculate_scores (copy)": "df = calculate_scores(df)",
+    "calculate_scores (inplace)": "calculate_scores(df, inplace=True)",
+    "calculate_scores (out=)": "calculate_scores(df, out=out)",
+    "calculate_scores (inplace, float32)": "calculate_scores(df, dtype=np.float32, inplace=True)",
+}
+
+CHILD = """
+import numpy as np, pandas as pd
+from smellscapy.calculations import calculate_pleasantness, calculate_presence, calculate_scores
+from smellscapy.surveys import ATTRIBUTES_COLUMN_NAMES
+
+def status(key):
+    for line in open("/proc/self/status"):
+        if line.startswith(key):
+            return int(line.split()[1]) * 1024
+
+n = {rows}
+rng = np.random.default_rng(0)
+data = {{col: rng.integers(1, 6, n) for col in ATTRIBUTES_COLUMN_NAMES}}
+for i in range(12):
+    data[f"meta_num_{{i}}"] = rng.random(n)
+for i in range(10):
+    data[f"meta_cat_{{i}}"] = pd.Categorical(rng.choice(["a", "b", "c"], n))
+df = pd.DataFrame(data)
+out = np.empty((n, 2), order="F")
+
+with open("/proc/self/clear_refs", "w") as f:
+    f.write("5")
+before = status("VmRSS")
+{stmt}
+print((status("VmHWM") - before) / 2**20)
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    args = parser.parse_args()
+
+    print(f"{args.rows} rows")
+    print(f"{'mode':<40} {'peak RSS increase [MiB]':>24}")
+    for name, stmt in MODES.items():
+        code = CHILD.format(rows=args.rows, stmt=stmt)
+        res = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        print(f"{name:<40} {float(res.stdout.split()[-1]):24.0f}")
+
+
+if __name__ == "__main__":
+    main()
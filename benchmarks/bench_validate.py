@@ -0,0 +1,87 @@
+"""
+Benchmark of `smellscapy.surveys.validate` against the previous row-wise
+implementation (``applymap`` + ``iterrows``).
+
+Usage::
+
+    python benchmarks/bench_validate.py
+    python benchmarks/bench_validate.py --sizes 10000 1000000 10000000 --legacy-max-rows 100000
+
+The legacy implementation is only timed up to ``--legacy-max-rows`` rows,
+above that its cost is extrapolated linearly from the largest measured size.
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from smellscapy.surveys import ATTRIBUTES_COLUMN_NAMES, ATTRIBUTES_VALUES, validate
+
+
+def make_survey(n_rows, missing_frac=0.01, seed=0):
+    rng = np.random.default_rng(seed)
+    data = rng.integers(1, 6, size=(n_rows, len(ATTRIBUTES_COLUMN_NAMES))).astype(float)
+    data[rng.random(data.shape) < missing_frac / len(ATTRIBUTES_COLUMN_NAMES)] = np.nan
+    df = pd.DataFrame(data, columns=ATTRIBUTES_COLUMN_NAMES)
+    df.insert(0, "RecordID", np.arange(n_rows))
+    return df
+
+
+def legacy_validate(df):
+    df = df.copy()
+    df_attr = df[ATTRIBUTES_COLUMN_NAMES]
+    df_err = df_attr.map(lambda x: x in ATTRIBUTES_VALUES if pd.notna(x) else True)
+    if any(df_err.eq(False).any()):
+        raise Exception("Attribute values are not valid. Please use numbers in range [1, 2, 3, 4, 5]")
+    invalid_indices = []
+    for i, row in df_attr.iterrows():
+        if row.isna().any():
+            invalid_indices.append(i)
+    if invalid_indices:
+        excl_df = df.iloc[invalid_indices]
+        df = df.drop(df.index[invalid_indices])
+    else:
+        excl_df = None
+    return df, excl_df
+
+
+def timeit(func, *args, repeat=3):
+    best = np.inf
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument("--legacy-max-rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    logger.disable("smellscapy")
+
+    print(f"{'rows':>12} {'legacy [s]':>12} {'vectorized [s]':>15} {'speedup':>10}")
+    legacy_rate = None
+    for n in args.sizes:
+        df = make_survey(n)
+        new_t = timeit(validate, df, repeat=3 if n <= 1_000_000 else 1)
+        if n <= args.legacy_max_rows:
+            old_t = timeit(legacy_validate, df, repeat=1)
+            legacy_rate = old_t / n
+            old_label = f"{old_t:12.3f}"
+        elif legacy_rate is not None:
+            old_t = legacy_rate * n
+            old_label = f"{'~' + format(old_t, '.1f'):>12}"
+        else:
+            old_t = np.nan
+            old_label = f"{'n/a':>12}"
+        print(f"{n:>12} {old_label} {new_t:15.4f} {old_t / new_t:9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,7 @@ __all__ = [
     "WEIGHT",
     "calculate_pleasantness",
     "calculate_presence",
+    "calculate_scores",
     "load_example_data",
     "plot_density",
     "plot_scatter",
@@ -0,0 +1,261 @@
+import io
+import json
+
+import numpy as np
+import pandas as pd
+
+from smellscapy.lattice import N_LEVELS, ScoreLattice, level_values
+from smellscapy.analysis.descriptive_analysis import (
+    STATISTICS_INDEX,
+    _group_codes,
+    _kurtosis,
+    _lattice_levels,
+    _skewness,
+    _statistics_frame,
+    _statistics_from_counts,
+)
+
+
+
+_MOMENTS = ("count", "mean", "m2", "m3", "m4")
+
+
+
+def merge_moments(a: dict, b: dict) -> dict:
+    """
+    Combine the central moments of two samples (Pébay, 2008).
+
+    Parameters
+    ----------
+    a, b : dict of numpy.ndarray
+        Moments of each sample, with the keys "count", "mean" and "m2",
+        "m3", "m4" (sums of the powers of the deviations from the mean).
+        Arrays are combined elementwise, so many groups are merged at once.
+
+    Returns
+    -------
+    dict of numpy.ndarray
+        Moments of the union of the two samples.
+    """
+    na, nb = a["count"], b["count"]
+    n = na + nb
+    with np.errstate(divide="ignore", invalid="ignore"):
+        delta = b["mean"] - a["mean"]
+        ratio = np.where(n > 0, nb / n, 0.0)
+        mean = a["mean"] + delta * ratio
+        nab = na * nb
+        n_safe = np.where(n > 0, n, 1.0)
+        m2 = a["m2"] + b["m2"] + delta ** 2 * nab / n_safe
+        m3 = (a["m3"] + b["m3"] + delta ** 3 * nab * (na - nb) / n_safe ** 2
+              + 3 * delta * (na * b["m2"] - nb * a["m2"]) / n_safe)
+        m4 = (a["m4"] + b["m4"] + delta ** 4 * nab * (na * na - nab + nb * nb) / n_safe ** 3
+              + 6 * delta ** 2 * (na * na * b["m2"] + nb * nb * a["m2"]) / n_safe ** 2
+              + 4 * delta * (na * b["m3"] - nb * a["m3"]) / n_safe)
+    # an empty side must not propagate NaN means
+    empty_a, empty_b = na == 0, nb == 0
+    merged = {"count": n, "mean": mean, "m2": m2, "m3": m3, "m4": m4}
+    for key in _MOMENTS[1:]:
+        merged[key] = np.where(empty_a, b[key], np.where(empty_b, a[key], merged[key]))
+    return merged
+
+
+
+def _moments_from_counts(values: np.ndarray, counts: np.ndarray) -> dict:
+    """Central moments of (G, L) histograms over the sorted level `values`."""
+    counts = counts.astype(np.float64)
+    n = counts.sum(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(n > 0, counts @ values / np.where(n > 0, n, 1.0), 0.0)
+    dev = values - mean[..., None]
+    dev2 = dev * dev
+    return {
+        "count": n,
+        "mean": mean,
+        "m2": (counts * dev2).sum(axis=-1),
+        "m3": (counts * dev2 * dev).sum(axis=-1),
+        "m4": (counts * dev2 * dev2).sum(axis=-1),
+    }
+
+
+
+class StatisticsAccumulator:
+    """
+    Mergeable accumulator of the `descriptive_statistics` table.
+
+    For each group and each score, the accumulator keeps the count, mean
+    and the sums of the second, third and fourth powers of the deviations
+    (merged with Pébay's pairwise update), together with the exact number
+    of responses at each of the `N_LEVELS` score levels, from which the
+    minimum, maximum, quartiles and median are exact. Its size therefore
+    depends on the number of groups, not on the number of responses.
+
+    Accumulators can be updated chunk by chunk (e.g. survey waves, or the
+    chunks of `smellscapy.pipeline.iter_scored_chunks`), merged across
+    processes, and serialised with `to_bytes`.
+
+    Parameters
+    ----------
+    group_by_col : str, list of str or None, optional
+        Grouping column(s), as in `descriptive_statistics`.
+
+    Examples
+    --------
+        >>> from smellscapy.pipeline import iter_scored_chunks
+        >>> from smellscapy.analysis.accumulators import StatisticsAccumulator
+        >>> acc = StatisticsAccumulator(group_by_col="Smell source")
+        >>> for chunk in iter_scored_chunks("wave_1.csv"):
+        ...     acc.update(chunk.data)
+        >>> acc.merge(StatisticsAccumulator.from_bytes(other_worker_bytes))
+        >>> s = acc.result()
+    """
+
+    def __init__(self, group_by_col=None):
+        self.group_by_col = group_by_col
+        self.groups = []
+        self._positions = {}
+        self.moments = {key: np.zeros((0, 2)) for key in _MOMENTS}
+        self.levels = np.zeros((0, 2, N_LEVELS), dtype=np.int64)
+        self._values = np.sort(level_values())
+
+    def __len__(self) -> int:
+        """Number of groups seen so far."""
+        return len(self.groups)
+
+    def _rows(self, names: list) -> np.ndarray:
+        """Return the state rows of group labels, adding the new ones."""
+        new = [name for name in names if name not in self._positions]
+        if new:
+            for name in new:
+                self._positions[name] = len(self.groups)
+                self.groups.append(name)
+            pad = len(new)
+            self.moments = {k: np.concatenate([v, np.zeros((pad, 2))]) for k, v in self.moments.items()}
+            self.levels = np.concatenate([self.levels, np.zeros((pad, 2, N_LEVELS), dtype=np.int64)])
+        return np.array([self._positions[name] for name in names], dtype=np.intp)
+
+    def _add(self, rows: np.ndarray, moments: dict, levels: np.ndarray):
+        current = {k: v[rows] for k, v in self.moments.items()}
+        merged = merge_moments(current, moments)
+        for key in _MOMENTS:
+            self.moments[key][rows] = merged[key]
+        self.levels[rows] += levels
+
+    def update(self, df) -> "StatisticsAccumulator":
+        """
+        Add a chunk of responses.
+
+        Parameters
+        ----------
+        df : pd.DataFrame or ScoreLattice
+            A DataFrame with the attribute columns or the score columns (and
+            the grouping columns), or a `smellscapy.lattice.ScoreLattice`.
+
+        Returns
+        -------
+        StatisticsAccumulator
+            The accumulator itself.
+        """
+        lattice = df if isinstance(df, ScoreLattice) else ScoreLattice.from_frame(df)
+        codes, names, _ = _group_codes(df, self.group_by_col, len(lattice))
+
+        n_groups = len(names)
+        levels = np.empty((n_groups, 2, N_LEVELS), dtype=np.int64)
+        for j, (keys, _) in enumerate(_lattice_levels(lattice)):
+            ok = (keys >= 0) & (codes >= 0)
+            counts = np.bincount(codes[ok] * N_LEVELS + keys[ok], minlength=n_groups * N_LEVELS)
+            levels[:, j] = counts.reshape(n_groups, N_LEVELS)
+
+        self._add(self._rows(names), _moments_from_counts(self._values, levels), levels)
+        return self
+
+    def merge(self, other: "StatisticsAccumulator") -> "StatisticsAccumulator":
+        """
+        Merge the state of another accumulator into this one.
+
+        Returns
+        -------
+        StatisticsAccumulator
+            The accumulator itself.
+        """
+        rows = self._rows(other.groups)
+        self._add(rows, other.moments, other.levels)
+        return self
+
+    def result(self) -> pd.DataFrame:
+        """
+        Return the statistics of all the responses added so far, in the
+        layout of `descriptive_statistics`.
+        """
+        if self.groups:
+            order = list(range(len(self.groups)))
+            try:
+                order.sort(key=lambda i: self.groups[i])
+            except TypeError:
+                pass
+            names = [self.groups[i] for i in order]
+            levels = self.levels[order]
+            moments = {k: v[order] for k, v in self.moments.items()}
+        else:
+            # nothing added yet: a single empty group, outside of the state
+            names = [None]
+            levels = np.zeros((1, 2, N_LEVELS), dtype=np.int64)
+            moments = {key: np.zeros((1, 2)) for key in _MOMENTS}
+
+        tables = []
+        for j in range(2):
+            stats = _statistics_from_counts(self._values, levels[:, j])
+            n, m2 = moments["count"][:, j], moments["m2"][:, j]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                variance = np.where(n > 1, m2 / (n - 1), np.nan)
+            has = n > 0
+            stats[STATISTICS_INDEX.index("mean")] = np.where(has, moments["mean"][:, j], np.nan)
+            stats[STATISTICS_INDEX.index("std")] = np.sqrt(variance)
+            stats[STATISTICS_INDEX.index("variance")] = variance
+            stats[STATISTICS_INDEX.index("skewness")] = np.where(has, _skewness(n, m2, moments["m3"][:, j]), np.nan)
+            stats[STATISTICS_INDEX.index("kurtosis")] = np.where(has, _kurtosis(n, m2, moments["m4"][:, j]), np.nan)
+            tables.append(stats)
+
+        return _statistics_frame(tables, names, names != [None])
+
+    def to_bytes(self) -> bytes:
+        """
+        Serialise the accumulator as a compressed ``.npz`` payload.
+
+        The moments take 80 bytes per group and the level counts are stored
+        as int64 and compressed (they are mostly zeros). Group labels must
+        be strings, numbers or tuples of them.
+        """
+        header = {
+            "group_by_col": self.group_by_col,
+            "groups": [list(g) if isinstance(g, tuple) else g for g in self.groups],
+            "tuples": [isinstance(g, tuple) for g in self.groups],
+        }
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer,
+            header=np.frombuffer(json.dumps(header, default=_json_default).encode(), dtype=np.uint8),
+            levels=self.levels,
+            **self.moments,
+        )
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "StatisticsAccumulator":
+        """Restore an accumulator serialised with `to_bytes`."""
+        with np.load(io.BytesIO(data), allow_pickle=False) as payload:
+            header = json.loads(payload["header"].tobytes().decode())
+            acc = cls(header["group_by_col"])
+            groups = [tuple(g) if t else g for g, t in zip(header["groups"], header["tuples"])]
+            acc.groups = groups
+            acc._positions = {g: i for i, g in enumerate(groups)}
+            acc.levels = payload["levels"]
+            acc.moments = {key: payload[key] for key in _MOMENTS}
+        return acc
+
+
+
+def _json_default(value):
+    """Convert NumPy scalars in group labels to Python scalars."""
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Group label {value!r} cannot be serialised")
@@ -1,6 +1,101 @@
+import numpy as np
 import pandas as pd
+from smellscapy.surveys import ATTRIBUTES_COLUMN_NAMES
+from smellscapy.lattice import ScoreLattice, as_score_frame, level_values
 
-def descriptive_statistics (df, group_by_col=None):
+
+
+STATISTICS_INDEX = ["count", "mean", "std", "min", "25%", "50%", "75%", "max",
+                    "median", "variance", "skewness", "kurtosis"]
+"""
+Rows of the table returned by `descriptive_statistics`.
+"""
+
+_SCORE_COLUMNS = ["pleasantness_score", "presence_score"]
+
+
+
+def _zero_out_fperr(x):
+    """Set values that are only floating point noise to zero, as pandas does."""
+    x = np.asarray(x, dtype=np.float64)
+    return np.where(np.abs(x) < 1e-14, 0.0, x)
+
+
+
+def _skewness(n, m2, m3):
+    """
+    Bias-corrected sample skewness, as ``pandas.Series.skew``.
+
+    `m2` and `m3` are the sums of the squared and cubed deviations from the
+    mean (not divided by `n`).
+    """
+    n = np.asarray(n, dtype=np.float64)
+    m2, m3 = _zero_out_fperr(m2), _zero_out_fperr(m3)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = n * np.sqrt(n - 1) / (n - 2) * m3 / m2 ** 1.5
+    result = np.where(m2 == 0, 0.0, result)
+    return np.where(n < 3, np.nan, result)
+
+
+
+def _kurtosis(n, m2, m4):
+    """
+    Bias-corrected sample excess kurtosis, as ``pandas.Series.kurtosis``.
+
+    `m2` and `m4` are the sums of the squared and fourth-power deviations
+    from the mean (not divided by `n`).
+    """
+    n = np.asarray(n, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        numerator = _zero_out_fperr(n * (n + 1) * (n - 1) * np.asarray(m4))
+        denominator = _zero_out_fperr((n - 2) * (n - 3) * np.asarray(m2) ** 2)
+        adj = 3 * (n - 1) ** 2 / ((n - 2) * (n - 3))
+        result = numerator / denominator - adj
+    result = np.where(denominator == 0, 0.0, result)
+    return np.where(n < 4, np.nan, result)
+
+
+
+def _group_keys(df: pd.DataFrame, group_by_col) -> list:
+    """Return the grouping columns of `group_by_col` that are present in `df`."""
+    if group_by_col is None:
+        return []
+    keys = [group_by_col] if isinstance(group_by_col, str) else list(group_by_col)
+    return [key for key in keys if key in df.columns]
+
+
+
+def _grouped_statistics(scores: pd.DataFrame, keys: list) -> pd.DataFrame:
+    """
+    Compute the `STATISTICS_INDEX` rows of every score column for every
+    group, with one named ``groupby`` aggregation and one ``quantile`` pass.
+
+    Returns a DataFrame indexed by group, with (score, statistic) columns.
+    """
+    if scores.empty:
+        return pd.DataFrame(columns=pd.MultiIndex.from_product([scores.columns, STATISTICS_INDEX]), dtype=float)
+
+    grouped = scores.groupby(keys, sort=True, observed=True)
+    # pandas 2.x has no groupby kurtosis kernel: Series.kurt runs on each
+    # group's slice within the same aggregation, without N-sized temporaries
+    agg = grouped.agg(["count", "mean", "std", "min", "max", "var", "skew", pd.Series.kurt])
+    quantiles = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+
+    columns = {}
+    for col in scores.columns:
+        q25, median, q75 = quantiles[col].to_numpy().T
+        stats = [
+            agg[(col, "count")], agg[(col, "mean")], agg[(col, "std")], agg[(col, "min")],
+            q25, median, q75, agg[(col, "max")],
+            median, agg[(col, "var")], agg[(col, "skew")], agg[(col, "kurt")],
+        ]
+        for name, values in zip(STATISTICS_INDEX, stats):
+            columns[(col, name)] = np.asarray(values, dtype=np.float64)
+    return pd.DataFrame(columns, index=agg.index)
+
+
+
+def descriptive_statistics(df, group_by_col=None, path=None, writer=None):
     """
     Generate descriptive statistics.
 
@@ -10,21 +105,32 @@ def descriptive_statistics (df, group_by_col=None):
 
     Analyzes the columns "pleasatness_score" and "presence_score" of the database (numerical continous variables between [-1,1])
 
+    All groups are summarised in a single ``groupby`` pass. The function has
+    no side effects unless `path` or `writer` is given.
+
     Parameters
     ----------
-    df : pd.DataFrame
-        A DataFrame containing "pleasantness_score" and "presence_score".
-    
-    **kwargs : dict, optional** 
-    Additional keyword arguments to override default plotting parameters, including:
-        - `group_by_col` : str or None, optional
-        Name of the column in ``df`` to be used as categorical grouping
-        variable. If None or not present in ``df``, a comprehensive statistical description is computed.
+    df : pd.DataFrame or ScoreLattice
+        A DataFrame containing "pleasantness_score" and "presence_score", or a
+        `smellscapy.lattice.ScoreLattice`.
+    group_by_col : str, list of str or None, optional
+        Name(s) of the column(s) in ``df`` to be used as categorical grouping
+        variables. Columns not present in ``df`` are ignored; if None or none
+        is present, a comprehensive statistical description is computed.
+        With several columns, the "subgroup" of each row is a tuple.
+    path : str or path object, optional
+        If given, the table is also written to this CSV file.
+    writer : callable, optional
+        If given, called with the table, e.g. ``print`` or
+        ``logger.info``.
 
     Returns
     -------
     s : DataFrame
-        Summary statistics of the DataFrame provided.
+        Summary statistics of the DataFrame provided: one column per score
+        with the rows of `STATISTICS_INDEX` or, when grouped, the columns
+        "type", "pleasantness_score", "presence_score" and "subgroup" with
+        one row per group and statistic.
 
 
     Examples
@@ -34,56 +140,274 @@ def descriptive_statistics (df, group_by_col=None):
     >>> from smellscapy.surveys import validate
     >>> df = load_example_data()
     >>> df,_ = validate(df)
-    >>> s = descriptive_statistics(df)
+    >>> s = descriptive_statistics(df, writer=print)
             pleasantness_score  presence_score
     count              39.000000       39.000000
     mean                0.090199       -0.001022
     std                 0.164035        0.177936
     min                -0.353553       -0.353553
     25%                 0.000000       -0.088388
-    std                 0.164035        0.177936
-    min                -0.353553       -0.353553
-    25%                 0.000000       -0.088388
-    50%                 0.103553        0.000000
     50%                 0.103553        0.000000
     75%                 0.176777        0.133883
     max                 0.573223        0.280330
     median              0.103553        0.000000
     variance            0.026907        0.031661
     skewness            0.056743       -0.453332
-    kurtosis            1.584875       -0.471179   
-    
+    kurtosis            1.584875       -0.471179
+    >>> s = descriptive_statistics(df, group_by_col=["Smell source", "Gender"], path="statistics.csv")
+
+    """
+
+    df = as_score_frame(df)
+    scores = df[_SCORE_COLUMNS]
+    keys = _group_keys(df, group_by_col)
+
+    if keys:
+        table = _grouped_statistics(scores, [df[key] for key in keys])
+        n_stats = len(STATISTICS_INDEX)
+        s = pd.DataFrame({
+            "type": np.tile(STATISTICS_INDEX, len(table)),
+            _SCORE_COLUMNS[0]: table[_SCORE_COLUMNS[0]].to_numpy().ravel(),
+            _SCORE_COLUMNS[1]: table[_SCORE_COLUMNS[1]].to_numpy().ravel(),
+            "subgroup": table.index.repeat(n_stats).tolist(),
+        })
+    else:
+        table = _grouped_statistics(scores, [np.zeros(len(scores), dtype=np.int8)]).reindex([0])
+        s = pd.DataFrame({col: table[col].to_numpy()[0] for col in _SCORE_COLUMNS}, index=STATISTICS_INDEX)
+        s.loc["count"] = s.loc["count"].fillna(0.0)
+
+    if path is not None:
+        s.to_csv(path)
+    if writer is not None:
+        writer(s)
+
+    return s
+
+
+
+def _statistics_from_counts(values: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """
+    Compute the `STATISTICS_INDEX` rows from histograms.
+
+    Parameters
+    ----------
+    values : numpy.ndarray, shape (L,)
+        Distinct values, sorted in increasing order.
+    counts : numpy.ndarray, shape (G, L)
+        Number of observations of each value, for G histograms.
+
+    Returns
+    -------
+    numpy.ndarray, shape (len(STATISTICS_INDEX), G)
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    n = counts.sum(axis=1)
+    out = np.full((len(STATISTICS_INDEX), counts.shape[0]), np.nan)
+    out[0] = n
+
+    has = n > 0
+    if not has.any():
+        return out
+    c, n_ = counts[has], n[has]
+
+    mean = c @ values / n_
+    dev = values[None, :] - mean[:, None]
+    dev2 = dev * dev
+    m2 = (c * dev2).sum(axis=1)
+    m3 = (c * dev2 * dev).sum(axis=1)
+    m4 = (c * dev2 * dev2).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variance = np.where(n_ > 1, m2 / (n_ - 1), np.nan)
+
+    # linear interpolation between order statistics, as pandas.quantile
+    cum = np.cumsum(c, axis=1)
+    quantiles = []
+    for q in (0.25, 0.5, 0.75):
+        pos = (n_ - 1) * q
+        lo, hi = np.floor(pos), np.ceil(pos)
+        v_lo = values[(cum <= lo[:, None]).sum(axis=1)]
+        v_hi = values[(cum <= hi[:, None]).sum(axis=1)]
+        quantiles.append(v_lo + (v_hi - v_lo) * (pos - lo))
 
+    nonzero = c > 0
+    first = np.argmax(nonzero, axis=1)
+    last = c.shape[1] - 1 - np.argmax(nonzero[:, ::-1], axis=1)
+
+    out[1:, has] = [
+        mean, np.sqrt(variance), values[first], *quantiles, values[last],
+        quantiles[1], variance, _skewness(n_, m2, m3), _kurtosis(n_, m2, m4),
+    ]
+    return out
+
+
+
+def _lattice_levels(lattice: ScoreLattice):
+    """
+    Return, for each score of `lattice`, the rank of its level among the
+    sorted `level_values` (-1 for missing) and the sorted level values.
+    """
+    levels = level_values()
+    order = np.argsort(levels)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(order.size)
+    result = []
+    for keys in (lattice.pleasantness_keys(), lattice.presence_keys()):
+        result.append((np.where(keys >= 0, rank[keys], -1), levels[order]))
+    return result
+
+
+
+def _group_codes(df, group_by_col, n_rows: int):
+    """
+    Return the group number of each row (-1 for rows with a missing key)
+    and the sorted group labels; a single unlabelled group when ungrouped.
+    """
+    by = [] if isinstance(df, ScoreLattice) else _group_keys(df, group_by_col)
+    if not by:
+        return np.zeros(n_rows, dtype=np.intp), [None], False
+    grouper = df.groupby(by, sort=True, observed=True)
+    # ngroup() is NaN (float) for rows whose key is missing
+    return grouper.ngroup().fillna(-1).to_numpy(np.intp), grouper.size().index.tolist(), True
+
+
+
+def _statistics_frame(tables: list, names: list, grouped: bool) -> pd.DataFrame:
+    """
+    Lay out per-score (len(STATISTICS_INDEX), G) arrays as the table
+    returned by `descriptive_statistics`.
     """
+    if not grouped:
+        return pd.DataFrame(
+            {col: stats[:, 0] for col, stats in zip(_SCORE_COLUMNS, tables)}, index=STATISTICS_INDEX
+        )
 
+    n_stats = len(STATISTICS_INDEX)
+    return pd.DataFrame({
+        "type": np.tile(STATISTICS_INDEX, len(names)),
+        _SCORE_COLUMNS[0]: tables[0].T.ravel(),
+        _SCORE_COLUMNS[1]: tables[1].T.ravel(),
+        "subgroup": [name for name in names for _ in range(n_stats)],
+    })
 
-    if group_by_col is not None and group_by_col in df.columns:
-        df_subgroups = df.groupby(group_by_col)
-        s = pd.DataFrame(columns= ["type", 'pleasantness_score', 'presence_score', "subgroup"])
-        for name, subgroup in df_subgroups:
-            df_temp = subgroup[['pleasantness_score', 'presence_score']]
-            s1 = df_temp.describe()
-            s1.loc['median'] = df_temp.median()
-            s1.loc['variance'] = df_temp.var() 
-            s1.loc['skewness'] = df_temp.skew()
-            s1.loc['kurtosis'] = df_temp.kurtosis()
-            s1["type"] = s1.index
-            s1["subgroup"] = name
-            print(group_by_col)
-            print(name)
-            s= pd.concat([s, s1], ignore_index=True)
-    
 
+
+def _score_levels(df):
+    """
+    Return, for each score, integer level keys (-1 for missing) and the
+    sorted values of the levels.
+
+    Scores on the pleasantness/presence lattice are mapped with
+    `ScoreLattice` in O(N); other values fall back to ``numpy.unique``.
+    """
+    if isinstance(df, ScoreLattice):
+        lattice = df
+    elif all(col in df.columns for col in ATTRIBUTES_COLUMN_NAMES):
+        lattice = ScoreLattice.from_attributes(df)
     else:
-        df_temp = df[['pleasantness_score', 'presence_score']]
-        s = df_temp.describe()
-        s.loc['median'] = df_temp.median()
-        s.loc['variance'] = df_temp.var() 
-        s.loc['skewness'] = df_temp.skew()
-        s.loc['kurtosis'] = df_temp.kurtosis()
-    
-    print(s)
-
-    s.to_csv("descriptive_statistics.csv")
-
-    return s
\ No newline at end of file
+        try:
+            lattice = ScoreLattice.from_scores(df[_SCORE_COLUMNS[0]], df[_SCORE_COLUMNS[1]])
+        except ValueError:
+            lattice = None
+
+    if lattice is not None:
+        return _lattice_levels(lattice)
+
+    result = []
+    for col in _SCORE_COLUMNS:
+        values = df[col].to_numpy(dtype=np.float64)
+        ok = ~np.isnan(values)
+        unique, inverse = np.unique(values[ok], return_inverse=True)
+        keys = np.full(values.shape, -1, dtype=np.intp)
+        keys[ok] = inverse
+        result.append((keys, unique))
+    return result
+
+
+
+def counting_statistics(df, group_by_col=None) -> pd.DataFrame:
+    """
+    Compute the `descriptive_statistics` table from score histograms.
+
+    Scores only take a few hundred distinct values (see
+    `smellscapy.lattice`), so a single O(N) counting pass gives every
+    statistic, quantiles included, without sorting and without separate
+    passes for each reduction. The result has the same layout as
+    `descriptive_statistics`, and the values agree to floating point
+    precision.
+
+    Parameters
+    ----------
+    df : pd.DataFrame or ScoreLattice
+        A DataFrame with the attribute columns or with "pleasantness_score"
+        and "presence_score", or a `smellscapy.lattice.ScoreLattice`.
+        Scores that are not on the lattice are counted with
+        ``numpy.unique`` instead.
+    group_by_col : str, list of str or None, optional
+        Grouping column(s), as in `descriptive_statistics`.
+
+    Returns
+    -------
+    s : DataFrame
+        Summary statistics, as returned by `descriptive_statistics`.
+
+    Examples
+    --------
+
+    >>> from smellscapy.databases.DataExample import load_example_data
+    >>> from smellscapy.analysis.descriptive_analysis import counting_statistics
+    >>> s = counting_statistics(load_example_data(), group_by_col="Smell source")
+    """
+    levels = _score_levels(df)
+    codes, names, grouped = _group_codes(df, group_by_col, len(levels[0][0]))
+    n_groups = len(names)
+
+    tables = []
+    for keys, values in levels:
+        ok = (keys >= 0) & (codes >= 0)
+        counts = np.bincount(codes[ok] * values.size + keys[ok], minlength=n_groups * values.size)
+        tables.append(_statistics_from_counts(values, counts.reshape(n_groups, values.size)))
+
+    return _statistics_frame(tables, names, grouped)
+
+
+
+def statistics_from_counts(tables) -> pd.DataFrame:
+    """
+    Compute the `descriptive_statistics` table from (value, count) tables.
+
+    This gives the statistics of aggregated data (e.g. counts exported by
+    another system, or summed across files) without the raw rows.
+
+    Parameters
+    ----------
+    tables : dict
+        Maps each column name (e.g. "pleasantness_score") to either a
+        ``pandas.Series`` of counts indexed by value, as returned by
+        ``value_counts()``, or a ``(values, counts)`` pair of arrays.
+        Repeated values are summed.
+
+    Returns
+    -------
+    s : DataFrame
+        One column per table, with the rows of `STATISTICS_INDEX`.
+
+    Examples
+    --------
+
+    >>> import pandas as pd
+    >>> from smellscapy.analysis.descriptive_analysis import statistics_from_counts
+    >>> counts = pd.Series([3, 5, 2], index=[-0.25, 0.0, 0.5])
+    >>> s = statistics_from_counts({"pleasantness_score": counts})
+    """
+    columns = {}
+    for name, table in tables.items():
+        if isinstance(table, pd.Series):
+            values, counts = table.index.to_numpy(dtype=np.float64), table.to_numpy()
+        else:
+            values, counts = (np.asarray(a) for a in table)
+        values = np.asarray(values, dtype=np.float64)
+        ok = ~np.isnan(values)
+        unique, inverse = np.unique(values[ok], return_inverse=True)
+        summed = np.bincount(inverse, weights=np.asarray(counts, dtype=np.float64)[ok], minlength=unique.size)
+        columns[name] = _statistics_from_counts(unique, summed[None, :])[:, 0]
+    return pd.DataFrame(columns, index=STATISTICS_INDEX)
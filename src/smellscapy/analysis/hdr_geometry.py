@@ -0,0 +1,208 @@
+import numpy as np
+import pandas as pd
+
+from smellscapy.lattice import as_score_frame
+import smellscapy.plotting.utils as ut
+from smellscapy.plotting.hdr import hdr_levels
+
+
+
+GEOMETRY_COLUMNS = ["area", "centroid_x", "centroid_y", "major_semi_axis", "minor_semi_axis", "angle"]
+"""
+Columns of the table returned by `hdr_geometry`.
+"""
+
+
+
+def hdr_masks(cube, p: float = 0.5, method: str = "sort"):
+    """
+    Compute the high-density region (HDR) of mass `p` of every density of a
+    (G, ny, nx) stack, e.g. from `smellscapy.plotting.utils.kde_on_grid_groups`.
+
+    The threshold of each group is computed by
+    `smellscapy.plotting.hdr.hdr_levels`, and the masks of all the groups
+    are then built in one comparison.
+
+    Parameters
+    ----------
+    cube : ndarray, shape (G, ny, nx)
+        Densities on a shared grid; groups without a density are all NaN.
+    p : float, optional
+        Probability mass of the HDRs, default 0.5.
+    method : {"sort", "histogram"}, optional
+        Threshold algorithm, see `smellscapy.plotting.hdr.hdr_levels`.
+
+    Returns
+    -------
+    masks : ndarray of bool, shape (G, ny, nx)
+        Cells of each HDR, all False for groups without a density.
+    thresholds : ndarray, shape (G,)
+        Density level of each HDR, NaN for groups without a density.
+    """
+    cube = np.asarray(cube, dtype=np.float64)
+    thresholds = np.array([hdr_levels(Z, p, method=method).thresholds for Z in cube], dtype=np.float64)
+    # NaN thresholds compare False everywhere
+    masks = cube >= thresholds[:, None, None]
+    return masks, thresholds
+
+
+
+def _cell_area(XX, YY) -> float:
+    return abs((XX[0, 1] - XX[0, 0]) * (YY[1, 0] - YY[0, 0]))
+
+
+
+def hdr_geometry(masks, XX, YY, labels=None) -> pd.DataFrame:
+    """
+    Return the area, centroid and principal axes of each HDR of `hdr_masks`.
+
+    All the groups are handled at once with products of the flattened masks
+    and the grid coordinates. The principal axes are those of the ellipse
+    with the same second moments as the region: its semi-axes are twice the
+    square roots of the eigenvalues of the covariance of the region's cells.
+
+    Parameters
+    ----------
+    masks : ndarray of bool, shape (G, ny, nx)
+    XX, YY : ndarray, shape (ny, nx)
+        Regular grid of the masks, as returned by ``np.meshgrid``.
+    labels : list, optional
+        Group labels, used as index.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per group with the columns of `GEOMETRY_COLUMNS`; ``angle``
+        is the direction of the major axis in degrees, in (-90, 90]. NaN for
+        empty regions.
+    """
+    G = masks.shape[0]
+    M = masks.reshape(G, -1).astype(np.float64)
+    x, y = XX.ravel(), YY.ravel()
+    count = M.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        moments = M @ np.column_stack([x, y, x * x, x * y, y * y]) / count[:, None]
+    cx, cy = moments[:, 0], moments[:, 1]
+    cov = np.empty((G, 2, 2))
+    cov[:, 0, 0] = moments[:, 2] - cx * cx
+    cov[:, 0, 1] = cov[:, 1, 0] = moments[:, 3] - cx * cy
+    cov[:, 1, 1] = moments[:, 4] - cy * cy
+
+    empty = count == 0
+    cov[empty] = 0.0
+    eigenvalues, eigenvectors = np.linalg.eigh(cov)
+    major = eigenvectors[:, :, 1]
+    angle = np.degrees(np.arctan2(major[:, 1], major[:, 0]))
+    angle = np.where(angle <= -90, angle + 180, np.where(angle > 90, angle - 180, angle))
+    semi_axes = 2 * np.sqrt(np.maximum(eigenvalues, 0.0))
+
+    table = pd.DataFrame({
+        "area": count * _cell_area(XX, YY),
+        "centroid_x": cx,
+        "centroid_y": cy,
+        "major_semi_axis": semi_axes[:, 1],
+        "minor_semi_axis": semi_axes[:, 0],
+        "angle": angle,
+    }, index=labels)
+    table.loc[empty] = np.nan
+    return table
+
+
+
+def hdr_overlap(masks, XX, YY, labels=None):
+    """
+    Return the pairwise intersection areas and Jaccard indices of the HDRs
+    of `hdr_masks`.
+
+    The G x G intersection counts are a single product of the flattened
+    masks with their transpose, instead of clipping G² pairs of contour
+    polygons.
+
+    Parameters
+    ----------
+    masks : ndarray of bool, shape (G, ny, nx)
+    XX, YY : ndarray, shape (ny, nx)
+        Regular grid of the masks.
+    labels : list, optional
+        Group labels, used as index and columns.
+
+    Returns
+    -------
+    intersection : pd.DataFrame
+        Area of the intersection of each pair of HDRs; the diagonal holds
+        the areas of the HDRs.
+    jaccard : pd.DataFrame
+        Intersection over union of each pair, NaN when both are empty.
+    """
+    G = masks.shape[0]
+    # cell counts are exact in float32 below 2**24 cells
+    dtype = np.float32 if masks[0].size < 2 ** 24 else np.float64
+    M = masks.reshape(G, -1).astype(dtype)
+    both = (M @ M.T).astype(np.float64)
+    count = np.diag(both)
+    union = count[:, None] + count[None, :] - both
+    with np.errstate(divide="ignore", invalid="ignore"):
+        jaccard = np.where(union > 0, both / union, np.nan)
+    return (pd.DataFrame(both * _cell_area(XX, YY), index=labels, columns=labels),
+            pd.DataFrame(jaccard, index=labels, columns=labels))
+
+
+
+def group_hdr_geometry(df, group_by_col: str, p: float = 0.5, eval_n: int = 300, xlim=(-1.0, 1.0), ylim=(-1.0, 1.0),
+                       kde_backend: str = "auto", n_jobs=1, hdr_method: str = "sort"):
+    """
+    Compare the high-density regions (HDR) of the groups of a dataset.
+
+    The densities of all the groups are computed on one shared grid with
+    `smellscapy.plotting.utils.kde_on_grid_groups`, as in the density
+    plots, then their HDRs are compared with `hdr_geometry` and
+    `hdr_overlap`.
+
+    Parameters
+    ----------
+    df : pd.DataFrame or ScoreLattice
+        Data with the columns `'pleasantness_score'`, `'presence_score'` and
+        `group_by_col`.
+    group_by_col : str
+        Grouping column, e.g. "Smell source".
+    p : float, optional
+        Probability mass of the HDRs, default 0.5.
+    eval_n : int, optional
+        Number of grid points per axis, default 300.
+    xlim, ylim : tuple(float, float), optional
+        Grid limits, default (-1, 1).
+    kde_backend : str, optional
+        KDE evaluation backend, see `smellscapy.plotting.utils.kde_on_grid`.
+    n_jobs : int, optional
+        Number of processes, see `smellscapy.plotting.utils.kde_on_grid_many`.
+    hdr_method : {"sort", "histogram"}, optional
+        HDR threshold algorithm, see `hdr_masks`.
+
+    Returns
+    -------
+    geometry : pd.DataFrame
+        Area, centroid and principal axes of each group's HDR, indexed by
+        the sorted group labels.
+    intersection : pd.DataFrame
+        G x G intersection areas.
+    jaccard : pd.DataFrame
+        G x G Jaccard indices.
+
+    Examples
+    --------
+        >>> from smellscapy.analysis.hdr_geometry import group_hdr_geometry
+        >>> geometry, intersection, jaccard = group_hdr_geometry(df, "Smell source")
+    """
+    df = as_score_frame(df)
+    order = sorted(df[group_by_col].dropna().unique(), key=str)
+    codes = pd.Categorical(df[group_by_col], categories=order).codes
+
+    xi = np.linspace(xlim[0], xlim[1], eval_n)
+    yi = np.linspace(ylim[0], ylim[1], eval_n)
+    XX, YY = np.meshgrid(xi, yi, indexing="xy")
+    cube = ut.kde_on_grid_groups(df["pleasantness_score"].to_numpy(), df["presence_score"].to_numpy(), codes,
+                                 XX, YY, n_groups=len(order), backend=kde_backend, n_jobs=n_jobs)
+
+    masks, _ = hdr_masks(cube, p, method=hdr_method)
+    intersection, jaccard = hdr_overlap(masks, XX, YY, order)
+    return hdr_geometry(masks, XX, YY, order), intersection, jaccard
@@ -1,25 +1,243 @@
+import numpy as np
 import pandas as pd
 from smellscapy.constants import COS45, WEIGHT
+from smellscapy.surveys import ATTRIBUTES_COLUMN_NAMES, attribute_columns
 
 
 
-def calculate_pleasantness(df: pd.DataFrame):
+SCORE_MATRIX = WEIGHT * np.array(
+    [
+        #  pleasantness  presence
+        [1.0, 0.0],             # pleasant
+        [0.0, 1.0],             # present
+        [COS45, -COS45],        # light
+        [COS45, COS45],         # engaging
+        [-1.0, 0.0],            # unpleasant
+        [0.0, -1.0],            # absent
+        [-COS45, COS45],        # overpowering
+        [-COS45, -COS45],       # detached
+    ]
+)
+"""
+Projection of the eight attributes (in the order of
+`ATTRIBUTES_COLUMN_NAMES`) onto the pleasantness and presence axes.
+Multiplying an (N, 8) block of responses by this (8, 2) matrix gives both
+scores at once.
+"""
+
+SCORE_COLUMN_NAMES = ["pleasantness_score", "presence_score"]
+"""
+Names of the columns holding the pleasantness and presence scores.
+"""
+
+
+
+_BLOCK_ROWS = 1 << 16
+"""
+Number of rows projected per block, so that no (N, 8) copy of the
+attribute columns is ever materialised.
+"""
+
+
+
+def _frame_columns(df: pd.DataFrame, dtype) -> list:
+    """
+    Return the attribute columns of `df` as 1D arrays, without copying
+    columns that already use a NumPy numeric dtype.
+    """
+    columns = []
+    for col in ATTRIBUTES_COLUMN_NAMES:
+        series = df[col]
+        if isinstance(series.dtype, np.dtype) and series.dtype.kind in "biuf":
+            columns.append(series.to_numpy())
+        else:
+            columns.append(series.to_numpy(dtype=dtype, na_value=np.nan))
+    return columns
+
+
+
+def _project_columns(columns: list, dtype=np.float64, out=None) -> np.ndarray:
+    """
+    Project the eight attribute columns through `SCORE_MATRIX`.
+
+    The columns are gathered block by block into a small (`_BLOCK_ROWS`, 8)
+    buffer, and each block is multiplied by the matrix straight into `out`.
+    Returns an array of shape (N, 2) with pleasantness and presence; when
+    allocated here it is Fortran-ordered, so that each score is a
+    contiguous column.
+    """
+    n = len(columns[0])
+    if out is None:
+        out = np.empty((n, 2), dtype=dtype, order="F")
+    elif out.shape != (n, 2):
+        raise ValueError(f"out must have shape ({n}, 2), got {out.shape}")
+
+    dtype = out.dtype
+    matrix = SCORE_MATRIX.astype(dtype, copy=False)
+
+    block = np.empty((min(n, _BLOCK_ROWS), len(columns)), dtype=dtype)
+    for start in range(0, n, _BLOCK_ROWS):
+        stop = min(start + _BLOCK_ROWS, n)
+        buf = block[: stop - start]
+        for j, col in enumerate(columns):
+            buf[:, j] = col[start:stop]
+        np.matmul(buf, matrix, out=out[start:stop])
+
+    return out
+
+
+
+def _project(df: pd.DataFrame, dtype=np.float64, out=None) -> np.ndarray:
+    """Project the attribute columns of `df` through `SCORE_MATRIX`."""
+    return _project_columns(_frame_columns(df, dtype), dtype=dtype, out=out)
+
+
+
+def scores_from_array(attributes, dtype=np.float64, out=None) -> np.ndarray:
+    """
+    Calculate pleasantness and presence from an array of responses.
+
+    This is the array-level core of `calculate_scores`: it skips DataFrame
+    construction and column lookups entirely, which matters when scoring
+    many small samples (simulations, bootstrap).
+
+    Parameters
+    ----------
+    attributes : array-like
+        Either an (N, 8) array with the attributes in the order of
+        `ATTRIBUTES_COLUMN_NAMES`, or a structured array with one field per
+        attribute name. Missing values (NaN) give NaN scores.
+    dtype : numpy dtype, optional
+        Floating point type of the scores. Default is ``np.float64``.
+        Ignored when `out` is given.
+    out : numpy.ndarray, optional
+        Array of shape (N, 2) receiving the scores.
+
+    Returns
+    -------
+    scores : numpy.ndarray, shape (N, 2)
+        Pleasantness (column 0) and presence (column 1) of each response.
+
+    Examples
+    --------
+        >>> import numpy as np
+        >>> from smellscapy.calculations import scores_from_array
+        >>> rng = np.random.default_rng(0)
+        >>> scores = scores_from_array(rng.integers(1, 6, size=(1000, 8)))
     """
-    Calculate pleasantness for each row in a survey dataset. 
+    attributes = np.asarray(attributes)
+    if (attributes.dtype.names is None and attributes.ndim == 2
+            and attributes.shape[1] == SCORE_MATRIX.shape[0] and attributes.shape[0] <= _BLOCK_ROWS):
+        if out is not None and out.shape != (attributes.shape[0], 2):
+            raise ValueError(f"out must have shape ({attributes.shape[0]}, 2), got {out.shape}")
+        dtype = dtype if out is None else out.dtype
+        return np.matmul(attributes.astype(dtype, copy=False), SCORE_MATRIX.astype(dtype, copy=False), out=out)
+
+    return _project_columns(attribute_columns(attributes), dtype=dtype, out=out)
 
-    This function process the provided survey DataFrame and appends 
+
+
+def _attach(df: pd.DataFrame, scores: dict, inplace: bool):
+    """
+    Attach score columns to `df`, either on a copy (``df.assign``) or
+    directly on `df`. Setting columns in place only allocates the new
+    columns: the other columns are not copied, with or without pandas
+    Copy-on-Write. pandas copies an array into a new column, so existing
+    score columns of the same dtype are overwritten in their own storage
+    instead.
+    """
+    if not inplace:
+        return df.assign(**scores)
+    for name, values in scores.items():
+        if name in df.columns and df[name].dtype == values.dtype:
+            df.loc[:, name] = values
+        else:
+            df[name] = values
+    return None
+
+
+
+def calculate_scores(df: pd.DataFrame, dtype=np.float64, inplace: bool = False, out=None):
+    """
+    Calculate pleasantness and presence for each row in a survey dataset.
+
+    Both scores are computed in a single pass, by multiplying the eight
+    attribute columns by the constant (8, 2) `SCORE_MATRIX`, and appended
+    to the DataFrame in a single copy.
+
+    For large DataFrames, ``inplace=True`` adds the score columns to `df`
+    itself instead of copying all of its columns; when the score columns
+    already exist with the same dtype, they are overwritten without
+    allocating new ones. `out` lets the scores be written into a
+    preallocated array (for example a buffer reused across chunks); it
+    does not avoid a copy when combined with ``inplace=True``, since pandas
+    copies the values into the DataFrame's own columns.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        A DataFrame containing survey data. Must include the columns listed
+        in `ATTRIBUTES_COLUMN_NAMES`.
+    dtype : numpy dtype, optional
+        Floating point type of the scores. Default is ``np.float64``;
+        ``np.float32`` halves the memory taken by the score columns.
+        Ignored when `out` is given.
+    inplace : bool, optional
+        If True, add (or overwrite) the columns `'pleasantness_score'` and
+        `'presence_score'` in `df` and return None. Default is False.
+    out : numpy.ndarray, optional
+        Array of shape (len(df), 2) receiving the (pleasantness, presence)
+        scores. If given and `inplace` is False, `df` is left untouched and
+        `out` is returned.
+
+    Returns
+    -------
+    pandas.DataFrame, numpy.ndarray or None
+        A copy of the input DataFrame with the additional columns
+        `'pleasantness_score'` and `'presence_score'`; `out` when it is
+        given; None when ``inplace=True``.
+
+    Examples
+    --------
+        >>> import pandas as pd
+        >>> from smellscapy.surveys import validate
+        >>> from smellscapy.databases.DataExample import load_example_data
+        >>> from smellscapy.calculations import calculate_scores
+        >>> df = load_example_data()
+        >>> df, excl_df = validate(df)
+        >>> df = calculate_scores(df)
+        >>> calculate_scores(df, inplace=True)   # no copy of df
+    """
+    scores = _project(df, dtype=dtype, out=out)
+    if out is not None and not inplace:
+        return out
+
+    return _attach(df, dict(zip(SCORE_COLUMN_NAMES, scores.T)), inplace)
+
+
+
+def calculate_pleasantness(df: pd.DataFrame, inplace: bool = False):
+    """
+    Calculate pleasantness for each row in a survey dataset.
+
+    This function process the provided survey DataFrame and appends
     a new column called `'pleasantness_score'` based on pleasant, unpleasant and other parameters.
+    Use `calculate_scores` to compute pleasantness and presence together.
 
     Parameters
     ----------
     df : pd.DataFrame
         A DataFrame containing survey data. Must include columns
         required for computing the score.
+    inplace : bool, optional
+        If True, add the column `'pleasantness_score'` to `df` itself and
+        return None. Default is False.
 
     Returns
     -------
-    pandas.DataFrame
-        A copy of the input DataFrame with an additional column `'pleasantness_score'`.
+    pandas.DataFrame or None
+        A copy of the input DataFrame with an additional column
+        `'pleasantness_score'`, or None when ``inplace=True``.
 
     Examples
     --------
@@ -32,32 +250,32 @@ def calculate_pleasantness(df: pd.DataFrame):
         >>> df = calculate_pleasantness(df)
     """
 
-    return df.assign(pleasantness_score=(
-            (df['pleasant'] - df['unpleasant']) + 
-            COS45 * (df['light'] - (df['overpowering'])) +
-            COS45 * (df['engaging'] - (df['detached']))
-        ) * WEIGHT
-    )
-    
+    return _attach(df, {"pleasantness_score": _project(df)[:, 0]}, inplace)
+
 
 
-def calculate_presence(df: pd.DataFrame):
+def calculate_presence(df: pd.DataFrame, inplace: bool = False):
     """
-    Calculate presence for each row in a survey dataset. 
+    Calculate presence for each row in a survey dataset.
 
-    This function process the provided survey DataFrame and appends 
+    This function process the provided survey DataFrame and appends
     a new column called `'presence_score'` based on present, absent and other parameters.
+    Use `calculate_scores` to compute pleasantness and presence together.
 
     Parameters
     ----------
     df : pd.DataFrame
         A DataFrame containing survey data. Must include columns
         required for computing the score.
+    inplace : bool, optional
+        If True, add the column `'presence_score'` to `df` itself and
+        return None. Default is False.
 
     Returns
     -------
-    pandas.DataFrame
-        A copy of the input DataFrame with an additional column `'presence_score'`.
+    pandas.DataFrame or None
+        A copy of the input DataFrame with an additional column
+        `'presence_score'`, or None when ``inplace=True``.
 
     Examples
     --------
@@ -68,13 +286,7 @@ def calculate_presence(df: pd.DataFrame):
         >>> df = load_example_data()
         >>> df, excl_df = validate(df)
         >>> df = calculate_presence(df)
-    
-    """
 
-    return df.assign(presence_score=(
-            (df['present'] - (df['absent'])) +
-            COS45 * ((df['overpowering']) - df['light']) +
-            COS45 * (df['engaging'] - (df['detached']))
-        ) * WEIGHT
-    )
+    """
 
+    return _attach(df, {"presence_score": _project(df)[:, 1]}, inplace)
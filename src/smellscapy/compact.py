@@ -0,0 +1,303 @@
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+from pandas.api.types import union_categoricals
+
+from smellscapy.surveys import (
+    ATTRIBUTES_COLUMN_NAMES,
+    ValidationError,
+    ValidationReport,
+    ValidationResult,
+    _value_masks,
+    attribute_masks,
+)
+from smellscapy.calculations import SCORE_COLUMN_NAMES, scores_from_array
+from smellscapy.patterns import encode_patterns
+from smellscapy.lattice import ScoreLattice
+
+
+
+MISSING_CODE = 0
+"""
+Sentinel stored in the compact attribute matrix for missing answers.
+"""
+
+INVALID_CODE = 255
+"""
+Sentinel stored in the compact attribute matrix for answers that are not
+a number in `ATTRIBUTES_VALUES` (the original value is not kept).
+"""
+
+
+
+def encode_attributes(df: pd.DataFrame) -> np.ndarray:
+    """
+    Encode the attribute columns of a DataFrame as a contiguous (N, 8)
+    uint8 matrix.
+
+    Answers in `ATTRIBUTES_VALUES` are stored as is, missing answers as
+    `MISSING_CODE` and any other value as `INVALID_CODE`.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        A DataFrame including the columns listed in `ATTRIBUTES_COLUMN_NAMES`.
+
+    Returns
+    -------
+    numpy.ndarray of uint8, shape (N, 8)
+        Attributes in the order of `ATTRIBUTES_COLUMN_NAMES`.
+    """
+    missing_columns = [col for col in ATTRIBUTES_COLUMN_NAMES if col not in df.columns]
+    if missing_columns:
+        raise ValidationError(f"Missing mandatory column/s: {', '.join(missing_columns)}")
+
+    codes = np.empty((len(df), len(ATTRIBUTES_COLUMN_NAMES)), dtype=np.uint8)
+    for j, col in enumerate(ATTRIBUTES_COLUMN_NAMES):
+        values = df[col].to_numpy()
+        missing, invalid = _value_masks(values)
+        ok = ~(missing | invalid)
+        codes[:, j] = MISSING_CODE
+        codes[invalid, j] = INVALID_CODE
+        codes[ok, j] = values[ok].astype(np.uint8)
+    return codes
+
+
+
+@dataclass(eq=False)
+class CompactSurvey:
+    """
+    Memory-compact representation of survey data.
+
+    The eight attributes are stored as a contiguous (N, 8) uint8 matrix,
+    with `MISSING_CODE` and `INVALID_CODE` as sentinels, instead of eight
+    int64/float64 columns: the attribute block takes 8 bytes per response
+    instead of 64. Text metadata columns (e.g. ``LocationID``,
+    ``Smell source``, mood) are dictionary-encoded as pandas categoricals.
+
+    Attributes
+    ----------
+    attributes : numpy.ndarray of uint8, shape (N, 8)
+        Attribute codes, in the order of `ATTRIBUTES_COLUMN_NAMES`.
+    metadata : pandas.DataFrame
+        The other columns, row-aligned with `attributes`. Its index is the
+        index of the survey.
+    columns : list of str
+        Column order of the original DataFrame, used by `to_frame`.
+    """
+
+    attributes: np.ndarray
+    metadata: pd.DataFrame
+    columns: List[str]
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, categorical: Optional[Sequence[str]] = None) -> "CompactSurvey":
+        """
+        Build a compact survey from a DataFrame.
+
+        Parameters
+        ----------
+        df : pandas.DataFrame
+            Survey data including the columns listed in
+            `ATTRIBUTES_COLUMN_NAMES`.
+        categorical : sequence of str, optional
+            Metadata columns to dictionary-encode. By default, all text
+            (object or string) columns are encoded.
+
+        Returns
+        -------
+        CompactSurvey
+        """
+        attributes = encode_attributes(df)
+        metadata = df.drop(columns=ATTRIBUTES_COLUMN_NAMES)
+        if categorical is None:
+            categorical = [
+                col for col in metadata.columns
+                if pd.api.types.is_object_dtype(metadata[col]) or pd.api.types.is_string_dtype(metadata[col])
+            ]
+        metadata = metadata.astype({col: "category" for col in categorical})
+        return cls(attributes, metadata, list(df.columns))
+
+    @classmethod
+    def from_csv(cls, filepath_or_buffer, sep: str = ";", chunksize: int = 100_000,
+                 categorical: Optional[Sequence[str]] = None, **read_csv_kwargs) -> "CompactSurvey":
+        """
+        Read a survey CSV file chunk by chunk straight into the compact form.
+
+        Only one chunk is held in its full-width form at a time, so loading
+        needs about the memory of the compact result plus one chunk.
+
+        Parameters
+        ----------
+        filepath_or_buffer : str, path object or file-like object
+            CSV file in the same format as the example data.
+        sep : str, optional
+            Field delimiter. Default is ``";"``.
+        chunksize : int, optional
+            Number of rows read per chunk. Default is 100 000.
+        categorical : sequence of str, optional
+            Metadata columns to dictionary-encode, see `from_frame`.
+        **read_csv_kwargs : dict, optional
+            Additional keyword arguments passed to ``pandas.read_csv``.
+
+        Returns
+        -------
+        CompactSurvey
+        """
+        parts = []
+        with pd.read_csv(filepath_or_buffer, sep=sep, chunksize=chunksize, **read_csv_kwargs) as reader:
+            for chunk in reader:
+                parts.append(cls.from_frame(chunk, categorical=categorical))
+        return cls.concat(parts)
+
+    @classmethod
+    def concat(cls, parts: Sequence["CompactSurvey"]) -> "CompactSurvey":
+        """
+        Concatenate compact surveys, merging the categories of the
+        dictionary-encoded columns.
+
+        The parts are recoded to the union of their categories before they
+        are concatenated, so the columns stay categorical throughout. An
+        empty sequence gives an empty survey.
+        """
+        if not parts:
+            return cls(np.empty((0, len(ATTRIBUTES_COLUMN_NAMES)), dtype=np.uint8),
+                       pd.DataFrame(index=pd.RangeIndex(0)), list(ATTRIBUTES_COLUMN_NAMES))
+
+        dtypes = {}
+        for col in parts[0].metadata.columns:
+            series = [p.metadata[col] for p in parts]
+            if any(isinstance(s.dtype, pd.CategoricalDtype) for s in series):
+                # a chunk where a text column is all NaN is read as float
+                empty = [
+                    s.iloc[:0] if isinstance(s.dtype, pd.CategoricalDtype) else s.iloc[:0].astype(object).astype("category")
+                    for s in series
+                ]
+                dtypes[col] = pd.CategoricalDtype(union_categoricals(empty).categories)
+
+        attributes = np.concatenate([p.attributes for p in parts])
+        metadata = pd.concat([p.metadata.astype(dtypes) for p in parts])
+        return cls(attributes, metadata, parts[0].columns)
+
+    def __len__(self) -> int:
+        return self.attributes.shape[0]
+
+    @property
+    def index(self) -> pd.Index:
+        """Index of the survey rows."""
+        return self.metadata.index
+
+    def memory_usage(self) -> int:
+        """Number of bytes used by the attribute matrix and the metadata."""
+        return int(self.attributes.nbytes + self.metadata.memory_usage(deep=True).sum())
+
+    def take(self, rows) -> "CompactSurvey":
+        """Return the rows selected by a boolean mask or integer positions."""
+        return CompactSurvey(self.attributes[rows], self.metadata.iloc[rows], self.columns)
+
+    def masks(self):
+        """Return the (missing, invalid) (N, 8) masks of the attribute codes."""
+        return attribute_masks(self.attributes, missing_value=MISSING_CODE)
+
+    def patterns(self) -> np.ndarray:
+        """
+        Return the base-5 pattern code of each response, see
+        `smellscapy.patterns.encode_patterns`.
+        """
+        return encode_patterns(self.attributes, missing_value=MISSING_CODE)
+
+    def lattice(self) -> ScoreLattice:
+        """
+        Return the exact lattice coordinates of the scores, see
+        `smellscapy.lattice.ScoreLattice`.
+        """
+        lattice = ScoreLattice.from_attributes(self.attributes, missing_value=MISSING_CODE)
+        lattice.index = self.index
+        return lattice
+
+    def validate(self, errors: str = "raise") -> ValidationResult:
+        """
+        Validate the compact survey, like `smellscapy.surveys.validate`.
+
+        Parameters
+        ----------
+        errors : {"raise", "collect"}, optional
+            See `smellscapy.surveys.validate`.
+
+        Returns
+        -------
+        ValidationResult
+            Unpacks as ``(survey, excluded)`` in both modes: the rows with
+            complete, valid answers and the excluded rows (or None), as
+            compact surveys. The report is its ``report`` attribute.
+        """
+        if errors not in ("raise", "collect"):
+            raise ValueError(f"errors must be 'raise' or 'collect', got {errors!r}")
+
+        missing, invalid = self.masks()
+        report = ValidationReport.from_masks(self.index, missing, invalid)
+
+        if report.invalid_rows.size and errors == "raise":
+            logger.info(report.summary())
+            raise ValidationError(
+                "Attribute values are not valid. Please use numbers in range [1, 2, 3, 4, 5]",
+                report=report,
+            )
+
+        excluded = report.excluded_rows
+        if excluded.size:
+            keep = np.ones(len(self), dtype=bool)
+            keep[excluded] = False
+            survey, excl = self.take(keep), self.take(~keep)
+            logger.info(f"Removed {excluded.size} rows with invalid data")
+        else:
+            survey, excl = self, None
+            logger.info("All data passed quality checks")
+
+        return ValidationResult(survey, excl, report)
+
+    def scores(self, dtype=np.float64, out=None) -> np.ndarray:
+        """
+        Calculate pleasantness and presence straight from the uint8 matrix.
+
+        Rows with missing or invalid answers get NaN scores.
+
+        Returns
+        -------
+        numpy.ndarray, shape (N, 2)
+            Pleasantness (column 0) and presence (column 1).
+        """
+        scores = scores_from_array(self.attributes, dtype=dtype, out=out)
+        missing, invalid = self.masks()
+        scores[(missing | invalid).any(axis=1)] = np.nan
+        return scores
+
+    def to_frame(self, scores: bool = False) -> pd.DataFrame:
+        """
+        Expand the compact survey back into a regular DataFrame.
+
+        Attribute columns are uint8 when every answer is valid, and float64
+        with NaN for missing (and invalid) answers otherwise.
+
+        Parameters
+        ----------
+        scores : bool, optional
+            If True, append the `'pleasantness_score'` and
+            `'presence_score'` columns.
+        """
+        missing, invalid = self.masks()
+        bad = missing | invalid
+        if bad.any():
+            values = self.attributes.astype(np.float64)
+            values[bad] = np.nan
+        else:
+            values = self.attributes
+        data = pd.DataFrame(values, columns=ATTRIBUTES_COLUMN_NAMES, index=self.index)
+        df = pd.concat([self.metadata, data], axis=1)[self.columns]
+        if scores:
+            computed = self.scores()
+            df = df.assign(**dict(zip(SCORE_COLUMN_NAMES, computed.T)))
+        return df
@@ -1,17 +1,30 @@
 
 from importlib import resources
+from typing import Union
 from loguru import logger
 import pandas as pd
 
+from smellscapy.compact import CompactSurvey
 
 
-def load_example_data() -> pd.DataFrame: 
+
+def load_example_data(compact: bool = False) -> Union[pd.DataFrame, CompactSurvey]:
     """ 
     Load the data example csv file to a DataFrame.
+
+    Parameters
+    ----------
+    compact : bool, optional
+        If True, return a `smellscapy.compact.CompactSurvey` (uint8
+        attribute matrix and dictionary-encoded metadata) instead of a
+        DataFrame. Default is False.
     """
     
     data_resource = resources.files("smellscapy.data").joinpath("DataExample.csv")
     with resources.as_file(data_resource) as f:
-        data = pd.read_csv(f, sep=";")
+        if compact:
+            data = CompactSurvey.from_csv(f, sep=";")
+        else:
+            data = pd.read_csv(f, sep=";")
     logger.info("Loaded data example from Smellscapy's included CSV file.")
     return data
\ No newline at end of file
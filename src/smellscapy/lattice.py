@@ -0,0 +1,317 @@
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from smellscapy.constants import COS45, WEIGHT
+from smellscapy.surveys import ATTRIBUTES_COLUMN_NAMES, attribute_columns, attribute_masks
+from smellscapy.calculations import SCORE_COLUMN_NAMES
+
+
+
+LATTICE_MATRIX = np.array(
+    [
+        #  a   b   c   d
+        [1, 0, 0, 0],       # pleasant
+        [0, 0, 1, 0],       # present
+        [0, 1, 0, -1],      # light
+        [0, 1, 0, 1],       # engaging
+        [-1, 0, 0, 0],      # unpleasant
+        [0, 0, -1, 0],      # absent
+        [0, -1, 0, 1],      # overpowering
+        [0, -1, 0, -1],     # detached
+    ],
+    dtype=np.int8,
+)
+"""
+Integer projection of the eight attributes (in the order of
+`ATTRIBUTES_COLUMN_NAMES`) onto the lattice coordinates (a, b, c, d), with
+
+    pleasantness = WEIGHT * (a + COS45 * b)
+    presence     = WEIGHT * (c + COS45 * d)
+"""
+
+A_RANGE = (-4, 4)
+"""
+Range of the integer coordinates a and c (difference of two answers).
+"""
+
+B_RANGE = (-8, 8)
+"""
+Range of the integer coordinates b and d (sum of two differences).
+"""
+
+N_LEVELS = (A_RANGE[1] - A_RANGE[0] + 1) * (B_RANGE[1] - B_RANGE[0] + 1)
+"""
+Number of distinct values each score can take (153).
+"""
+
+MISSING_COORD = np.iinfo(np.int8).min
+"""
+Coordinate stored for responses without a score.
+"""
+
+
+
+def level_values(dtype=np.float64) -> np.ndarray:
+    """
+    Return the score value of each lattice level key.
+
+    The key of a score with coordinates (a, b) is
+    ``(a - A_RANGE[0]) * 17 + (b - B_RANGE[0])``, in ``[0, N_LEVELS)``;
+    the same table applies to pleasantness (a, b) and presence (c, d).
+    Keys are not sorted by value.
+    """
+    a = np.arange(A_RANGE[0], A_RANGE[1] + 1)
+    b = np.arange(B_RANGE[0], B_RANGE[1] + 1)
+    return (WEIGHT * (a[:, None] + COS45 * b[None, :])).ravel().astype(dtype)
+
+
+
+def _level_keys(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    n_b = B_RANGE[1] - B_RANGE[0] + 1
+    keys = (first.astype(np.int32) - A_RANGE[0]) * n_b + (second.astype(np.int32) - B_RANGE[0])
+    keys[first == MISSING_COORD] = -1
+    return keys
+
+
+
+_BUCKETS_PER_UNIT = 1024
+"""
+Resolution of the table used to snap float scores to the lattice; a
+bucket is several times narrower than the smallest gap between two levels
+(~5e-3).
+"""
+
+
+
+@lru_cache(maxsize=None)
+def _nearest_level_table() -> np.ndarray:
+    """Nearest level key of the centre of each bucket over [-1, 1]."""
+    levels = level_values()
+    n_buckets = 2 * _BUCKETS_PER_UNIT + 1
+    centres = (np.arange(n_buckets) + 0.5) / _BUCKETS_PER_UNIT - 1.0
+    return np.abs(centres[:, None] - levels[None, :]).argmin(axis=1).astype(np.int16)
+
+
+
+def _solve_lattice(scores: np.ndarray, atol: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Recover the integer coordinates (a, b) of scores WEIGHT * (a + COS45 * b),
+    by snapping each score to the nearest level value with a bucket table,
+    in O(N).
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    table = _nearest_level_table()
+    nan = np.isnan(scores)
+
+    bucket = np.floor((scores + 1.0) * _BUCKETS_PER_UNIT)
+    bucket = np.clip(np.nan_to_num(bucket), 0, table.size - 1).astype(np.intp)
+    keys = table[bucket]
+    if (np.abs(scores - level_values()[keys]) > atol)[~nan].any():
+        raise ValueError("Scores are not on the pleasantness/presence lattice")
+
+    n_b = B_RANGE[1] - B_RANGE[0] + 1
+    first = (keys // n_b + A_RANGE[0]).astype(np.int8)
+    second = (keys % n_b + B_RANGE[0]).astype(np.int8)
+    first[nan] = MISSING_COORD
+    second[nan] = MISSING_COORD
+    return first, second
+
+
+
+class ScoreLattice:
+    """
+    Exact representation of pleasantness and presence scores.
+
+    Every score is ``WEIGHT * (a + COS45 * b)`` with small integers a and b,
+    so each response is stored as two int8 pairs, (a, b) for pleasantness
+    and (c, d) for presence: 4 bytes per response instead of 16 for two
+    float64 scores. Grouping, equality, deduplication and counting are done
+    on the integer coordinates, with no floating point tolerance; float
+    scores are only computed when `pleasantness` or `presence` is accessed.
+
+    Parameters
+    ----------
+    coords : numpy.ndarray of int8, shape (N, 4)
+        Lattice coordinates (a, b, c, d). Rows without a score hold
+        `MISSING_COORD`.
+    index : pandas.Index, optional
+        Row labels, e.g. the index of the survey DataFrame.
+
+    Examples
+    --------
+        >>> from smellscapy.databases.DataExample import load_example_data
+        >>> from smellscapy.lattice import ScoreLattice
+        >>> lattice = ScoreLattice.from_attributes(load_example_data())
+        >>> keys, counts = lattice.counts()
+    """
+
+    def __init__(self, coords: np.ndarray, index: Optional[pd.Index] = None):
+        coords = np.ascontiguousarray(coords, dtype=np.int8)
+        if coords.ndim != 2 or coords.shape[1] != 4:
+            raise ValueError(f"coords must have shape (N, 4), got {coords.shape}")
+        self.coords = coords
+        self.index = pd.RangeIndex(len(coords)) if index is None else index
+
+    @classmethod
+    def from_attributes(cls, attributes, missing_value=None) -> "ScoreLattice":
+        """
+        Compute the lattice coordinates from the eight attributes.
+
+        Parameters
+        ----------
+        attributes : pandas.DataFrame or array-like
+            A DataFrame with the attribute columns, an (N, 8) array or a
+            structured array with the eight attribute fields. Rows with
+            missing or out-of-range answers get `MISSING_COORD`.
+        missing_value : scalar, optional
+            Sentinel marking missing answers in integer arrays.
+        """
+        index = None
+        if isinstance(attributes, pd.DataFrame):
+            index = attributes.index
+            columns = [attributes[col].to_numpy() for col in ATTRIBUTES_COLUMN_NAMES]
+        else:
+            columns = attribute_columns(attributes)
+
+        missing, invalid = attribute_masks(columns, missing_value)
+        bad = (missing | invalid).any(axis=1)
+
+        coords = np.zeros((len(columns[0]), 4), dtype=np.int8)
+        for col, weights in zip(columns, LATTICE_MATRIX):
+            values = np.where(bad, 0, col).astype(np.int8)
+            for k in np.flatnonzero(weights):
+                coords[:, k] += weights[k] * values
+        coords[bad] = MISSING_COORD
+        return cls(coords, index)
+
+    @classmethod
+    def from_scores(cls, pleasantness, presence, atol: float = 1e-6, index=None) -> "ScoreLattice":
+        """
+        Recover the lattice coordinates of float scores.
+
+        Each score is snapped to the nearest lattice value; `atol` must stay
+        well below the smallest gap between two values (~5e-3). Float32
+        scores are recovered exactly with the default.
+
+        Raises
+        ------
+        ValueError
+            If a score is farther than `atol` from every lattice value.
+        """
+        a, b = _solve_lattice(np.asarray(pleasantness).ravel(), atol)
+        c, d = _solve_lattice(np.asarray(presence).ravel(), atol)
+        return cls(np.column_stack([a, b, c, d]), index)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, atol: float = 1e-6) -> "ScoreLattice":
+        """
+        Build the lattice from the attribute columns of `df` or, if they are
+        not available, from its score columns.
+        """
+        if all(col in df.columns for col in ATTRIBUTES_COLUMN_NAMES):
+            return cls.from_attributes(df)
+        return cls.from_scores(df[SCORE_COLUMN_NAMES[0]], df[SCORE_COLUMN_NAMES[1]], atol=atol, index=df.index)
+
+    def __len__(self) -> int:
+        return self.coords.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        """Number of bytes used by the coordinates."""
+        return self.coords.nbytes
+
+    @property
+    def valid(self) -> np.ndarray:
+        """Boolean mask of the rows with a score."""
+        return self.coords[:, 0] != MISSING_COORD
+
+    def _scores(self, first: int, dtype) -> np.ndarray:
+        a = self.coords[:, first].astype(dtype)
+        b = self.coords[:, first + 1].astype(dtype)
+        values = dtype(WEIGHT) * (a + dtype(COS45) * b)
+        values[~self.valid] = np.nan
+        return values
+
+    @property
+    def pleasantness(self) -> np.ndarray:
+        """Pleasantness scores (float64), computed on access."""
+        return self._scores(0, np.float64)
+
+    @property
+    def presence(self) -> np.ndarray:
+        """Presence scores (float64), computed on access."""
+        return self._scores(2, np.float64)
+
+    def pleasantness_keys(self) -> np.ndarray:
+        """Pleasantness level keys in ``[0, N_LEVELS)`` (-1 if missing), see `level_values`."""
+        return _level_keys(self.coords[:, 0], self.coords[:, 1])
+
+    def presence_keys(self) -> np.ndarray:
+        """Presence level keys in ``[0, N_LEVELS)`` (-1 if missing), see `level_values`."""
+        return _level_keys(self.coords[:, 2], self.coords[:, 3])
+
+    def keys(self) -> np.ndarray:
+        """
+        Joint (pleasantness, presence) keys in ``[0, N_LEVELS ** 2)``, or -1
+        for missing rows: two rows have the same key if and only if they
+        have exactly the same scores.
+        """
+        p, q = self.pleasantness_keys(), self.presence_keys()
+        keys = p * N_LEVELS + q
+        keys[p < 0] = -1
+        return keys
+
+    def counts(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Count the responses at each distinct (pleasantness, presence) point.
+
+        Returns
+        -------
+        keys : numpy.ndarray of int
+            Distinct joint keys (see `keys`), sorted.
+        counts : numpy.ndarray of int64
+            Number of responses at each point.
+        """
+        keys = self.keys()
+        counts = np.bincount(keys[keys >= 0], minlength=N_LEVELS ** 2)
+        unique = np.flatnonzero(counts)
+        return unique, counts[unique]
+
+    @staticmethod
+    def points(keys, dtype=np.float64) -> np.ndarray:
+        """Return the (pleasantness, presence) values of joint keys as an (K, 2) array."""
+        keys = np.asarray(keys)
+        levels = level_values(dtype)
+        return np.column_stack([levels[keys // N_LEVELS], levels[keys % N_LEVELS]])
+
+    def to_frame(self, metadata: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        Return the float scores as a DataFrame with the score columns.
+
+        Parameters
+        ----------
+        metadata : pandas.DataFrame, optional
+            Row-aligned columns (e.g. `CompactSurvey.metadata`) to prepend,
+            so that the result can be grouped.
+        """
+        scores = pd.DataFrame(
+            {SCORE_COLUMN_NAMES[0]: self.pleasantness, SCORE_COLUMN_NAMES[1]: self.presence},
+            index=self.index,
+        )
+        if metadata is None:
+            return scores
+        return pd.concat([metadata.set_axis(self.index), scores], axis=1)
+
+
+
+def as_score_frame(data) -> pd.DataFrame:
+    """
+    Return `data` as a DataFrame with the score columns, expanding a
+    `ScoreLattice` if needed; DataFrames are returned unchanged.
+    """
+    if isinstance(data, ScoreLattice):
+        return data.to_frame()
+    return data
@@ -0,0 +1,168 @@
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+from smellscapy.surveys import ATTRIBUTES_COLUMN_NAMES, ATTRIBUTES_VALUES, attribute_columns, attribute_masks
+from smellscapy.calculations import scores_from_array
+
+
+
+N_LEVELS = len(ATTRIBUTES_VALUES)
+"""
+Number of answer levels of each attribute.
+"""
+
+N_PATTERNS = N_LEVELS ** len(ATTRIBUTES_COLUMN_NAMES)
+"""
+Number of possible response patterns (5 ** 8 = 390 625).
+"""
+
+MISSING_PATTERN = N_PATTERNS
+"""
+Code given to responses with a missing or out-of-range answer.
+"""
+
+_PLACE_VALUES = N_LEVELS ** np.arange(len(ATTRIBUTES_COLUMN_NAMES), dtype=np.uint32)
+
+
+
+def _columns(attributes) -> list:
+    if isinstance(attributes, pd.DataFrame):
+        return [attributes[col].to_numpy() for col in ATTRIBUTES_COLUMN_NAMES]
+    if isinstance(attributes, list):
+        return attributes
+    return attribute_columns(attributes)
+
+
+
+def encode_patterns(attributes, missing_value=None) -> np.ndarray:
+    """
+    Encode each response as a single integer pattern code.
+
+    The eight answers (1-5) of a response are read as the digits of a
+    base-5 number, the first attribute of `ATTRIBUTES_COLUMN_NAMES` being
+    the least significant digit. Every response therefore maps to one of
+    `N_PATTERNS` codes, and both scores are a function of the code only.
+
+    Parameters
+    ----------
+    attributes : pandas.DataFrame or array-like
+        A DataFrame with the attribute columns, an (N, 8) array or a
+        structured array with the eight attribute fields.
+    missing_value : scalar, optional
+        Sentinel marking missing answers in integer arrays (see
+        `smellscapy.surveys.attribute_masks`).
+
+    Returns
+    -------
+    codes : numpy.ndarray of uint32, shape (N,)
+        Pattern codes in ``[0, N_PATTERNS)``, or `MISSING_PATTERN` for
+        responses with a missing or out-of-range answer.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from smellscapy.patterns import encode_patterns
+    >>> encode_patterns(np.array([[1, 1, 1, 1, 1, 1, 1, 1], [2, 1, 1, 1, 1, 1, 1, 1]]))
+    array([0, 1], dtype=uint32)
+    """
+    columns = _columns(attributes)
+    missing, invalid = attribute_masks(columns, missing_value)
+    bad = (missing | invalid).any(axis=1)
+
+    any_bad = bad.any()
+    codes = np.zeros(len(columns[0]), dtype=np.uint32)
+    for place, col in zip(_PLACE_VALUES, columns):
+        if any_bad:
+            col = np.where(bad, ATTRIBUTES_VALUES[0], col)
+        digit = col.astype(np.uint32) - np.uint32(ATTRIBUTES_VALUES[0])
+        digit *= place
+        codes += digit
+    codes[bad] = MISSING_PATTERN
+    return codes
+
+
+
+def decode_patterns(codes) -> np.ndarray:
+    """
+    Decode pattern codes back into an (N, 8) uint8 matrix of answers.
+
+    `MISSING_PATTERN` decodes to a row of zeros (the
+    `smellscapy.compact.MISSING_CODE` sentinel).
+    """
+    codes = np.asarray(codes, dtype=np.uint32)
+    answers = (codes[:, None] // _PLACE_VALUES) % N_LEVELS + ATTRIBUTES_VALUES[0]
+    answers = answers.astype(np.uint8)
+    answers[codes == MISSING_PATTERN] = 0
+    return answers
+
+
+
+@lru_cache(maxsize=None)
+def pattern_score_table(dtype=np.float64) -> np.ndarray:
+    """
+    Return the (pleasantness, presence) scores of every pattern code.
+
+    The table is computed once per dtype and cached; it has
+    ``N_PATTERNS + 1`` rows, the last one (for `MISSING_PATTERN`) being NaN,
+    so that it can be indexed directly with the output of
+    `encode_patterns`. The returned array is read-only.
+
+    Returns
+    -------
+    numpy.ndarray, shape (N_PATTERNS + 1, 2)
+    """
+    table = np.empty((N_PATTERNS + 1, 2), dtype=dtype)
+    scores_from_array(decode_patterns(np.arange(N_PATTERNS)), dtype=dtype, out=table[:N_PATTERNS])
+    table[N_PATTERNS] = np.nan
+    table.setflags(write=False)
+    return table
+
+
+
+def scores_from_patterns(codes, dtype=np.float64) -> np.ndarray:
+    """
+    Look up the (pleasantness, presence) scores of pattern codes.
+
+    Scoring is a single gather from `pattern_score_table`.
+
+    Returns
+    -------
+    numpy.ndarray, shape (N, 2)
+        Pleasantness (column 0) and presence (column 1); NaN for
+        `MISSING_PATTERN`.
+    """
+    return pattern_score_table(np.dtype(dtype).type).take(np.asarray(codes), axis=0)
+
+
+
+def pattern_counts(codes, dropna: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Count the occurrences of each distinct pattern code.
+
+    Parameters
+    ----------
+    codes : array-like of int
+        Pattern codes, as returned by `encode_patterns`.
+    dropna : bool, optional
+        If True (default), `MISSING_PATTERN` is not counted.
+
+    Returns
+    -------
+    unique : numpy.ndarray of uint32
+        Distinct pattern codes, sorted.
+    counts : numpy.ndarray of int64
+        Number of responses with each code.
+    """
+    codes = np.asarray(codes)
+    if dropna:
+        codes = codes[codes != MISSING_PATTERN]
+    if codes.size > N_PATTERNS // 4:
+        # dense counting is cheaper than sorting once most codes can appear
+        counts = np.bincount(codes, minlength=N_PATTERNS + 1)
+        unique = np.flatnonzero(counts).astype(np.uint32)
+        return unique, counts[unique]
+    unique, counts = np.unique(codes, return_counts=True)
+    return unique.astype(np.uint32), counts.astype(np.int64)
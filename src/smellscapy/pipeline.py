@@ -0,0 +1,104 @@
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+import pandas as pd
+from loguru import logger
+
+from smellscapy.surveys import ValidationReport, validate
+from smellscapy.calculations import calculate_scores
+
+
+
+@dataclass
+class ScoredChunk:
+    """
+    One validated and scored chunk of a survey CSV file.
+
+    Attributes
+    ----------
+    data : pandas.DataFrame
+        Valid rows of the chunk, with the `'pleasantness_score'` and
+        `'presence_score'` columns attached. The index continues across
+        chunks, so labels are unique over the whole file.
+    excluded : pandas.DataFrame or None
+        Rows of the chunk removed by `validate`, or None.
+    report : ValidationReport
+        Validation report of the chunk.
+    n_read : int
+        Running number of rows read so far, this chunk included.
+    n_kept : int
+        Running number of valid rows yielded so far.
+    n_excluded : int
+        Running number of rows excluded so far.
+    """
+
+    data: pd.DataFrame
+    excluded: Optional[pd.DataFrame]
+    report: ValidationReport
+    n_read: int
+    n_kept: int
+    n_excluded: int
+
+
+
+def iter_scored_chunks(
+    filepath_or_buffer,
+    chunksize: int = 100_000,
+    sep: str = ";",
+    errors: str = "raise",
+    **read_csv_kwargs,
+) -> Iterator[ScoredChunk]:
+    """
+    Stream a survey CSV file through validation and scoring, chunk by chunk.
+
+    The file is read with ``pandas.read_csv(chunksize=...)`` so that only one
+    chunk is held in memory at a time; each chunk is validated with
+    `smellscapy.surveys.validate` and scored with
+    `smellscapy.calculations.calculate_scores` before being yielded. Peak memory therefore
+    depends on `chunksize`, not on the size of the file.
+
+    Parameters
+    ----------
+    filepath_or_buffer : str, path object or file-like object
+        CSV file in the same format as the example data (see
+        `smellscapy.databases.DataExample.load_example_data`).
+    chunksize : int, optional
+        Number of rows read per chunk. Default is 100 000.
+    sep : str, optional
+        Field delimiter. Default is ``";"``, as in ``DataExample.csv``.
+    errors : {"raise", "collect"}, optional
+        Passed to `validate`. With ``"collect"``, rows with out-of-range
+        values are excluded instead of stopping the stream, and each chunk
+        carries its `ValidationReport`.
+    **read_csv_kwargs : dict, optional
+        Additional keyword arguments passed to ``pandas.read_csv``.
+
+    Yields
+    ------
+    ScoredChunk
+        The scored valid rows of each chunk, with the excluded rows and the
+        running counts of rows read, kept and excluded.
+
+    Examples
+    --------
+        >>> from smellscapy.pipeline import iter_scored_chunks
+        >>> for chunk in iter_scored_chunks("survey_export.csv", chunksize=500_000):
+        ...     process(chunk.data)
+        >>> print(f"{chunk.n_excluded} of {chunk.n_read} rows excluded")
+    """
+    n_read = n_kept = n_excluded = 0
+
+    with pd.read_csv(filepath_or_buffer, sep=sep, chunksize=chunksize, **read_csv_kwargs) as reader:
+        for chunk in reader:
+            result = validate(chunk, errors=errors)
+            data, excluded = result
+
+            data = calculate_scores(data)
+
+            n_read += len(chunk)
+            n_kept += len(data)
+            n_excluded += 0 if excluded is None else len(excluded)
+
+            yield ScoredChunk(data, excluded, result.report, n_read, n_kept, n_excluded)
+
+    logger.info(f"Processed {n_read} rows: {n_kept} kept, {n_excluded} excluded")
@@ -0,0 +1,323 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict, namedtuple
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+
+from smellscapy._version import __version__
+
+
+
+CACHE_BYTES = 256 * 2 ** 20
+"""
+Default memory cap of `KDECache`, in bytes.
+"""
+
+DISK_CACHE_BYTES = 2 * 2 ** 30
+"""
+Default size cap of `DiskCache`, in bytes.
+"""
+
+CACHE_FORMAT = 1
+"""
+Version of the densities stored by `DiskCache`. Bump it when a KDE backend
+or the ``"auto"`` backend selection changes the densities computed for the
+same inputs, within a release.
+"""
+
+DISK_CACHE_TAG = f"{__version__}-{CACHE_FORMAT}"
+"""
+Prefix of the `DiskCache` file names: the library version and
+`CACHE_FORMAT`. Files written by other versions are never read, and are
+evicted first since they are no longer used.
+"""
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "evictions", "entries", "nbytes", "max_bytes", "disk_hits"])
+
+
+
+def content_key(*parts) -> str:
+    """
+    Hash the content of arrays and plain values into a cache key.
+
+    Arrays are hashed by dtype, shape and bytes, so two arrays with the same
+    values give the same key whatever their memory layout; other values
+    (str, numbers, None, tuples, dicts) are hashed by their ``repr``, dicts
+    with sorted keys.
+
+    Returns
+    -------
+    str
+        Hexadecimal BLAKE2b digest.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+
+    def update(part):
+        if isinstance(part, type):
+            part = np.dtype(part).str if issubclass(part, np.generic) else part.__qualname__
+        if isinstance(part, list) or hasattr(part, "__array__"):
+            array = np.ascontiguousarray(part)
+            if array.dtype == object:
+                raise TypeError("Object arrays cannot be hashed")
+            digest.update(f"array:{array.dtype.str}:{array.shape}:".encode())
+            digest.update(array.view(np.uint8).reshape(-1) if array.size else b"")
+        elif isinstance(part, dict):
+            digest.update(b"dict:")
+            for key in sorted(part, key=str):
+                update(str(key))
+                update(part[key])
+        elif isinstance(part, tuple):
+            digest.update(f"tuple:{len(part)}:".encode())
+            for item in part:
+                update(item)
+        else:
+            digest.update(f"{type(part).__name__}:{part!r};".encode())
+
+    for part in parts:
+        update(part)
+    return digest.hexdigest()
+
+
+
+class DiskCache:
+    """
+    Directory of ``.npy`` files shared by several processes.
+
+    Each array is stored as ``<tag>-<key>.npy``, where the tag is
+    `DISK_CACHE_TAG`, so that a directory shared across upgrades never
+    serves densities computed by another version. Files are written to a temporary
+    file in the same directory and renamed into place with `os.replace`, so
+    that readers never see a partial file, and read back as read-only
+    memory maps: a hit costs no copy and the pages are shared between the
+    processes reading the same file. When the files exceed `max_bytes`, the
+    least recently used ones (by modification time, refreshed on each hit)
+    are deleted.
+
+    Parameters
+    ----------
+    directory : str or path-like
+        Cache directory, created if needed.
+    max_bytes : int, optional
+        Size cap, `DISK_CACHE_BYTES` by default.
+    """
+
+    def __init__(self, directory, max_bytes: int = DISK_CACHE_BYTES):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_bytes)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{DISK_CACHE_TAG}-{key}.npy"
+
+    def get(self, key: str):
+        """Return the array stored under `key` as a read-only memory map, or None."""
+        path = self._path(key)
+        try:
+            array = np.load(path, mmap_mode="r", allow_pickle=False)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as err:
+            logger.warning(f"Ignoring unreadable cache file {path}: {err}")
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return array
+
+    def put(self, key: str, value: np.ndarray):
+        """Atomically write `value` under `key`, then evict old files if needed."""
+        value = np.asarray(value)
+        if value.nbytes > self.max_bytes:
+            return
+        if self._path(key).exists():
+            # written by another process: same key, same content
+            return
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-", suffix=".npy")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, value, allow_pickle=False)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            self._remove(Path(tmp))
+            raise
+        self._evict()
+
+    def _files(self) -> list:
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".npy") and not entry.name.startswith(".tmp-"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, Path(entry.path)))
+        return files
+
+    def _evict(self):
+        files = self._files()
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            # another process may have removed it already
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path: Path):
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+    @property
+    def nbytes(self) -> int:
+        """Total size of the cached files."""
+        return sum(size for _, size, _ in self._files())
+
+    def clear(self):
+        """Delete all the cached files."""
+        for _, _, path in self._files():
+            self._remove(path)
+
+
+
+class KDECache:
+    """
+    In-memory cache of density arrays with least-recently-used eviction.
+
+    Entries are keyed by `content_key` of the inputs of a computation, so
+    that the same samples evaluated on the same grid with the same settings
+    hit the cache whatever the arrays' identity. Cached arrays are made
+    read-only, since they are shared between callers. When the total size
+    of the entries exceeds `max_bytes`, the least recently used ones are
+    evicted; an array larger than the cap is not cached.
+
+    With `enable_disk`, entries are also written to a `DiskCache`, which
+    processes sharing the directory (e.g. report workers) read from when
+    their memory tier misses; `info` counts these reads as ``disk_hits``.
+
+    The cache is safe to use from several threads.
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        Memory cap, `CACHE_BYTES` by default. 0 disables the cache.
+
+    Examples
+    --------
+        >>> from smellscapy.plotting.utils import KDE_CACHE
+        >>> KDE_CACHE.info()
+        CacheInfo(hits=0, misses=0, evictions=0, entries=0, nbytes=0, max_bytes=268435456, disk_hits=0)
+        >>> KDE_CACHE.enable_disk("/var/cache/smellscapy")
+        >>> KDE_CACHE.resize(0)  # disable
+    """
+
+    def __init__(self, max_bytes: int = CACHE_BYTES):
+        self.max_bytes = int(max_bytes)
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_hits = 0
+        self.disk = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def enable_disk(self, directory, max_bytes: int = DISK_CACHE_BYTES):
+        """Add a `DiskCache` tier in `directory`."""
+        self.disk = DiskCache(directory, max_bytes)
+
+    def disable_disk(self):
+        """Stop using the disk tier; its files are kept."""
+        self.disk = None
+
+    def get(self, key):
+        """Return the array stored under `key` and mark it as recently used, or None."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            disk = self.disk if self.max_bytes > 0 else None
+        value = disk.get(key) if disk is not None else None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store(key, value)
+        return value
+
+    def put(self, key, value: np.ndarray) -> np.ndarray:
+        """
+        Store `value` under `key`, evicting old entries if needed.
+
+        Returns
+        -------
+        numpy.ndarray
+            The stored, read-only array.
+        """
+        value = np.asarray(value)
+        value.setflags(write=False)
+        if self.max_bytes <= 0:
+            return value
+        with self._lock:
+            self._store(key, value)
+            disk = self.disk
+        if disk is not None:
+            disk.put(key, value)
+        return value
+
+    def _store(self, key, value):
+        if value.nbytes > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.nbytes -= old.nbytes
+        self._entries[key] = value
+        self.nbytes += value.nbytes
+        self._evict()
+
+    def _evict(self):
+        while self.nbytes > self.max_bytes and self._entries:
+            _, old = self._entries.popitem(last=False)
+            self.nbytes -= old.nbytes
+            self.evictions += 1
+
+    def resize(self, max_bytes: int):
+        """Change the memory cap, evicting entries if needed."""
+        with self._lock:
+            self.max_bytes = int(max_bytes)
+            self._evict()
+
+    def clear(self, disk: bool = False):
+        """
+        Remove all entries and reset the statistics; with `disk`, also
+        delete the files of the disk tier.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+            self.hits = self.misses = self.evictions = self.disk_hits = 0
+        if disk and self.disk is not None:
+            self.disk.clear()
+
+    def info(self) -> CacheInfo:
+        """Return the hit, miss and eviction counts and the current size of the memory tier."""
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.evictions, len(self._entries), self.nbytes, self.max_bytes,
+                             self.disk_hits)
@@ -3,6 +3,7 @@ import matplotlib.pyplot as plt
 import pandas as pd
 from matplotlib.patches import Patch
 import smellscapy.plotting.utils as ut 
+from smellscapy.lattice import as_score_frame
 
 
 
@@ -16,8 +17,8 @@ def plot_density(df, **kwargs):
 
     Parameters
     ----------
-    df : pd.DataFrame
-        A DataFrame containing survey data. It must include at least the columns  
+    df : pd.DataFrame or ScoreLattice
+        A DataFrame containing survey data, or a `smellscapy.lattice.ScoreLattice`. It must include at least the columns  
         `'pleasantness_score'` and `'presence_score'`.
 
     **kwargs : dict, optional** 
@@ -25,6 +26,13 @@ def plot_density(df, **kwargs):
 
         - `eval_n` : int, optional
             Number of evaluation points per axis for the KDE grid.
+        - `kde_backend` : str, optional
+            KDE evaluation backend of ``ut.kde_on_grid`` and ``ut.kde1d``
+            (``"auto"``, ``"exact"``, ``"tiled"``, ``"truncated"``,
+            ``"binned"`` or a registered backend). Default ``"auto"``.
+        - `n_jobs` : int, optional
+            Number of processes computing the densities of the groups
+            (see ``ut.kde_on_grid_many``); -1 uses all CPUs. Default 1.
         - `xlim` : tuple(float, float), optional
             Limits of the x-axis for KDE evaluation and plotting.
         - `ylim` : tuple(float, float), optional
@@ -102,6 +110,7 @@ def plot_density(df, **kwargs):
     
     """
 
+    df = as_score_frame(df)
 
     # Params
     params = ut.get_default_plot_params()
@@ -131,7 +140,7 @@ def plot_density(df, **kwargs):
     # Density
     if (not group_by_col) or (group_by_col not in df.columns):
        
-        Z = ut.kde_on_grid(x, y, XX, YY)
+        Z = ut.kde_on_grid(x, y, XX, YY, backend=params["kde_backend"])
         ut.draw_contours(
             params,
             ax, XX, YY, Z,
@@ -164,12 +173,16 @@ def plot_density(df, **kwargs):
 
         color_map = ut.build_categorical_palette(order, params["palette"])
 
+        codes = pd.Categorical(df[group_by_col], categories=order).codes
+        densities = ut.kde_on_grid_groups(x, y, codes, XX, YY, n_groups=len(order),
+                                          backend=params["kde_backend"], n_jobs=params["n_jobs"])
+
         legend_handles = []
-        for cat in order:
-            mask = (cats == cat).values
+        for g, cat in enumerate(order):
+            mask = codes == g
             xc, yc = x[mask], y[mask]
 
-            Zg = ut.kde_on_grid(xc, yc, XX, YY)
+            Zg = ut.group_density(densities, g)
             ut.draw_contours(
                 params,
                 ax, XX, YY, Zg,
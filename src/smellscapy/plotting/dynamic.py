@@ -3,6 +3,7 @@ import pandas as pd
 from typing import List, Dict
 import plotly.graph_objects as go
 import smellscapy.plotting.utils as ut
+from smellscapy.plotting.hdr import hdr_levels
 
 
 def plot_dynamic(df: pd.DataFrame, time_col: str, **kwargs) -> go.Figure:
@@ -32,6 +33,11 @@ def plot_dynamic(df: pd.DataFrame, time_col: str, **kwargs) -> go.Figure:
         - `group_by_col` : str, column used to generate category-specific HDR contours.  
         - `xlim`, `ylim` : tuple of float, axis limits for Pleasantness and Presence.  
         - `eval_n` : int, resolution of the KDE evaluation grid.  
+        - `kde_backend` : str, KDE evaluation backend (default ``"auto"``), see `ut.kde_on_grid`.  
+        - `n_jobs` : int, number of processes computing the densities of all frames and categories
+          (default 1; -1 uses all CPUs), see `ut.kde_on_grid_many`.  
+        - `hdr_method` : str, HDR threshold algorithm, ``"sort"`` (default) or ``"histogram"``
+          (sort-free, linear in the grid size), see `hdr.hdr_levels`.  
         - `palette` : list or dict, custom colour palette for categories.  
         - `frame_order` : list, custom ordering of animation frames.  
         - `labels` : dict, annotation labels to display in the plot.  
@@ -110,24 +116,35 @@ def plot_dynamic(df: pd.DataFrame, time_col: str, **kwargs) -> go.Figure:
     XX, YY = np.meshgrid(xi, yi, indexing="xy")
 
     # ------------------------------------------------------------------
-    # Helper: KDE / HDR
+    # Densities of every frame (and category), computed at once
     # ------------------------------------------------------------------
-    def _compute_hdr_field(x: np.ndarray,
-                           y: np.ndarray,
+    values = df[time_col]
+    ordered_values = ut.order_values_for_frames(df[time_col], order_override=frame_order)
+    grouped = bool(group_col and group_col in df.columns and global_categories)
+
+    density_keys, selections = [], []
+    for val in ordered_values:
+        in_frame = (values == val).to_numpy()
+        for cat in (global_categories if grouped else [None]):
+            rows = in_frame if cat is None else in_frame & (df[group_col] == cat).to_numpy()
+            density_keys.append((val, cat))
+            selections.append(np.flatnonzero(rows))
+    densities = dict(zip(density_keys, ut.kde_on_grid_many(
+        df[x_col].to_numpy(), df[y_col].to_numpy(), selections, XX, YY,
+        n_jobs=params["n_jobs"], backend=params["kde_backend"],
+    )))
+
+    # ------------------------------------------------------------------
+    # Helper: HDR
+    # ------------------------------------------------------------------
+    def _compute_hdr_field(Z: np.ndarray,
                            hdr_prob: float = 0.5) -> tuple[np.ndarray, float]:
         """
-        Return (Z_norm, thr) where Z_norm in [0,1],
-        and thr is the HDR threshold in the same [0,1] scale.
+        Return (Z_norm, thr) for the density Z (None if not defined), where
+        Z_norm in [0,1], and thr is the HDR threshold in the same [0,1] scale.
         """
-        if x.size == 0 or y.size == 0:
-            return np.full_like(XX, np.nan, dtype=float), np.nan
-
-        Z = ut.kde_on_grid(x, y, XX, YY)
-
         if Z is None:
             return np.full_like(XX, np.nan, dtype=float), np.nan
-        if isinstance(Z, tuple):
-            Z = Z[0]
 
         Z = np.asarray(Z, dtype=float)
 
@@ -135,7 +152,7 @@ def plot_dynamic(df: pd.DataFrame, time_col: str, **kwargs) -> go.Figure:
         if not finite_mask.any():
             return np.full_like(XX, np.nan, dtype=float), np.nan
 
-        lvl = ut._hdr_level(Z, hdr_prob)
+        lvl = hdr_levels(Z, hdr_prob, method=params["hdr_method"]).thresholds[()]
         if not np.isfinite(lvl):
             return np.full_like(XX, np.nan, dtype=float), np.nan
 
@@ -155,33 +172,12 @@ def plot_dynamic(df: pd.DataFrame, time_col: str, **kwargs) -> go.Figure:
     # ------------------------------------------------------------------
     # Trace for ONE category in ONE frame (grouped case)
     # ------------------------------------------------------------------
-    def _trace_for_category(subdf: pd.DataFrame,
-                            cat: str) -> go.Contour:
+    def _trace_for_category(val, cat: str) -> go.Contour:
         """
-        Always returns a trace for category 'cat'.
+        Always returns a trace for category 'cat' in frame 'val'.
         If there are no data or HDR is not defined, the trace is transparent.
         """
-        if group_col is None or group_col not in subdf.columns:
-            return go.Contour(
-                x=xi,
-                y=yi,
-                z=np.full_like(XX, np.nan, dtype=float),
-                showscale=False,
-                colorscale=[
-                    [0.0, "rgba(0,0,0,0)"],
-                    [1.0, "rgba(0,0,0,0)"],
-                ],
-                showlegend=False,
-                opacity=0.0,
-                name=str(cat),
-                legendgroup=str(cat),
-            )
-
-        mask = (subdf[group_col] == cat).values
-        x = subdf.loc[mask, x_col].to_numpy()
-        y = subdf.loc[mask, y_col].to_numpy()
-
-        Z_norm, thr = _compute_hdr_field(x, y, hdr_prob=0.5)
+        Z_norm, thr = _compute_hdr_field(densities[(val, cat)], hdr_prob=0.5)
 
         # No HDR → transparent trace, keeps structure for animation
         if not np.isfinite(thr):
@@ -230,11 +226,9 @@ def plot_dynamic(df: pd.DataFrame, time_col: str, **kwargs) -> go.Figure:
     # ------------------------------------------------------------------
     # Ungrouped case
     # ------------------------------------------------------------------
-    def _make_traces_ungrouped(subdf: pd.DataFrame, show_legend: bool = True):
+    def _make_traces_ungrouped(val, show_legend: bool = True):
         traces: List[go.BaseTraceType] = []
-        x = subdf[x_col].to_numpy()
-        y = subdf[y_col].to_numpy()
-        Z_norm, thr = _compute_hdr_field(x, y, hdr_prob=0.5)
+        Z_norm, thr = _compute_hdr_field(densities[(val, None)], hdr_prob=0.5)
         if not np.isfinite(thr):
             return []
         traces.append(
@@ -267,45 +261,38 @@ def plot_dynamic(df: pd.DataFrame, time_col: str, **kwargs) -> go.Figure:
     # ------------------------------------------------------------------
     # Animation: frames and initial figure
     # ------------------------------------------------------------------
-    values = df[time_col]
-    ordered_values = ut.order_values_for_frames(df[time_col], order_override=frame_order)
-
     frames: List[go.Frame] = []
 
-    if group_col and group_col in df.columns and global_categories:
+    if grouped:
         # ---- grouped case: same traces structure in every frame
         for val in ordered_values:
-            sub = df[values == val]
             frame_traces = []
             for cat in global_categories:
-                frame_traces.append(_trace_for_category(sub, cat))
+                frame_traces.append(_trace_for_category(val, cat))
             frames.append(go.Frame(name=str(val), data=frame_traces))
 
         # initial data (first frame)
-        initial_sub = df[values == ordered_values[0]]
         initial_traces = []
         for cat in global_categories:
-            initial_traces.append(_trace_for_category(initial_sub, cat))
+            initial_traces.append(_trace_for_category(ordered_values[0], cat))
 
         fig = go.Figure(data=initial_traces, frames=frames)
 
     else:
         # ---- ungrouped case
         for val in ordered_values:
-            sub = df[values == val]
-            traces = _make_traces_ungrouped(sub, show_legend=False)
+            traces = _make_traces_ungrouped(val, show_legend=False)
             frames.append(go.Frame(name=str(val), data=traces))
 
-        initial_sub = df[values == ordered_values[0]]
         fig = go.Figure(
-            data=_make_traces_ungrouped(initial_sub, show_legend=True),
+            data=_make_traces_ungrouped(ordered_values[0], show_legend=True),
             frames=frames,
         )
 
     # ------------------------------------------------------------------
     # Stable legend: one fake Scatter per category (grouped only)
     # ------------------------------------------------------------------
-    if group_col and group_col in df.columns and global_categories:
+    if grouped:
         for cat in global_categories:
             fig.add_trace(
                 go.Scatter(
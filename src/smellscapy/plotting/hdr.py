@@ -0,0 +1,302 @@
+from collections import namedtuple
+
+import numpy as np
+
+from smellscapy.plotting.kde import evaluate_kde, fit_kde
+
+
+
+HDR_METHODS = ("sort", "histogram")
+
+HDR_BINS = 4096
+"""
+Number of value bins of ``method="histogram"``. A bin that holds more values
+than this is refined with another histogram of its values.
+"""
+
+HDRLevels = namedtuple("HDRLevels", ["probs", "thresholds", "mass", "area"])
+"""
+High-density regions of a density grid, one entry per probability:
+``thresholds`` are the density levels, ``mass`` the fraction of the grid
+mass in ``{z >= threshold}`` and ``area`` the area of that region.
+"""
+
+
+
+def hdr_levels(Z, probs, cell_area: float = 1.0, method: str = "sort", bins: int = HDR_BINS) -> HDRLevels:
+    """
+    Compute the high-density regions (HDR) of several probabilities from one
+    density grid.
+
+    The threshold of each probability p is the largest level t such that
+    ``{Z >= t}`` holds at least p of the total mass of the grid. On a
+    regular grid the cell area cancels out of the thresholds; it only
+    scales the reported areas.
+
+    With ``method="sort"`` (default), the finite values of `Z` are sorted
+    once for all the probabilities. ``method="histogram"`` avoids the sort,
+    in time linear in the grid size: the values are binned into `bins` bins
+    of the same width, the bin where the cumulative mass (from the top)
+    reaches p is located, and only the values of that bin are sorted
+    (or binned again if it holds more than `bins` values). The thresholds
+    are the same as with the sort up to floating-point summation order, so
+    the difference is at most one bin width, ``max(Z) / bins``.
+
+    Parameters
+    ----------
+    Z : ndarray
+        Density values on a regular grid; non-finite values are ignored.
+    probs : float or array-like
+        Probability masses of the HDRs (0 < p ≤ 1).
+    cell_area : float, optional
+        Area of one grid cell, default 1 (areas in cells).
+    method : {"sort", "histogram"}, optional
+        Threshold algorithm, see above.
+    bins : int, optional
+        Number of bins of ``method="histogram"``, `HDR_BINS` by default.
+
+    Returns
+    -------
+    HDRLevels
+        Arrays of the shape of `probs`. All NaN (mass and area included) if
+        `Z` holds no positive mass.
+
+    Examples
+    --------
+        >>> levels = hdr_levels(ZZ, [0.25, 0.5, 0.75, 0.95], cell_area=dx * dy)
+        >>> levels.thresholds, levels.area
+    """
+    if method not in HDR_METHODS:
+        raise ValueError(f"method must be one of {list(HDR_METHODS)}, got {method!r}")
+    probs = np.asarray(probs, dtype=float)
+    flat = np.asarray(Z, dtype=float).ravel()
+    flat = flat[np.isfinite(flat)]
+
+    nan = np.full(probs.shape, np.nan)
+    if flat.size == 0:
+        return HDRLevels(probs, nan, nan, nan.copy())
+    if method == "histogram":
+        return _histogram_levels(flat, probs, cell_area, int(bins))
+
+    flat = np.sort(flat)
+    cum = np.cumsum(flat[::-1])
+    total = cum[-1]
+    if not total > 0 or not np.isfinite(total):
+        return HDRLevels(probs, nan, nan, nan.copy())
+
+    idx = np.minimum(np.searchsorted(cum, probs * total), flat.size - 1)
+    thresholds = flat[::-1][idx]
+    # cells in {Z >= t}, ties included
+    count = flat.size - np.searchsorted(flat, thresholds, side="left")
+    mass = cum[count - 1] / total
+    return HDRLevels(probs, thresholds, mass, count * float(cell_area))
+
+
+
+def _histogram_levels(flat, probs, cell_area, bins) -> HDRLevels:
+    total = flat.sum()
+    nan = np.full(probs.shape, np.nan)
+    if not total > 0 or not np.isfinite(total):
+        return HDRLevels(probs, nan, nan, nan.copy())
+
+    # the first histogram of all the values is shared by the probabilities
+    hist = _histogram(flat, bins) if flat.size > bins else None
+    thresholds, mass, count = np.empty((3, probs.size))
+    for i, p in enumerate(probs.ravel()):
+        thresholds[i], mass[i] = _histogram_threshold(flat, p * total, bins, hist)
+        count[i] = np.count_nonzero(flat >= thresholds[i])
+    return HDRLevels(probs, thresholds.reshape(probs.shape), (mass / total).reshape(probs.shape),
+                     (count * float(cell_area)).reshape(probs.shape))
+
+
+
+def _histogram(values, bins):
+    """
+    Bin `values` into `bins` bins of the same width; return the bin of each
+    value and the cumulative mass of the bins from the top, or None if all
+    the values are equal.
+    """
+    lo, hi = values.min(), values.max()
+    if not hi > lo:
+        return None
+    # the scale is shrunk so that max(values) falls in the last bin
+    scaled = values - lo
+    scaled *= bins * (1 - 1e-12) / (hi - lo)
+    idx = scaled.astype(np.intp)
+    return idx, np.cumsum(np.bincount(idx, weights=values, minlength=bins)[::-1])
+
+
+
+def _histogram_threshold(values, target, bins, hist=None):
+    """
+    Return the largest value t such that the values >= t sum to at least
+    `target`, with the sum of these values, by successive histograms of the
+    values.
+    """
+    above = 0.0
+    while values.size > bins:
+        if hist is None:
+            hist = _histogram(values, bins)
+            if hist is None:
+                break
+        idx, mass = hist
+        k = min(int(np.searchsorted(above + mass, target)), bins - 1)
+        if k > 0:
+            above += mass[k - 1]
+        values = values[idx == bins - 1 - k]
+        hist = None
+
+    desc = np.sort(values)[::-1]
+    cum = above + np.cumsum(desc)
+    threshold = desc[min(int(np.searchsorted(cum, target)), desc.size - 1)]
+    # values >= threshold, ties included
+    n_in = int(np.searchsorted(-desc, -threshold, side="right"))
+    return threshold, cum[n_in - 1]
+
+
+
+SampleHDR = namedtuple("SampleHDR", ["probs", "thresholds", "kde", "points", "density", "counts", "inverse"])
+"""
+Sample-based high-density regions, see `sample_hdr`: the KDE, its distinct
+``points`` (shape (2, k)) with their ``density`` and ``counts``, and the
+distinct point of each input row in ``inverse`` (-1 for non-finite rows).
+"""
+
+
+
+def sample_hdr(x, y, probs=0.5, bw_method=None, dedup: str = "auto", backend: str = "auto", **options) -> SampleHDR:
+    """
+    Estimate high-density regions (HDR) from the samples, without a grid.
+
+    Following Hyndman (1996), the KDE is evaluated only at the distinct
+    sample points, and the level of probability p is the (1 - p) quantile
+    of these densities weighted by the number of samples at each point:
+    the largest t such that at least p of the samples have a density
+    >= t. The cost grows with the number of distinct points rather than
+    with the grid size. The levels are on the scale of the densities of
+    `smellscapy.plotting.utils.kde_on_grid`, so they can be drawn as
+    contours of a grid density.
+
+    Parameters
+    ----------
+    x, y : array-like
+        Sample coordinates; rows with a non-finite value are ignored.
+    probs : float or array-like, optional
+        Probability masses of the HDRs, default 0.5.
+    bw_method, dedup
+        KDE bandwidth and deduplication, see `kde.fit_kde`.
+    backend : str, optional
+        KDE evaluation backend for scattered points, see `kde.evaluate_kde`.
+    **options
+        Backend options.
+
+    Returns
+    -------
+    SampleHDR
+        ``thresholds`` has the shape of `probs`.
+
+    Examples
+    --------
+        >>> hdr = sample_hdr(df["pleasantness_score"], df["presence_score"], [0.5, 0.8])
+        >>> inside = hdr_membership(hdr)      # (respondents, 2)
+        >>> sample_hdr_area(hdr)
+    """
+    probs = np.asarray(probs, dtype=float)
+    dataset = np.vstack([np.asarray(x, dtype=float), np.asarray(y, dtype=float)])
+    finite = np.isfinite(dataset).all(axis=0)
+    if np.count_nonzero(finite) < 3:
+        raise ValueError("At least 3 finite samples are needed")
+    points, inverse, counts = np.unique(dataset[:, finite], axis=1, return_inverse=True, return_counts=True)
+    rows = np.full(finite.size, -1, dtype=np.intp)
+    rows[finite] = inverse.ravel()
+
+    kde = fit_kde(dataset[:, finite], bw_method, dedup)
+    density = evaluate_kde(kde, points, backend=backend, n_samples=int(counts.sum()), **options)
+
+    order = np.argsort(density)[::-1]
+    cum = np.cumsum(counts[order])
+    idx = np.minimum(np.searchsorted(cum, probs * cum[-1]), order.size - 1)
+    thresholds = density[order][idx]
+    return SampleHDR(probs, thresholds, kde, points, density, counts, rows)
+
+
+
+def hdr_membership(hdr: SampleHDR) -> np.ndarray:
+    """
+    Return whether each input row of `sample_hdr` lies in each HDR.
+
+    Returns
+    -------
+    ndarray of bool, shape (n_rows, *probs.shape)
+        False for the rows with a non-finite value.
+    """
+    inside = hdr.density[:, None] >= np.ravel(hdr.thresholds)[None, :]
+    member = np.zeros((hdr.inverse.size, inside.shape[1]), dtype=bool)
+    valid = hdr.inverse >= 0
+    member[valid] = inside[hdr.inverse[valid]]
+    return member.reshape(hdr.inverse.size, *np.shape(hdr.thresholds))
+
+
+
+def sample_hdr_area(hdr: SampleHDR, n_draws: int = 4096, seed=0, backend: str = "auto", **options) -> np.ndarray:
+    """
+    Monte Carlo estimate of the area of the HDRs of `sample_hdr`.
+
+    With X drawn from the KDE f, the area of ``{f >= t}`` is the mean of
+    ``1{f(X) >= t} / f(X)``; the relative standard error decreases as
+    ``1 / sqrt(n_draws)``. The KDE is evaluated only at the draws.
+
+    Parameters
+    ----------
+    hdr : SampleHDR
+    n_draws : int, optional
+        Number of draws, default 4096.
+    seed : int or numpy.random.Generator, optional
+        Seed of the draws, for reproducible estimates.
+    backend, **options
+        KDE evaluation backend, see `kde.evaluate_kde`.
+
+    Returns
+    -------
+    ndarray
+        Areas, of the shape of ``hdr.probs``.
+    """
+    draws = hdr.kde.resample(n_draws, seed=np.random.default_rng(seed))
+    f = evaluate_kde(hdr.kde, draws, backend=backend, n_samples=int(hdr.counts.sum()), **options)
+    inside = f[:, None] >= np.ravel(hdr.thresholds)[None, :]
+    area = (inside / f[:, None]).mean(axis=0)
+    return area.reshape(np.shape(hdr.thresholds))
+
+
+
+def sample_hdr_overlap(a: SampleHDR, b: SampleHDR, n_draws: int = 4096, seed=0, backend: str = "auto", **options):
+    """
+    Monte Carlo estimate of the overlap of the HDRs of two `sample_hdr`
+    results with the same probabilities.
+
+    The area of the intersection is estimated with draws from each KDE, as
+    in `sample_hdr_area`, and the two estimates are averaged.
+
+    Returns
+    -------
+    intersection : ndarray
+        Area of the intersection of the HDRs, of the shape of ``a.probs``.
+    jaccard : ndarray
+        Intersection over union of the HDRs.
+    """
+    if np.shape(a.thresholds) != np.shape(b.thresholds):
+        raise ValueError("Both HDRs must have the same probabilities")
+    rng = np.random.default_rng(seed)
+    areas, intersection = [], 0.0
+    for first, second in ((a, b), (b, a)):
+        draws = first.kde.resample(n_draws, seed=rng)
+        f1 = evaluate_kde(first.kde, draws, backend=backend, n_samples=int(first.counts.sum()), **options)
+        f2 = evaluate_kde(second.kde, draws, backend=backend, n_samples=int(second.counts.sum()), **options)
+        inside = f1[:, None] >= np.ravel(first.thresholds)[None, :]
+        both = inside & (f2[:, None] >= np.ravel(second.thresholds)[None, :])
+        areas.append((inside / f1[:, None]).mean(axis=0))
+        intersection = intersection + 0.5 * (both / f1[:, None]).mean(axis=0)
+    union = areas[0] + areas[1] - intersection
+    jaccard = np.divide(intersection, union, out=np.zeros_like(union), where=union > 0)
+    shape = np.shape(a.thresholds)
+    return intersection.reshape(shape), jaccard.reshape(shape)
@@ -0,0 +1,752 @@
+from itertools import product
+
+import numpy as np
+import pandas as pd
+from scipy.signal import fftconvolve
+from scipy.stats import gaussian_kde
+
+
+
+BINNED_MIN_SAMPLES = 10_000
+"""
+Number of distinct points from which ``backend="auto"`` may use the binned
+KDE. Below it, direct evaluation of the deduplicated KDE is fast enough and
+exact, however many samples repeat these points.
+"""
+
+KERNEL_TRUNCATION = 5.0
+"""
+The binned kernel is truncated at this many standard deviations along each
+axis; the mass left out is below 1e-6.
+"""
+
+TILE_BYTES = 8 * 2 ** 20
+"""
+Default size in bytes of the (grid points × samples) blocks of the tiled
+KDE evaluation.
+"""
+
+TRUNCATION_TOL = 1e-6
+"""
+Default tolerance of the truncated KDE: kernel values below this fraction
+of the kernel peak are neglected.
+"""
+
+TRUNCATED_COST_RATIO = 12.0
+"""
+Cost of one (sample, node) kernel evaluation of the truncated KDE relative
+to the tiled KDE, as measured by ``benchmarks/bench_kde_backends.py``.
+``backend="auto"`` prefers the truncated KDE when the box covered by one
+kernel, times this ratio, is smaller than the grid.
+"""
+
+
+
+def grid_step(grid) -> float:
+    """
+    Return the spacing of a regular, increasing 1D grid, or None if the grid
+    is not regular.
+    """
+    grid = np.asarray(grid, dtype=np.float64)
+    if grid.ndim != 1 or grid.size < 2:
+        return None
+    steps = np.diff(grid)
+    step = (grid[-1] - grid[0]) / (grid.size - 1)
+    if step <= 0 or not np.allclose(steps, step, rtol=1e-6, atol=0):
+        return None
+    return step
+
+
+
+def linear_binning(dataset, starts, steps, shape, weights=None, codes=None, n_groups: int = 1) -> np.ndarray:
+    """
+    Assign samples to the nodes of a regular grid with linear binning.
+
+    Each sample is spread over the 2**d surrounding nodes, with weights
+    proportional to the opposite (hyper)volumes, so that the binned counts
+    keep the mean of the samples within each cell. Samples outside the grid
+    are dropped.
+
+    Parameters
+    ----------
+    dataset : ndarray, shape (d, n)
+        Sample coordinates.
+    starts, steps : sequence of float, length d
+        First node and spacing of the grid along each axis.
+    shape : tuple of int, length d
+        Number of nodes along each axis.
+    weights : ndarray, shape (n,), optional
+        Sample weights. Default is 1 for every sample.
+    codes : ndarray of int, shape (n,), optional
+        Group of each sample in ``[0, n_groups)``; samples with a negative
+        code are dropped. If given, each group is binned separately.
+    n_groups : int, optional
+        Number of groups, with `codes`.
+
+    Returns
+    -------
+    ndarray of float64, shape `shape`, or (n_groups, *shape) with `codes`
+        Binned (weighted) counts.
+    """
+    dataset = np.atleast_2d(np.asarray(dataset, dtype=np.float64))
+    shape = tuple(int(s) for s in shape)
+    pos = (dataset - np.asarray(starts, dtype=np.float64)[:, None]) / np.asarray(steps, dtype=np.float64)[:, None]
+    limits = np.asarray(shape)[:, None] - 1
+
+    inside = np.all((pos >= 0) & (pos <= limits), axis=0)
+    if codes is not None:
+        codes = np.asarray(codes, dtype=np.intp)
+        inside &= codes >= 0
+    pos = pos[:, inside]
+    w = np.ones(pos.shape[1]) if weights is None else np.asarray(weights, dtype=np.float64)[inside]
+
+    base = np.clip(np.floor(pos).astype(np.intp), 0, np.maximum(limits - 1, 0))
+    frac = pos - base
+
+    size = int(np.prod(shape))
+    offset = 0 if codes is None else codes[inside] * size
+    total = size if codes is None else n_groups * size
+    binned = np.zeros(total)
+    for corner in product((0, 1), repeat=len(shape)):
+        corner = np.asarray(corner)[:, None]
+        nodes = np.minimum(base + corner, limits)
+        corner_w = w * np.prod(np.where(corner == 1, frac, 1.0 - frac), axis=0)
+        flat = np.ravel_multi_index(tuple(nodes), shape) + offset
+        binned += np.bincount(flat, weights=corner_w, minlength=total)
+    return binned.reshape(shape if codes is None else (n_groups, *shape))
+
+
+
+def gaussian_kernel(covariance, steps, half=None) -> np.ndarray:
+    """
+    Sample the Gaussian kernel with the given covariance on a grid of
+    offsets, truncated at `KERNEL_TRUNCATION` standard deviations.
+
+    Returns an array with an odd number of nodes along each axis, centred on
+    the zero offset; `half` forces the number of nodes on each side.
+    """
+    covariance = np.atleast_2d(covariance)
+    steps = np.asarray(steps, dtype=np.float64)
+    if half is None:
+        half = kernel_half_width(covariance, steps)
+    axes = [np.arange(-h, h + 1) * s for h, s in zip(half, steps)]
+    offsets = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1)
+
+    inv = np.linalg.inv(covariance)
+    energy = np.einsum("...i,ij,...j->...", offsets, inv, offsets)
+    norm = np.sqrt((2 * np.pi) ** len(steps) * np.linalg.det(covariance))
+    return np.exp(-0.5 * energy) / norm
+
+
+
+def kernel_half_width(covariance, steps) -> np.ndarray:
+    """Number of grid nodes on each side of the truncated kernel, per axis."""
+    covariance = np.atleast_2d(covariance)
+    return np.ceil(KERNEL_TRUNCATION * np.sqrt(np.diag(covariance)) / np.asarray(steps, dtype=np.float64)).astype(int)
+
+
+
+def binned_kde(dataset, grids, covariance, weights=None) -> np.ndarray:
+    """
+    Evaluate a Gaussian KDE on a regular grid by linear binning and FFT
+    convolution.
+
+    The samples are binned onto the grid, extended on each side by the
+    kernel half-width so that samples just outside the grid still
+    contribute, and the binned counts are convolved with the Gaussian kernel
+    sampled at the same spacing. The cost is O(n + M log M) for M grid
+    nodes, instead of O(n M) for direct evaluation; the error is of the
+    order of the squared grid spacing relative to the bandwidth.
+
+    Parameters
+    ----------
+    dataset : ndarray, shape (d, n)
+        Samples.
+    grids : sequence of 1D arrays, length d
+        Regular evaluation grid along each axis.
+    covariance : ndarray, shape (d, d)
+        Kernel covariance, e.g. ``gaussian_kde(dataset).covariance``.
+    weights : ndarray, shape (n,), optional
+        Sample weights; they are normalised to sum to 1.
+
+    Returns
+    -------
+    ndarray, shape (len(grids[0]), ..., len(grids[d - 1]))
+        Density at the grid nodes, axes in the order of `grids` (``ij``
+        indexing).
+    """
+    dataset = np.atleast_2d(np.asarray(dataset, dtype=np.float64))
+    steps = []
+    for grid in grids:
+        step = grid_step(grid)
+        if step is None:
+            raise ValueError("binned_kde requires regular, increasing grids")
+        steps.append(step)
+
+    kernel = gaussian_kernel(covariance, steps)
+    half = [(k - 1) // 2 for k in kernel.shape]
+    starts = [grid[0] - h * s for grid, h, s in zip(grids, half, steps)]
+    shape = [len(grid) + 2 * h for grid, h in zip(grids, half)]
+
+    binned = linear_binning(dataset, starts, steps, shape, weights)
+    total = dataset.shape[1] if weights is None else float(np.sum(weights))
+    density = fftconvolve(binned, kernel, mode="same") / total
+
+    inner = tuple(slice(h, h + len(grid)) for grid, h in zip(grids, half))
+    # FFT round-off can leave tiny negative values in empty regions
+    return np.maximum(density[inner], 0.0)
+
+
+
+def group_covariances(dataset, codes, n_groups: int, bw_method=None):
+    """
+    Kernel covariance that ``gaussian_kde(dataset[:, codes == g], bw_method)``
+    would use, for every group at once.
+
+    Parameters
+    ----------
+    dataset : ndarray, shape (d, n)
+        Samples of all the groups.
+    codes : ndarray of int, shape (n,)
+        Group of each sample in ``[0, n_groups)``; negative codes are
+        ignored.
+    n_groups : int
+        Number of groups.
+    bw_method : str or scalar, optional
+        Bandwidth rule, as in ``gaussian_kde`` (callables are not
+        supported).
+
+    Returns
+    -------
+    covariances : ndarray, shape (n_groups, d, d)
+        Kernel covariances; NaN for groups with fewer than 2 samples.
+    counts : ndarray of int64, shape (n_groups,)
+        Number of samples of each group.
+    """
+    dataset = np.atleast_2d(np.asarray(dataset, dtype=np.float64))
+    codes = np.asarray(codes, dtype=np.intp)
+    d = dataset.shape[0]
+    ok = codes >= 0
+    dataset, codes = dataset[:, ok], codes[ok]
+
+    counts = np.bincount(codes, minlength=n_groups).astype(np.int64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = np.stack([np.bincount(codes, weights=row, minlength=n_groups) for row in dataset]) / counts
+        centred = dataset - means[:, codes]
+        covariances = np.empty((n_groups, d, d))
+        for i in range(d):
+            for j in range(i, d):
+                m2 = np.bincount(codes, weights=centred[i] * centred[j], minlength=n_groups)
+                covariances[:, i, j] = covariances[:, j, i] = m2 / (counts - 1)
+    factors = np.array([_bandwidth_factor(bw_method, max(int(c), 1), d) for c in counts])
+    covariances *= factors[:, None, None] ** 2
+    covariances[counts < 2] = np.nan
+    return covariances, counts
+
+
+
+def binned_kde_groups(dataset, codes, n_groups: int, grids, covariances, max_bytes: int = 8 * TILE_BYTES) -> np.ndarray:
+    """
+    Evaluate the binned KDE of every group of samples on the same regular
+    grid.
+
+    All the groups are binned in a single pass, and their binned counts are
+    convolved with their own kernels by batched FFTs over chunks of groups,
+    each chunk using about `max_bytes` bytes. Kernels are padded to a
+    common size, capped at the grid size so that a group with a very wide
+    kernel does not inflate the FFTs of all the others: samples more than
+    one grid span outside the grid are then ignored.
+
+    Parameters
+    ----------
+    dataset : ndarray, shape (d, n)
+        Samples of all the groups.
+    codes : ndarray of int, shape (n,)
+        Group of each sample in ``[0, n_groups)``; negative codes are
+        ignored.
+    n_groups : int
+        Number of groups.
+    grids : sequence of 1D arrays, length d
+        Regular evaluation grid along each axis.
+    covariances : ndarray, shape (n_groups, d, d)
+        Kernel covariance of each group, e.g. from `group_covariances`.
+    max_bytes : int, optional
+        Approximate memory used by one chunk of FFTs.
+
+    Returns
+    -------
+    ndarray, shape (n_groups, len(grids[0]), ..., len(grids[d - 1]))
+        Density of each group at the grid nodes (``ij`` indexing); NaN for
+        groups with a non-finite or singular covariance.
+    """
+    dataset = np.atleast_2d(np.asarray(dataset, dtype=np.float64))
+    covariances = np.asarray(covariances, dtype=np.float64).reshape(n_groups, dataset.shape[0], dataset.shape[0])
+    steps = []
+    for grid in grids:
+        step = grid_step(grid)
+        if step is None:
+            raise ValueError("binned_kde_groups requires regular, increasing grids")
+        steps.append(step)
+    sizes = np.array([len(grid) for grid in grids])
+    density = np.full((n_groups, *sizes), np.nan)
+
+    finite = np.isfinite(covariances).all(axis=(1, 2))
+    valid = np.zeros(n_groups, dtype=bool)
+    valid[finite] = np.linalg.det(covariances[finite]) > 0
+    groups = np.flatnonzero(valid)
+    if groups.size == 0:
+        return density
+
+    halves = np.array([kernel_half_width(covariances[g], steps) for g in groups])
+    half = np.minimum(halves.max(axis=0), sizes - 1)
+    starts = [grid[0] - h * s for grid, h, s in zip(grids, half, steps)]
+    shape = tuple(sizes + 2 * half)
+    axes = tuple(range(1, len(shape) + 1))
+
+    codes = np.asarray(codes, dtype=np.intp)
+    counts = np.bincount(codes[codes >= 0], minlength=n_groups)
+    binned = linear_binning(dataset, starts, steps, shape, codes=codes, n_groups=n_groups)
+    inner = (slice(None),) + tuple(slice(h, h + n) for h, n in zip(half, sizes))
+    # the FFTs of the binned counts and of the kernel, over the full
+    # convolution shape, and the result
+    per_group = 4 * 8 * np.prod([n + 2 * h for n, h in zip(shape, half)])
+    chunk = max(1, int(max_bytes // per_group))
+    for c0 in range(0, groups.size, chunk):
+        block = groups[c0:c0 + chunk]
+        kernels = np.stack([gaussian_kernel(covariances[g], steps, half) for g in block])
+        total = counts[block].reshape((-1,) + (1,) * len(shape))
+        convolved = fftconvolve(binned[block], kernels, mode="same", axes=axes) / total
+        # FFT round-off can leave tiny negative values in empty regions
+        density[block] = np.maximum(convolved[inner], 0.0)
+    return density
+
+
+
+def tiled_kde(dataset, points, covariance, weights=None, max_bytes: int = TILE_BYTES, dtype=np.float64) -> np.ndarray:
+    """
+    Evaluate a Gaussian KDE exactly at arbitrary points, in tiles of bounded
+    size.
+
+    Samples and points are whitened by the kernel covariance, and the
+    kernel values are computed for blocks of points against blocks of
+    samples, each block holding at most `max_bytes` bytes. Besides the
+    output, the inputs and their whitened copies, the memory used is
+    therefore at most `max_bytes`, whatever the number of points and
+    samples. Each block is a matrix product followed by an exponential,
+    which is usually faster than ``gaussian_kde.evaluate``.
+
+    Parameters
+    ----------
+    dataset : ndarray, shape (d, n)
+        Samples.
+    points : ndarray, shape (d, m)
+        Evaluation points.
+    covariance : ndarray, shape (d, d)
+        Kernel covariance, e.g. ``gaussian_kde(dataset).covariance``.
+    weights : ndarray, shape (n,), optional
+        Sample weights; they are normalised to sum to 1.
+    max_bytes : int, optional
+        Size of a block, `TILE_BYTES` by default. Smaller blocks lower the
+        memory use at the price of more Python-level iterations.
+    dtype : {numpy.float64, numpy.float32}, optional
+        Precision of the blocks and of the accumulated density. float32
+        halves the memory of a block and is faster, with a relative error
+        of about 1e-5.
+
+    Returns
+    -------
+    ndarray, shape (m,)
+        Density at `points`, of type `dtype`.
+    """
+    dtype = np.dtype(dtype)
+    if dtype not in (np.float32, np.float64):
+        raise ValueError(f"dtype must be float32 or float64, got {dtype}")
+    dataset = np.atleast_2d(np.asarray(dataset, dtype=np.float64))
+    points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+    covariance = np.atleast_2d(covariance)
+    d, n = dataset.shape
+    m = points.shape[1]
+
+    # |L^T x|^2 = x^T C^-1 x; centring keeps the whitened coordinates small,
+    # which matters for the |x|^2 + |y|^2 - 2 x.y expansion in float32
+    whiten = np.linalg.cholesky(np.linalg.inv(covariance)).T
+    centre = dataset.mean(axis=1, keepdims=True)
+    samples = (whiten @ (dataset - centre)).T.astype(dtype)
+    targets = (whiten @ (points - centre)).T.astype(dtype)
+    half_sq_samples = 0.5 * np.einsum("ij,ij->i", samples, samples)
+    half_sq_targets = 0.5 * np.einsum("ij,ij->i", targets, targets)
+
+    w = np.full(n, 1.0 / n) if weights is None else np.asarray(weights, dtype=np.float64) / np.sum(weights)
+    norm = np.sqrt((2 * np.pi) ** d * np.linalg.det(covariance))
+    w = (w / norm).astype(dtype)
+
+    block = max(1, int(max_bytes) // dtype.itemsize)
+    cols = min(n, block)
+    rows = max(1, min(m, block // cols))
+    buffer = np.empty((rows, cols), dtype=dtype)
+    # kernel values are floored at sqrt(tiny) (1e-19 in float32) so that
+    # neither they nor their products with the weights are subnormal
+    # numbers, which are very slow to compute with
+    floor = dtype.type(0.5 * np.log(np.finfo(dtype).tiny))
+
+    density = np.zeros(m, dtype=dtype)
+    for r0 in range(0, m, rows):
+        r1 = min(r0 + rows, m)
+        for c0 in range(0, n, cols):
+            c1 = min(c0 + cols, n)
+            tile = buffer[: r1 - r0, : c1 - c0]
+            # -|x - y|^2 / 2 = x.y - |x|^2 / 2 - |y|^2 / 2
+            np.matmul(targets[r0:r1], samples[c0:c1].T, out=tile)
+            tile -= half_sq_targets[r0:r1, None]
+            tile -= half_sq_samples[c0:c1]
+            np.clip(tile, floor, 0.0, out=tile)
+            np.exp(tile, out=tile)
+            density[r0:r1] += tile @ w[c0:c1]
+    return density
+
+
+
+def truncated_kde(dataset, grids, covariance, weights=None, tol: float = TRUNCATION_TOL) -> np.ndarray:
+    """
+    Evaluate a Gaussian KDE on a regular grid, neglecting the kernel beyond
+    the distance where it falls below `tol` times its peak.
+
+    The kernel is truncated at ``k = sqrt(-2 ln tol)`` Mahalanobis units,
+    so each sample only touches the grid nodes of its ellipse, found by
+    index arithmetic on the regular grid; and only the nodes within the
+    bounding box of the samples, extended by the kernel support, are
+    computed. The cost is O(n × nodes per kernel) instead of O(n × nodes),
+    which pays off for small bandwidths (e.g. the densities of small
+    groups) and for samples concentrated in part of the grid. Otherwise,
+    the result is the exact KDE, with an absolute error below `tol` times
+    the peak of the kernel.
+
+    Parameters
+    ----------
+    dataset : ndarray, shape (d, n)
+        Samples.
+    grids : sequence of 1D arrays, length d
+        Regular evaluation grid along each axis.
+    covariance : ndarray, shape (d, d)
+        Kernel covariance, e.g. ``gaussian_kde(dataset).covariance``.
+    weights : ndarray, shape (n,), optional
+        Sample weights; they are normalised to sum to 1.
+    tol : float, optional
+        Truncation tolerance, in (0, 1). Default is `TRUNCATION_TOL`.
+
+    Returns
+    -------
+    ndarray, shape (len(grids[0]), ..., len(grids[d - 1]))
+        Density at the grid nodes, axes in the order of `grids` (``ij``
+        indexing).
+    """
+    if not 0 < tol < 1:
+        raise ValueError(f"tol must be in (0, 1), got {tol}")
+    dataset = np.atleast_2d(np.asarray(dataset, dtype=np.float64))
+    covariance = np.atleast_2d(covariance)
+    d, n = dataset.shape
+    starts, steps = [], []
+    for grid in grids:
+        step = grid_step(grid)
+        if step is None:
+            raise ValueError("truncated_kde requires regular, increasing grids")
+        starts.append(float(grid[0]))
+        steps.append(step)
+    starts, steps = np.asarray(starts), np.asarray(steps)
+    shape = np.array([len(grid) for grid in grids])
+
+    w = np.full(n, 1.0 / n) if weights is None else np.asarray(weights, dtype=np.float64) / np.sum(weights)
+    norm = np.sqrt((2 * np.pi) ** d * np.linalg.det(covariance))
+    inv = np.linalg.inv(covariance)
+    cutoff = -2.0 * np.log(tol)
+    # the ellipse {q <= cutoff} spans k * sigma_i along axis i
+    reach = np.sqrt(cutoff * np.diag(covariance)) / steps
+
+    # nodes within the bounding box of the samples plus the kernel support
+    density = np.zeros(tuple(shape))
+    pos = (dataset - starts[:, None]) / steps[:, None]
+    if n == 0 or np.any(pos.max(axis=1) + reach < 0) or np.any(pos.min(axis=1) - reach > shape - 1):
+        return density
+    lo = np.clip(np.floor(pos.min(axis=1) - reach), 0, shape - 1).astype(np.intp)
+    hi = np.clip(np.ceil(pos.max(axis=1) + reach), 0, shape - 1).astype(np.intp)
+    box = tuple(hi - lo + 1)
+    local = np.zeros(int(np.prod(box)))
+
+    # each sample touches the nodes base + offset of its ellipse; the offsets
+    # along the last axis are vectorised, the others looped over
+    base = np.floor(pos).astype(np.intp)
+    frac = pos - base
+    half = np.ceil(reach).astype(np.intp)
+    last = d - 1
+    offsets = np.empty((d, 1, 2 * half[last] + 2), dtype=np.intp)
+    offsets[last] = np.arange(-half[last], half[last] + 2)
+    for head in product(*(range(-h, h + 2) for h in half[:last])):
+        offsets[:last] = np.asarray(head, dtype=np.intp).reshape(-1, 1, 1)
+        # (d, n, m) offsets from each sample to its candidate nodes
+        delta = (offsets - frac[:, :, None]) * steps[:, None, None]
+        q = np.einsum("i...,i...->...", delta, np.tensordot(inv, delta, axes=1))
+        nodes = base[:, :, None] + offsets - lo[:, None, None]
+        keep = (q <= cutoff) & np.all((nodes >= 0) & (nodes < np.asarray(box)[:, None, None]), axis=0)
+        flat = np.ravel_multi_index(tuple(nodes[:, keep]), box)
+        values = np.exp(-0.5 * q[keep]) * np.broadcast_to(w[:, None], q.shape)[keep]
+        local += np.bincount(flat, weights=values, minlength=local.size)
+
+    density[tuple(slice(a, b + 1) for a, b in zip(lo, hi))] = local.reshape(box) / norm
+    return density
+
+
+
+_KDE_BACKENDS = {}
+
+
+
+def register_kde_backend(name: str, evaluate, regular_grid: bool = False, overwrite: bool = False):
+    """
+    Register a KDE evaluation backend, usable as ``backend=name`` in
+    `evaluate_kde`, `smellscapy.plotting.utils.kde_on_grid` and
+    `smellscapy.plotting.utils.kde1d`.
+
+    Parameters
+    ----------
+    name : str
+        Backend name. ``"auto"`` is reserved.
+    evaluate : callable
+        ``evaluate(kde, points, grids, **options) -> ndarray of shape (m,)``,
+        where `kde` is the fitted ``scipy.stats.gaussian_kde`` (possibly
+        weighted, see `fit_kde`), `points` the (d, m) evaluation points,
+        `grids` the d regular 1D grids whose product (``ij`` order) gives
+        `points`, or None, and `options` the keyword arguments given by the
+        caller. It must accept and ignore options meant for other backends.
+    regular_grid : bool, optional
+        Whether the backend requires `grids`.
+    overwrite : bool, optional
+        Replace an existing backend of the same name instead of raising.
+    """
+    if name == "auto":
+        raise ValueError("'auto' is reserved for the automatic backend selection")
+    if name in _KDE_BACKENDS and not overwrite:
+        raise ValueError(f"KDE backend {name!r} is already registered")
+    _KDE_BACKENDS[name] = (evaluate, regular_grid)
+
+
+
+def kde_backends() -> list:
+    """Return the names accepted by the `backend` arguments, ``"auto"`` first."""
+    return ["auto", *_KDE_BACKENDS]
+
+
+
+def scattered_backend(backend: str) -> str:
+    """
+    Return `backend` if it can evaluate a KDE at scattered points, or
+    ``"auto"`` if it requires a regular grid, so that a backend chosen for
+    grids can be passed to `evaluate_kde` without `grids`.
+    """
+    if backend in _KDE_BACKENDS and _KDE_BACKENDS[backend][1]:
+        return "auto"
+    return backend
+
+
+
+def support_nodes(covariance, steps, tol: float = TRUNCATION_TOL) -> int:
+    """
+    Number of grid nodes in the box visited by `truncated_kde` for each
+    sample.
+    """
+    covariance = np.atleast_2d(covariance)
+    reach = np.sqrt(-2.0 * np.log(tol) * np.diag(covariance)) / np.asarray(steps, dtype=np.float64)
+    return int(np.prod(2 * np.ceil(reach) + 2))
+
+
+
+def resolve_backend(backend: str, n_samples: int, n_points: int, n_nodes: int, regular: bool,
+                    support: int = None) -> str:
+    """
+    Return the registered KDE backend to use.
+
+    ``"auto"`` picks, in this order:
+
+    - ``"binned"`` on a regular grid from `BINNED_MIN_SAMPLES` distinct
+      points on, where its small approximation error is irrelevant, if its
+      cost (binning the `n_samples` samples and FFTs of the grid, about
+      ``n_samples + n_nodes * log2(n_nodes)``) is below the cost of the
+      exact evaluation below (about ``n_points`` times the nodes visited
+      per point). Samples with many repeated points, which collapse to few
+      distinct points, therefore stay exact;
+    - ``"truncated"`` on a regular grid when `support`, the number of
+      nodes visited per kernel, times `TRUNCATED_COST_RATIO` is below the
+      number of nodes, i.e. for narrow kernels;
+    - ``"tiled"`` otherwise, which is exact and faster than
+      ``gaussian_kde.evaluate`` for all problem sizes.
+
+    Parameters
+    ----------
+    backend : str
+        A name from `kde_backends`.
+    n_samples : int
+        Number of samples before collapsing repeated points.
+    n_points : int
+        Number of (distinct) points the KDE is made of.
+    n_nodes : int
+        Number of evaluation points.
+    regular : bool
+        Whether the evaluation points form a regular grid.
+    support : int, optional
+        Nodes visited per kernel by the truncated KDE, see `support_nodes`.
+    """
+    if backend != "auto" and backend not in _KDE_BACKENDS:
+        raise ValueError(f"backend must be one of {kde_backends()}, got {backend!r}")
+    if backend != "auto":
+        if _KDE_BACKENDS[backend][1] and not regular:
+            raise ValueError(f"The {backend} KDE requires a regular evaluation grid")
+        return backend
+    truncated = regular and support is not None and support * TRUNCATED_COST_RATIO < n_nodes
+    if regular and n_points >= BINNED_MIN_SAMPLES:
+        exact_cost = n_points * (support * TRUNCATED_COST_RATIO if truncated else n_nodes)
+        if n_samples + n_nodes * np.log2(max(n_nodes, 2)) < exact_cost:
+            return "binned"
+    return "truncated" if truncated else "tiled"
+
+
+
+def evaluate_kde(kde, points, grids=None, backend: str = "auto", n_samples: int = None, **options) -> np.ndarray:
+    """
+    Evaluate a fitted KDE with a registered backend.
+
+    Parameters
+    ----------
+    kde : scipy.stats.gaussian_kde
+        Fitted KDE, e.g. from `fit_kde`.
+    points : ndarray, shape (d, m)
+        Evaluation points. If `grids` is given, they must be the product of
+        the grids in ``ij`` order.
+    grids : sequence of 1D arrays, optional
+        Regular grids along each axis, required by the grid backends.
+    backend : str, optional
+        A name from `kde_backends`; ``"auto"`` (default) selects one with
+        `resolve_backend`.
+    n_samples : int, optional
+        Number of samples before collapsing repeated points; default is
+        the number of points of `kde`.
+    **options
+        Backend options, e.g. ``max_bytes`` and ``dtype`` for ``"tiled"``
+        or ``tol`` for ``"truncated"``.
+
+    Returns
+    -------
+    ndarray, shape (m,)
+    """
+    points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+    regular = grids is not None
+    support = None
+    if regular:
+        steps = [grid_step(grid) for grid in grids]
+        support = support_nodes(kde.covariance, steps, options.get("tol", TRUNCATION_TOL))
+    n_samples = kde.n if n_samples is None else n_samples
+    name = resolve_backend(backend, n_samples, kde.n, points.shape[1], regular, support)
+    return _KDE_BACKENDS[name][0](kde, points, grids, **options)
+
+
+
+def _exact(kde, points, grids, **options):
+    return kde(points)
+
+
+def _binned(kde, points, grids, **options):
+    return binned_kde(kde.dataset, grids, kde.covariance, kde.weights).ravel()
+
+
+def _tiled(kde, points, grids, max_bytes=TILE_BYTES, dtype=np.float64, **options):
+    return tiled_kde(kde.dataset, points, kde.covariance, kde.weights, max_bytes, dtype)
+
+
+def _truncated(kde, points, grids, tol=TRUNCATION_TOL, **options):
+    return truncated_kde(kde.dataset, grids, kde.covariance, kde.weights, tol).ravel()
+
+
+register_kde_backend("exact", _exact)
+register_kde_backend("binned", _binned, regular_grid=True)
+register_kde_backend("tiled", _tiled)
+register_kde_backend("truncated", _truncated, regular_grid=True)
+
+
+
+
+def unique_points(dataset):
+    """
+    Collapse samples to their distinct points.
+
+    Parameters
+    ----------
+    dataset : ndarray, shape (d, n)
+        Samples.
+
+    Returns
+    -------
+    points : ndarray, shape (d, k)
+        Distinct points.
+    counts : ndarray of int64, shape (k,)
+        Number of samples at each point.
+    """
+    dataset = np.atleast_2d(np.asarray(dataset, dtype=np.float64))
+    counts = pd.DataFrame(dataset.T).value_counts(sort=False)
+    points = np.asarray(counts.index.to_list(), dtype=np.float64).reshape(len(counts), -1).T
+    return points, counts.to_numpy(dtype=np.int64)
+
+
+
+def _bandwidth_factor(bw_method, n: int, d: int) -> float:
+    """Bandwidth factor `gaussian_kde` would use for `n` unweighted samples."""
+    if bw_method is None or bw_method == "scott":
+        return n ** (-1.0 / (d + 4))
+    if bw_method == "silverman":
+        return (n * (d + 2) / 4.0) ** (-1.0 / (d + 4))
+    if np.isscalar(bw_method) and not isinstance(bw_method, str):
+        return float(bw_method)
+    raise ValueError(f"Unsupported bandwidth method {bw_method!r}")
+
+
+
+def fit_kde(dataset, bw_method=None, dedup: str = "auto") -> gaussian_kde:
+    """
+    Fit a ``scipy.stats.gaussian_kde``, collapsing repeated samples.
+
+    Pleasantness and presence lie on a small lattice, so large samples have
+    few distinct points. With deduplication, the KDE is fitted on the
+    distinct points weighted by their multiplicity, and the bandwidth factor
+    is rescaled so that the kernel covariance is exactly the one of the
+    unweighted estimate: the density is the same, but its direct evaluation
+    costs O(distinct points) instead of O(samples).
+
+    Parameters
+    ----------
+    dataset : ndarray, shape (d, n)
+        Samples.
+    bw_method : str, scalar or callable, optional
+        Bandwidth, as in ``gaussian_kde``. Samples are never collapsed with
+        a callable, whose result could depend on the weights.
+    dedup : {"auto", "always", "never"}, optional
+        ``"auto"`` (default) collapses the samples when at most half of
+        them are distinct.
+
+    Returns
+    -------
+    scipy.stats.gaussian_kde
+    """
+    if dedup not in ("auto", "always", "never"):
+        raise ValueError(f"dedup must be 'auto', 'always' or 'never', got {dedup!r}")
+    dataset = np.atleast_2d(np.asarray(dataset, dtype=np.float64))
+    d, n = dataset.shape
+    if dedup == "never" or callable(bw_method):
+        return gaussian_kde(dataset, bw_method=bw_method)
+
+    points, counts = unique_points(dataset)
+    k = counts.size
+    if k < d + 1 or (dedup == "auto" and k > n // 2):
+        return gaussian_kde(dataset, bw_method=bw_method)
+
+    weights = counts / n
+    # np.cov with aweights divides by (1 - sum(w**2)) instead of (n - 1) / n
+    correction = np.sqrt(n * (1.0 - np.sum(weights ** 2)) / (n - 1))
+    factor = _bandwidth_factor(bw_method, n, d) * correction
+    return gaussian_kde(points, bw_method=factor, weights=weights)
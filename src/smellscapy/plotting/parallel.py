@@ -0,0 +1,125 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+
+def resolve_n_jobs(n_jobs) -> int:
+    """
+    Return the number of worker processes for `n_jobs`: None and 1 mean no
+    pool, negative values count back from the number of CPUs (-1 uses all
+    of them).
+    """
+    if n_jobs is None:
+        return 1
+    n_jobs = int(n_jobs)
+    if n_jobs == 0:
+        raise ValueError("n_jobs must not be 0")
+    if n_jobs < 0:
+        n_jobs = max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    return n_jobs
+
+
+
+def _allocate(shape, dtype):
+    """Create a shared memory block for an array; return the block and its view."""
+    dtype = np.dtype(dtype)
+    block = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1))
+    return block, np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def _share(array: np.ndarray):
+    """Copy `array` into a new shared memory block; return the block and its view."""
+    block, view = _allocate(array.shape, array.dtype)
+    view[...] = array
+    return block, view
+
+
+def _attach(spec):
+    name, shape, dtype = spec
+    try:
+        block = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 registers the block again with the resource tracker
+        # shared with the parent, which keeps a set of names: no-op
+        block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+# state of a worker process, set by _init_worker
+_WORKER = {}
+
+
+def _init_worker(specs, XX, YY, backend, dedup, options):
+    for key, spec in specs.items():
+        _WORKER[key] = _attach(spec)
+    _WORKER["grid"] = (XX, YY)
+    _WORKER["settings"] = (backend, dedup, options)
+
+
+def _run_job(job: int) -> bool:
+    from smellscapy.plotting.utils import _kde_on_grid
+
+    samples = _WORKER["samples"][1]
+    indices = _WORKER["indices"][1]
+    offsets = _WORKER["offsets"][1]
+    out = _WORKER["out"][1]
+    XX, YY = _WORKER["grid"]
+    backend, dedup, options = _WORKER["settings"]
+
+    rows = indices[offsets[job]:offsets[job + 1]]
+    out[job] = _kde_on_grid(samples[0, rows], samples[1, rows], XX, YY, backend, dedup, **options)
+    return True
+
+
+
+def run_kde_jobs(x, y, selections, XX, YY, n_jobs: int, backend="auto", dedup="auto", **options) -> np.ndarray:
+    """
+    Compute ``kde_on_grid(x[rows], y[rows], XX, YY)`` for each array of row
+    indices of `selections` in a pool of `n_jobs` processes.
+
+    The samples and the row indices are copied into
+    ``multiprocessing.shared_memory`` blocks once, and the output is
+    allocated in another one: workers read the samples and write each
+    density into its own slot of the output without any pickling, and only
+    receive the job number. The output is therefore in the order of
+    `selections` whatever the order in which jobs finish, and it is copied
+    once, out of shared memory, when all the jobs are done. Every selection
+    must have at least 3 rows.
+
+    Returns
+    -------
+    ndarray, shape (len(selections), *YY.shape)
+    """
+    XX, YY = np.asarray(XX), np.asarray(YY)
+    if not selections:
+        return np.zeros((0, *YY.shape))
+    samples = np.vstack([np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)])
+    selections = [np.asarray(rows, dtype=np.intp) for rows in selections]
+    offsets = np.concatenate([[0], np.cumsum([rows.size for rows in selections])]).astype(np.intp)
+    indices = np.concatenate(selections)
+
+    blocks = {}
+    try:
+        views = {}
+        for key, array in (("samples", samples), ("indices", indices), ("offsets", offsets)):
+            blocks[key], views[key] = _share(array)
+        # every job writes its whole slot: the output is never initialised
+        blocks["out"], views["out"] = _allocate((len(selections), *YY.shape), np.float64)
+        specs = {key: (block.name, views[key].shape, views[key].dtype) for key, block in blocks.items()}
+
+        with ProcessPoolExecutor(
+            max_workers=min(n_jobs, len(selections)),
+            initializer=_init_worker,
+            initargs=(specs, XX, YY, backend, dedup, options),
+        ) as pool:
+            for _ in pool.map(_run_job, range(len(selections))):
+                pass
+        return views["out"].copy()
+    finally:
+        views = None
+        for block in blocks.values():
+            block.close()
+            block.unlink()
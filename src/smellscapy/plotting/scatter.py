@@ -1,6 +1,7 @@
 import numpy as np
 import matplotlib.pyplot as plt
 from smellscapy.plotting.utils import update_params, set_fig_layout, get_default_plot_params
+from smellscapy.lattice import as_score_frame
 
 
 def plot_scatter(df, **kwargs):
@@ -11,8 +12,8 @@ def plot_scatter(df, **kwargs):
 
     Parameters
     ----------
-    df : pd.DataFrame
-        A DataFrame containing survey data. It must include at least the columns  
+    df : pd.DataFrame or ScoreLattice
+        A DataFrame containing survey data, or a `smellscapy.lattice.ScoreLattice`. It must include at least the columns  
         `'pleasantness_score'` and `'presence_score'`.
 
     **kwargs : dict, optional** 
@@ -23,7 +24,8 @@ def plot_scatter(df, **kwargs):
         - `group_by_col` : str, column name used for grouping and colouring subsets.  
         - `savefig` : bool, whether to save the plot to file.  
         - `filename` : str, output file name.  
-        - `dpi` : int, figure resolution for saved image.
+        - `dpi` : int, figure resolution for saved image.  
+        - `kde_backend` : str, accepted for consistency with the density plots; no KDE is computed here.
 
     Returns
     -------
@@ -48,6 +50,8 @@ def plot_scatter(df, **kwargs):
     
     """
 
+    df = as_score_frame(df)
+
     # Params
     params = get_default_plot_params()     
     params['filename'] = "scatter_plot.png"
@@ -3,6 +3,9 @@ import matplotlib.pyplot as plt
 import pandas as pd
 from matplotlib.patches import Patch
 import smellscapy.plotting.utils as ut
+from smellscapy.plotting.hdr import sample_hdr
+from smellscapy.plotting.kde import scattered_backend
+from smellscapy.lattice import as_score_frame
 
 
 
@@ -17,8 +20,8 @@ def plot_simple_density(df, **kwargs):
 
     Parameters
     ----------
-    df : pd.DataFrame
-        A DataFrame containing survey data. It must include at least the columns  
+    df : pd.DataFrame or ScoreLattice
+        A DataFrame containing survey data, or a `smellscapy.lattice.ScoreLattice`. It must include at least the columns  
         `'pleasantness_score'` and `'presence_score'`.
 
     **kwargs : dict, optional** 
@@ -34,6 +37,19 @@ def plot_simple_density(df, **kwargs):
             Colour of the scattered points when no grouping is used.
         - `eval_n` : int, optional
             Number of evaluation points per axis for the KDE grid.
+        - `kde_backend` : str, optional
+            KDE evaluation backend of ``ut.kde_on_grid`` and ``ut.kde1d``
+            (``"auto"``, ``"exact"``, ``"tiled"``, ``"truncated"``,
+            ``"binned"`` or a registered backend). Default ``"auto"``.
+        - `n_jobs` : int, optional
+            Number of processes computing the densities of the groups
+            (see ``ut.kde_on_grid_many``); -1 uses all CPUs. Default 1.
+        - `hdr_mode` : {"grid", "sample"}, optional
+            ``"grid"`` (default) computes the HDR threshold from the density
+            grid; ``"sample"`` takes it from the densities at the distinct
+            samples (``hdr.sample_hdr``), the grid being used only to draw
+            the contour. The densities at the samples are computed with
+            `kde_backend`, or ``"auto"`` if it requires a regular grid.
         - `xlim` : tuple(float, float), optional
             Limits of the x-axis for KDE evaluation and plotting.
         - `ylim` : tuple(float, float), optional
@@ -90,6 +106,8 @@ def plot_simple_density(df, **kwargs):
     
     """
 
+    df = as_score_frame(df)
+
     # Params
     params = ut.get_default_plot_params()
     params['filename'] = "simple_density_plot.png"
@@ -117,8 +135,8 @@ def plot_simple_density(df, **kwargs):
 
     # 2D KDE and optional marginals
     if (not group_by_col) or (group_by_col not in df.columns):
-        ZZ = ut.kde_on_grid(x, y, XX, YY)
-        ax = ut.add_contour_HDR_50(ax, XX, YY, ZZ, params)
+        ZZ = ut.kde_on_grid(x, y, XX, YY, backend=params["kde_backend"])
+        ax = ut.add_contour_HDR_50(ax, XX, YY, ZZ, params, thresholds=_sample_thresholds(x, y, ZZ, params))
        
         if params["show_points"]:
             ax.scatter(x, y, s=params["point_size"], alpha=params["point_alpha"],
@@ -140,13 +158,18 @@ def plot_simple_density(df, **kwargs):
 
         color_map = ut.build_categorical_palette(order, params["palette"])
 
+        codes = pd.Categorical(df[group_by_col], categories=order).codes
+        densities = ut.kde_on_grid_groups(x, y, codes, XX, YY, n_groups=len(order),
+                                          backend=params["kde_backend"], n_jobs=params["n_jobs"])
+
         legend_handles = []
-        for cat in order:
-            mask = (cats == cat).values
+        for g, cat in enumerate(order):
+            mask = codes == g
             xc, yc = x[mask], y[mask]
 
-            ZZg = ut.kde_on_grid(xc, yc, XX, YY)
-            ax = ut.add_contour_HDR_50(ax, XX, YY, ZZg, params, color_map[cat])
+            ZZg = ut.group_density(densities, g)
+            ax = ut.add_contour_HDR_50(ax, XX, YY, ZZg, params, color_map[cat],
+                                       thresholds=_sample_thresholds(xc, yc, ZZg, params))
 
             if params["show_points"]:
                 ax.scatter(xc, yc, s=params["point_size"], alpha=params["point_alpha"],
@@ -164,4 +187,16 @@ def plot_simple_density(df, **kwargs):
 
     fig.tight_layout()
     plt.show()
-    return fig, ax
\ No newline at end of file
+    return fig, ax
+
+
+
+def _sample_thresholds(x, y, ZZ, params):
+    """HDR thresholds of ``hdr_mode="sample"``, or None to use the grid."""
+    if params.get("hdr_mode", "grid") == "grid" or ZZ is None:
+        return None
+    if params["hdr_mode"] != "sample":
+        raise ValueError(f"hdr_mode must be 'grid' or 'sample', got {params['hdr_mode']!r}")
+    # the samples are scattered points: grid-only backends fall back to "auto"
+    backend = scattered_backend(params["kde_backend"])
+    return sample_hdr(x, y, np.atleast_1d(params["hdr_p"]), backend=backend).thresholds
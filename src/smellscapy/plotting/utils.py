@@ -1,10 +1,33 @@
 """ funzioni diverse """
 from matplotlib.ticker import MultipleLocator
 import numpy as np
-from scipy.stats import gaussian_kde
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 import pandas as pd
+from smellscapy.plotting.kde import (
+    binned_kde_groups,
+    evaluate_kde,
+    fit_kde,
+    grid_step,
+    group_covariances,
+    resolve_backend,
+    unique_points,
+)
+from smellscapy.plotting.cache import KDECache, content_key
+from smellscapy.plotting.hdr import hdr_levels
+from smellscapy.plotting.parallel import resolve_n_jobs, run_kde_jobs
+
+
+
+KDE_CACHE = KDECache()
+"""
+Cache of the densities computed by `kde_on_grid` and `kde1d`, keyed by the
+content of their inputs, so that re-drawing a plot with other colours or
+labels does not recompute its densities. Use ``KDE_CACHE.info()`` for the
+hit/miss statistics, ``KDE_CACHE.resize(max_bytes)`` to change the memory
+cap (0 disables it) and ``KDE_CACHE.clear()`` after overwriting a KDE
+backend.
+"""
 
 
 
@@ -77,8 +100,22 @@ def get_default_plot_params():
         Length of minor tick marks; default 0 (invisible).
     eval_n : int
         Number of evaluation points per axis for the 2D KDE grid.
-    hdr_p : float
-        Probability mass of the high-density region (HDR), default 0.5.
+    kde_backend : str
+        KDE evaluation backend passed to `kde_on_grid` and `kde1d`,
+        default ``"auto"``.
+    n_jobs : int
+        Number of processes computing the densities of the groups, see
+        `kde_on_grid_many`; default 1 (no pool).
+    hdr_p : float or sequence of float
+        Probability mass of the high-density region (HDR), default 0.5; a
+        sequence draws nested HDRs, see `add_contour_HDR_50`.
+    hdr_method : str
+        HDR threshold algorithm, ``"sort"`` (default) or ``"histogram"``,
+        see `hdr.hdr_levels`.
+    hdr_mode : str
+        ``"grid"`` (default) takes the HDR thresholds from the density
+        grid, ``"sample"`` from the densities at the samples, see
+        `hdr.sample_hdr`.
     show_points : bool
         Whether to overlay individual data points.
     point_size : float
@@ -164,7 +201,11 @@ def get_default_plot_params():
 
         # Griglia KDE 2D
         "eval_n": 300,
+        "kde_backend": "auto",
+        "n_jobs": 1,
         "hdr_p": 0.5,
+        "hdr_method": "sort",
+        "hdr_mode": "grid",
 
         # Scatter
         "show_points": True,
@@ -209,6 +250,9 @@ def get_default_dynamic_plot_params():
         "group_by_col": None,
         "frame_order": None,
         "eval_n": 120,
+        "kde_backend": "auto",
+        "n_jobs": 1,
+        "hdr_method": "sort",
         "xlim": (-1.0, 1.0),
         "ylim": (-1.0, 1.0),
         "point_size": 6,
@@ -396,10 +440,38 @@ def set_fig_layout(ax, params):
 
 
 
-def kde_on_grid(x_sub, y_sub, XX, YY):
+def _grid_axes(XX, YY):
+    """Return the axes (xi, yi) if (XX, YY) is a regular ``meshgrid``, else None."""
+    if XX.ndim != 2 or XX.shape != YY.shape:
+        return None
+    xi, yi = XX[0], YY[:, 0]
+    regular = (
+        grid_step(xi) is not None and grid_step(yi) is not None
+        and np.array_equal(XX, np.broadcast_to(xi, XX.shape))
+        and np.array_equal(YY, np.broadcast_to(yi[:, None], YY.shape))
+    )
+    return (xi, yi) if regular else None
+
+
+
+def kde_on_grid(x_sub, y_sub, XX, YY, backend="auto", dedup="auto", **options):
     """
     Compute a 2D Gaussian kernel density estimate (KDE) on a predefined grid.
 
+    The bandwidth is always the Scott covariance of `scipy.stats.gaussian_kde`.
+    Repeated (x, y) points are collapsed into weighted distinct points with
+    the same bandwidth (see `smellscapy.plotting.kde.fit_kde`), and the
+    density is evaluated with one of the backends of
+    `smellscapy.plotting.kde.kde_backends`:
+
+    - ``"exact"``: ``gaussian_kde.evaluate``;
+    - ``"tiled"``: exact, in blocks of bounded memory (see
+      `smellscapy.plotting.kde.tiled_kde`);
+    - ``"truncated"``: only where the truncated kernels of the points reach
+      (see `smellscapy.plotting.kde.truncated_kde`);
+    - ``"binned"``: linear binning and FFT convolution (see
+      `smellscapy.plotting.kde.binned_kde`).
+
     Parameters
     ----------
     x_sub : array-like
@@ -411,32 +483,204 @@ def kde_on_grid(x_sub, y_sub, XX, YY):
         `np.meshgrid`).
     YY : ndarray
         2D array of y-coordinates defining the evaluation grid.
+    backend : str, optional
+        KDE evaluation backend. ``"auto"`` (default) chooses from the
+        number of samples and distinct points and the grid size, see
+        `smellscapy.plotting.kde.resolve_backend`. ``"binned"`` and
+        ``"truncated"`` require (XX, YY) to be a regular ``meshgrid``.
+    dedup : {"auto", "always", "never"}, optional
+        Whether to collapse repeated points, see
+        `smellscapy.plotting.kde.fit_kde`.
+    **options
+        Backend options: ``max_bytes`` and ``dtype`` (block size and
+        precision of ``"tiled"``), ``tol`` (truncation tolerance of
+        ``"truncated"``).
 
     Returns
     -------
     ZZ : ndarray or None
         2D array of KDE values evaluated on (XX, YY) and reshaped to
         `YY.shape`, or None if fewer than 3 valid samples are provided.
+        Results are cached in `KDE_CACHE` and returned read-only.
     """
     if len(x_sub) < 3:
         return None
-    kde = gaussian_kde(np.vstack([x_sub, y_sub]))
-    ZZ = kde(np.vstack([XX.ravel(), YY.ravel()])).reshape(YY.shape)
-
+    key = _kde_on_grid_key(x_sub, y_sub, XX, YY, backend, dedup, options)
+    ZZ = KDE_CACHE.get(key)
+    if ZZ is None:
+        ZZ = KDE_CACHE.put(key, _kde_on_grid(x_sub, y_sub, XX, YY, backend, dedup, **options))
     return ZZ
 
 
 
-def hdr_threshold_from_grid(zi, p, xlim, ylim):
+def _kde_on_grid_key(x_sub, y_sub, XX, YY, backend, dedup, options) -> str:
+    return content_key("kde_on_grid", np.asarray(x_sub), np.asarray(y_sub), XX, YY, backend, dedup, options)
+
+
+
+def kde_on_grid_many(x, y, selections, XX, YY, n_jobs=1, backend="auto", dedup="auto", **options) -> list:
+    """
+    Compute `kde_on_grid` for many subsets of the same samples, optionally
+    in parallel.
+
+    Subsets whose density is in `KDE_CACHE` are not recomputed. With
+    ``n_jobs != 1``, the others are spread over a pool of processes that
+    read the samples from shared memory (see
+    `smellscapy.plotting.parallel.run_kde_jobs`). The densities are the
+    same as with `kde_on_grid`, in the order of `selections`.
+
+    Parameters
+    ----------
+    x, y : array-like
+        1D arrays of x and y values.
+    selections : sequence of array-like
+        Row indices (or boolean masks) of each subset.
+    XX, YY : ndarray
+        Evaluation grid, as in `kde_on_grid`.
+    n_jobs : int or None, optional
+        Number of processes; 1 (default) or None computes in this process,
+        -1 uses all CPUs.
+    backend, dedup, **options
+        As in `kde_on_grid`.
+
+    Returns
+    -------
+    list of (ndarray or None)
+        Density of each subset, None for subsets with fewer than 3 samples.
+    """
+    x, y = np.asarray(x), np.asarray(y)
+    XX, YY = np.asarray(XX), np.asarray(YY)
+    selections = [np.flatnonzero(rows) if np.asarray(rows).dtype == bool else np.asarray(rows, dtype=np.intp)
+                  for rows in selections]
+    n_jobs = resolve_n_jobs(n_jobs)
+
+    results = [None] * len(selections)
+    pending, keys = [], []
+    for j, rows in enumerate(selections):
+        if rows.size < 3:
+            continue
+        key = _kde_on_grid_key(x[rows], y[rows], XX, YY, backend, dedup, options)
+        results[j] = KDE_CACHE.get(key)
+        if results[j] is None:
+            pending.append(j)
+            keys.append(key)
+
+    if n_jobs > 1 and len(pending) > 1:
+        densities = run_kde_jobs(x, y, [selections[j] for j in pending], XX, YY, n_jobs, backend, dedup, **options)
+    else:
+        densities = [_kde_on_grid(x[selections[j]], y[selections[j]], XX, YY, backend, dedup, **options) for j in pending]
+    for j, key, density in zip(pending, keys, densities):
+        results[j] = KDE_CACHE.put(key, density)
+    return results
+
+
+
+def _kde_on_grid(x_sub, y_sub, XX, YY, backend, dedup, **options):
+    kde = fit_kde(np.vstack([x_sub, y_sub]), dedup=dedup)
+
+    XX, YY = np.asarray(XX), np.asarray(YY)
+    axes = _grid_axes(XX, YY)
+    if axes is not None:
+        xi, yi = axes
+        points = np.vstack([np.repeat(xi, yi.size), np.tile(yi, xi.size)])
+        ZZ = evaluate_kde(kde, points, [xi, yi], backend, len(x_sub), **options)
+        return ZZ.reshape(xi.size, yi.size).T
+
+    points = np.vstack([XX.ravel(), YY.ravel()])
+    return evaluate_kde(kde, points, None, backend, len(x_sub), **options).reshape(YY.shape)
+
+
+
+def kde_on_grid_groups(x, y, codes, XX, YY, n_groups=None, backend="auto", dedup="auto", n_jobs=1, **options):
+    """
+    Compute the 2D KDE of every group of samples on the same grid.
+
+    On a regular grid, with ``backend="binned"``, or with ``"auto"`` when
+    `smellscapy.plotting.kde.resolve_backend` picks the binned KDE for the
+    distinct points of all the groups together, the groups
+    are binned in one pass and convolved with their own kernels (the Scott
+    covariance of each group, as in `kde_on_grid`) by batched FFTs, see
+    `smellscapy.plotting.kde.binned_kde_groups`: the cost barely depends on
+    the number of groups. Otherwise, the groups are computed by
+    `kde_on_grid_many`, in `n_jobs` processes.
+
+    Parameters
+    ----------
+    x, y : array-like
+        1D arrays of x and y values of all the groups. Rows with a
+        non-finite value are ignored.
+    codes : array-like of int
+        Group of each sample in ``[0, n_groups)``, e.g. the ``codes`` of a
+        ``pandas.Categorical``; samples with a negative code are ignored.
+    XX, YY : ndarray
+        2D arrays of coordinates of the evaluation grid, as in
+        `kde_on_grid`.
+    n_groups : int, optional
+        Number of groups; default is ``max(codes) + 1``.
+    n_jobs : int or None, optional
+        Number of processes of the per-group path, as in
+        `kde_on_grid_many`.
+    backend, dedup, **options
+        As in `kde_on_grid`.
+
+    Returns
+    -------
+    ndarray, shape (n_groups, *YY.shape)
+        Density of each group; all-NaN for groups with fewer than 3
+        samples or a degenerate covariance. The result is cached in
+        `KDE_CACHE` and returned read-only.
+    """
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    codes = np.asarray(codes, dtype=np.intp)
+    codes = np.where(np.isfinite(x) & np.isfinite(y), codes, -1)
+    if n_groups is None:
+        n_groups = int(codes.max()) + 1 if codes.size else 0
+    XX, YY = np.asarray(XX), np.asarray(YY)
+
+    key = content_key("kde_on_grid_groups", x, y, codes, n_groups, XX, YY, backend, dedup, options)
+    cube = KDE_CACHE.get(key)
+    if cube is not None:
+        return cube
+
+    axes = _grid_axes(XX, YY)
+    counts = np.bincount(codes[codes >= 0], minlength=n_groups)
+    batched = backend == "binned"
+    if backend == "auto" and axes is not None and (codes >= 0).any():
+        valid = codes >= 0
+        _, multiplicity = unique_points(np.vstack([x[valid], y[valid]]))
+        batched = resolve_backend("auto", int(valid.sum()), multiplicity.size, XX.size, True) == "binned"
+    if axes is not None and batched:
+        xi, yi = axes
+        dataset = np.vstack([x, y])
+        covariances, _ = group_covariances(dataset, codes, n_groups)
+        covariances[counts < 3] = np.nan
+        cube = np.ascontiguousarray(binned_kde_groups(dataset, codes, n_groups, [xi, yi], covariances).transpose(0, 2, 1))
+    else:
+        cube = np.full((n_groups, *YY.shape), np.nan)
+        groups = np.flatnonzero(counts >= 3)
+        selections = [np.flatnonzero(codes == g) for g in groups]
+        for g, density in zip(groups, kde_on_grid_many(x, y, selections, XX, YY, n_jobs, backend, dedup, **options)):
+            cube[g] = density
+    return KDE_CACHE.put(key, cube)
+
+
+
+def group_density(cube, g):
+    """Return the density of group `g` of a `kde_on_grid_groups` cube, or None if it has none."""
+    Z = cube[g]
+    return None if np.isnan(Z).all() else Z
+
+
+
+def hdr_threshold_from_grid(zi, p, xlim, ylim, method="sort"):
     """
     Compute the density threshold for a high-density region (HDR) of mass `p`
     from a 2D KDE grid.
 
     The function assumes that `zi` has been evaluated on a regular rectangular
-    grid spanning `[xlim[0], xlim[1]] × [ylim[0], ylim[1]]`. It computes the
-    cell area, sorts the density values in descending order and finds the
-    threshold such that the cumulative integral reaches `p` times the total
-    mass.
+    grid spanning `[xlim[0], xlim[1]] × [ylim[0], ylim[1]]`, and finds the
+    threshold such that the cumulative integral of the sorted densities
+    reaches `p` times the total mass, see `smellscapy.plotting.hdr.hdr_levels`.
 
     Parameters
     ----------
@@ -448,6 +692,9 @@ def hdr_threshold_from_grid(zi, p, xlim, ylim):
         x-axis limits of the grid.
     ylim : tuple(float, float)
         y-axis limits of the grid.
+    method : {"sort", "histogram"}, optional
+        Threshold algorithm: a full sort of the grid (default), or the
+        sort-free histogram search, linear in the grid size.
 
     Returns
     -------
@@ -457,23 +704,21 @@ def hdr_threshold_from_grid(zi, p, xlim, ylim):
     zmax : float
         Maximum density value in `zi`.
     """
-    ny_, nx_ = zi.shape
+    levels = hdr_levels(zi, p, grid_cell_area(zi.shape, xlim, ylim), method)
+    return levels.thresholds[()], float(np.max(zi))
+
+
+
+def grid_cell_area(shape, xlim, ylim) -> float:
+    """Return the cell area of a regular grid of `shape` (ny, nx) spanning `xlim` × `ylim`."""
+    ny_, nx_ = shape
     dx = (xlim[1] - xlim[0]) / (nx_ - 1)
     dy = (ylim[1] - ylim[0]) / (ny_ - 1)
-    cell_area = dx * dy
-    zflat = zi.ravel()
-    order = np.argsort(zflat)[::-1]
-    zsorted = zflat[order]
-    cum_mass = np.cumsum(zsorted * cell_area)
-    target = p * cum_mass[-1]
-    idx = np.searchsorted(cum_mass, target)
-    idx = min(idx, zsorted.size - 1)
-
-    return zsorted[idx], float(np.max(zi))
+    return dx * dy
 
 
 
-def kde1d(values, grid, bw=None):
+def kde1d(values, grid, bw=None, backend="auto", dedup="auto", **options):
     """
     Compute a 1D Gaussian kernel density estimate (KDE) on a given grid.
 
@@ -488,20 +733,41 @@ def kde1d(values, grid, bw=None):
         Bandwidth specification passed to `scipy.stats.gaussian_kde`
         via the `bw_method` argument. If None, the default method of
         `gaussian_kde` is used.
+    backend : str, optional
+        KDE evaluation backend, as in `kde_on_grid`. The binned and
+        truncated KDEs require a regular grid.
+    dedup : {"auto", "always", "never"}, optional
+        Whether to collapse repeated values, as in `kde_on_grid`.
+    **options
+        Backend options, as in `kde_on_grid`.
 
     Returns
     -------
     density : ndarray or None
         KDE evaluated on `grid`, or None if fewer than 3 finite
-        samples are available.
+        samples are available. Results are cached in `KDE_CACHE` (unless
+        `bw` is callable) and returned read-only.
     """
     vals = np.asarray(values)
     vals = vals[np.isfinite(vals)]
     if vals.size < 3:
         return None
-    kde = gaussian_kde(vals, bw_method=bw)
+    if callable(bw):
+        return _kde1d(vals, grid, bw, backend, dedup, **options)
+    key = content_key("kde1d", vals, grid, bw, backend, dedup, options)
+    density = KDE_CACHE.get(key)
+    if density is None:
+        density = KDE_CACHE.put(key, _kde1d(vals, grid, bw, backend, dedup, **options))
+    return density
+
+
+
+def _kde1d(vals, grid, bw, backend, dedup, **options):
+    kde = fit_kde(vals, bw_method=bw, dedup=dedup)
 
-    return kde(grid)
+    grid = np.asarray(grid, dtype=np.float64)
+    grids = [grid] if grid_step(grid) is not None else None
+    return evaluate_kde(kde, grid[None, :], grids, backend, vals.size, **options)
 
 
 def build_categorical_palette(categories, palette_param):
@@ -548,16 +814,21 @@ def build_categorical_palette(categories, palette_param):
 
 
 
-def add_contour_HDR_50(ax, XX, YY, ZZ, params, color=None):
+def add_contour_HDR_50(ax, XX, YY, ZZ, params, color=None, thresholds=None):
     """
     Draw the 50% high-density region (HDR) contour on a 2D KDE grid.
 
-    This function computes the HDR threshold using `hdr_threshold_from_grid`
-    with probability mass `params["hdr_p"]` (typically 0.5), and plots:
+    This function computes the HDR threshold using `hdr.hdr_levels` with
+    probability mass `params["hdr_p"]` (typically 0.5), and plots:
 
     - a filled region between the HDR threshold and the maximum density
     - an outline contour at the HDR threshold
 
+    `params["hdr_p"]` may also be a sequence of probabilities (e.g.
+    ``[0.25, 0.5, 0.75]``): the thresholds of all of them come from one
+    sort of the grid, and the nested regions are filled on top of each
+    other.
+
     Colours for the filled and contour regions can be overridden via the
     `color` argument; otherwise, `params["fill_color"]` and
     `params["contour_color"]` are used.
@@ -572,12 +843,15 @@ def add_contour_HDR_50(ax, XX, YY, ZZ, params, color=None):
         2D KDE values on the grid. If None, nothing is drawn.
     params : dict
         Plot configuration dictionary. The following keys are used:
-        - "hdr_p", "xlim", "ylim"
+        - "hdr_p", "hdr_method" (optional, default "sort"), "xlim", "ylim"
         - "fill_color", "fill_alpha"
         - "contour_color", "contour_width"
     color : str or tuple, optional
         Override colour for both filling and outline. If None, defaults
         from `params` are used.
+    thresholds : array-like, optional
+        HDR thresholds to draw instead of those computed from `ZZ`, e.g.
+        from `hdr.sample_hdr`.
 
     Returns
     -------
@@ -588,11 +862,16 @@ def add_contour_HDR_50(ax, XX, YY, ZZ, params, color=None):
         fill_color = color if color else params["fill_color"]
         contour_color = color if color else params["contour_color"]
 
-        thr, zmax = hdr_threshold_from_grid(ZZ, params["hdr_p"], params["xlim"], params["ylim"])
-        if thr < zmax:
+        zmax = float(np.max(ZZ))
+        if thresholds is None:
+            thresholds = hdr_levels(ZZ, np.atleast_1d(params["hdr_p"]), method=params.get("hdr_method", "sort")).thresholds
+        thresholds = np.atleast_1d(thresholds)
+        thresholds = np.unique(thresholds[thresholds < zmax])
+        for thr in thresholds:
             ax.contourf(XX, YY, ZZ, levels=[thr, zmax],
                         colors=[fill_color], alpha=params["fill_alpha"])
-            ax.contour(XX, YY, ZZ, levels=[thr],
+        if thresholds.size:
+            ax.contour(XX, YY, ZZ, levels=thresholds,
                         colors=[contour_color], linewidths=params["contour_width"])
             
     return ax
@@ -745,6 +1024,7 @@ def add_marginals(x, xi, y, yi, ax_top, ax_right, params, color=None):
     params : dict
         Plot configuration dictionary. The following keys are used:
         - "marginal_bw"
+        - "kde_backend" (optional, default "auto")
         - "marginal_fill_alpha"
         - "marginal_linewidth"
         - "fill_color"
@@ -763,11 +1043,12 @@ def add_marginals(x, xi, y, yi, ax_top, ax_right, params, color=None):
     fill_color = color if color else params["fill_color"]
     contour_color = color if color else params["contour_color"]
 
-    fx = kde1d(x, xi, bw=params["marginal_bw"])
+    backend = params.get("kde_backend", "auto")
+    fx = kde1d(x, xi, bw=params["marginal_bw"], backend=backend)
     if fx is not None:
         ax_top.fill_between(xi, 0, fx, alpha=params["marginal_fill_alpha"], color=fill_color)
         ax_top.plot(xi, fx, linewidth=params["marginal_linewidth"], color=contour_color)
-    fy = kde1d(y, yi, bw=params["marginal_bw"])
+    fy = kde1d(y, yi, bw=params["marginal_bw"], backend=backend)
     if fy is not None:
         ax_right.fill_betweenx(yi, 0, fy, alpha=params["marginal_fill_alpha"], color=fill_color)
         ax_right.plot(fy, yi, linewidth=params["marginal_linewidth"], color=contour_color)
@@ -852,35 +1133,3 @@ def order_values_for_frames(s: pd.Series, order_override=None):
         if pd.notna(v) and v not in seen:
             seen.append(v)
     return seen
-
-
-
-def _hdr_level(z: np.ndarray, p: float = 0.5) -> float:
-    """
-    Return density threshold 't' such that the integral over {z >= t} ≈ p
-    of the total mass (discrete approximation).
-    """
-    if z is None:
-        return np.nan
-
-    flat = np.asarray(z, dtype=float).ravel()
-    # tieni solo valori finiti
-    flat = flat[np.isfinite(flat)]
-
-    if flat.size == 0 or np.all(flat == 0):
-        return np.nan
-
-    order = np.argsort(flat)[::-1]
-    z_sorted = flat[order]
-
-    cum = np.cumsum(z_sorted)
-    total = cum[-1]
-    if total == 0 or not np.isfinite(total):
-        return np.nan
-
-    cum /= total
-    idx = np.searchsorted(cum, p)
-    idx = min(idx, z_sorted.size - 1)
-
-    level = z_sorted[idx]
-    return float(level)
\ No newline at end of file
@@ -1,7 +1,9 @@
 
+from collections import namedtuple
+from dataclasses import dataclass
 from typing import Dict, List, Optional, Tuple
+import numpy as np
 import pandas as pd
-import itertools
 from loguru import logger
 
 
@@ -30,9 +32,281 @@ The survey DataFrame must include these columns.
 
 
 
+class ValidationError(Exception):
+    """
+    Exception raised when survey data do not pass validation.
+
+    Attributes
+    ----------
+    report : ValidationReport or None
+        The report computed before the error was raised, if any.
+    """
+
+    def __init__(self, message: str, report: Optional["ValidationReport"] = None):
+        super().__init__(message)
+        self.report = report
+
+
+
+def _compact_positions(positions: np.ndarray, n_rows: int) -> np.ndarray:
+    """Downcast row positions to int32 when the frame is small enough."""
+    if n_rows <= np.iinfo(np.int32).max:
+        return positions.astype(np.int32, copy=False)
+    return positions
+
+
+
+def _positions_by_column(mask: np.ndarray, n_rows: int) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Return the positions of rows flagged in ``mask`` (shape (N, 8)), overall
+    and per attribute column.
+    """
+    rows = np.flatnonzero(mask.any(axis=1))
+    flagged = mask[rows]
+    per_column = {
+        col: _compact_positions(rows[flagged[:, j]], n_rows)
+        for j, col in enumerate(ATTRIBUTES_COLUMN_NAMES)
+    }
+    return _compact_positions(rows, n_rows), per_column
+
+
+
+@dataclass
+class ValidationReport:
+    """
+    Outcome of the validation of a survey DataFrame.
+
+    All row references are positional (``0 .. n_rows - 1``) and stored as
+    compact integer arrays; use `labels` to translate them into index labels
+    of the validated DataFrame.
+
+    Attributes
+    ----------
+    n_rows : int
+        Number of rows that were checked.
+    index : pandas.Index
+        Index of the validated DataFrame.
+    missing_rows : numpy.ndarray
+        Positions of rows with at least one missing attribute value.
+    invalid_rows : numpy.ndarray
+        Positions of rows with at least one attribute value outside
+        `ATTRIBUTES_VALUES`.
+    missing_by_column : dict of str to numpy.ndarray
+        Positions of missing values, for each attribute column.
+    invalid_by_column : dict of str to numpy.ndarray
+        Positions of out-of-range values, for each attribute column.
+    """
+
+    n_rows: int
+    index: pd.Index
+    missing_rows: np.ndarray
+    invalid_rows: np.ndarray
+    missing_by_column: Dict[str, np.ndarray]
+    invalid_by_column: Dict[str, np.ndarray]
+
+    @classmethod
+    def from_masks(cls, index: pd.Index, missing: np.ndarray, invalid: np.ndarray) -> "ValidationReport":
+        """
+        Build a report from the (N, 8) boolean masks of missing and
+        out-of-range attribute values.
+        """
+        n_rows = missing.shape[0]
+        missing_rows, missing_by_column = _positions_by_column(missing, n_rows)
+        invalid_rows, invalid_by_column = _positions_by_column(invalid, n_rows)
+        return cls(n_rows, index, missing_rows, invalid_rows, missing_by_column, invalid_by_column)
+
+    @property
+    def is_valid(self) -> bool:
+        """True if no value is missing or out of range."""
+        return self.missing_rows.size == 0 and self.invalid_rows.size == 0
+
+    @property
+    def excluded_rows(self) -> np.ndarray:
+        """Positions of rows with missing or out-of-range values."""
+        return np.union1d(self.missing_rows, self.invalid_rows)
+
+    @property
+    def counts(self) -> pd.DataFrame:
+        """Number of missing and out-of-range values per attribute column."""
+        return pd.DataFrame(
+            {
+                "missing": [self.missing_by_column[col].size for col in ATTRIBUTES_COLUMN_NAMES],
+                "invalid": [self.invalid_by_column[col].size for col in ATTRIBUTES_COLUMN_NAMES],
+            },
+            index=ATTRIBUTES_COLUMN_NAMES,
+        )
+
+    def labels(self, positions: np.ndarray) -> pd.Index:
+        """Translate row positions into index labels of the validated DataFrame."""
+        return self.index[positions]
+
+    def summary(self) -> str:
+        """Return a short, human readable summary of the report."""
+        if self.is_valid:
+            return f"{self.n_rows} rows checked, all data passed quality checks"
+        lines = [
+            f"{self.n_rows} rows checked: "
+            f"{self.missing_rows.size} with missing values, "
+            f"{self.invalid_rows.size} with values outside {ATTRIBUTES_VALUES}"
+        ]
+        counts = self.counts
+        for col, row in counts[(counts["missing"] > 0) | (counts["invalid"] > 0)].iterrows():
+            lines.append(f"  {col}: {row['missing']} missing, {row['invalid']} invalid")
+        return "\n".join(lines)
+
+
+
+def attribute_columns(attributes) -> List[np.ndarray]:
+    """
+    Split an array of responses into the eight attribute columns.
+
+    Parameters
+    ----------
+    attributes : array-like
+        Either an (N, 8) array with the attributes in the order of
+        `ATTRIBUTES_COLUMN_NAMES`, or a structured array with one field per
+        attribute name.
+
+    Returns
+    -------
+    columns : list of numpy.ndarray
+        The eight 1D attribute columns, as views of `attributes` whenever
+        possible.
+
+    Raises
+    ------
+    ValidationError "Missing mandatory column/s"
+        If a structured array lacks any of the attribute fields.
+    ValueError
+        If a plain array does not have shape (N, 8).
+    """
+    attributes = np.asarray(attributes)
+    if attributes.dtype.names is not None:
+        missing_columns = [col for col in ATTRIBUTES_COLUMN_NAMES if col not in attributes.dtype.names]
+        if missing_columns:
+            raise ValidationError(f"Missing mandatory column/s: {', '.join(missing_columns)}")
+        return [attributes[col] for col in ATTRIBUTES_COLUMN_NAMES]
+
+    if attributes.ndim != 2 or attributes.shape[1] != len(ATTRIBUTES_COLUMN_NAMES):
+        raise ValueError(f"attributes must have shape (N, {len(ATTRIBUTES_COLUMN_NAMES)}), got {attributes.shape}")
+    return [attributes[:, j] for j in range(attributes.shape[1])]
+
+
+
+def _value_masks(values: np.ndarray, missing_value=None) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the (missing, invalid) masks of an array of attribute values."""
+    lo, hi = ATTRIBUTES_VALUES[0], ATTRIBUTES_VALUES[-1]
+    if values.dtype.kind in "biu":
+        missing = np.zeros(values.shape, dtype=bool)
+        allowed = (values >= lo) & (values <= hi)
+    elif values.dtype.kind == "f":
+        missing = np.isnan(values)
+        allowed = np.isin(values, ATTRIBUTES_VALUES)
+    else:
+        # object columns (strings, pd.NA, ...): let pandas handle mixed types
+        missing = np.asarray(pd.isna(values))
+        allowed = pd.Series(values.ravel()).isin(ATTRIBUTES_VALUES).to_numpy().reshape(values.shape)
+    if missing_value is not None:
+        missing |= values == missing_value
+    return missing, ~(allowed | missing)
+
+
+
+def attribute_masks(attributes, missing_value=None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute the masks of missing and out-of-range attribute values.
+
+    This is the array-level core of `validate`, usable in tight loops
+    without building a DataFrame.
+
+    Parameters
+    ----------
+    attributes : array-like or list of numpy.ndarray
+        An (N, 8) array, a structured array with the eight attribute fields
+        (see `attribute_columns`), or a list of the eight attribute columns.
+    missing_value : scalar, optional
+        Sentinel marking missing values in integer arrays (for example
+        `smellscapy.compact.MISSING_CODE`), in addition to NaN.
+
+    Returns
+    -------
+    missing : numpy.ndarray of bool, shape (N, 8)
+        True where the value is missing (NaN or `missing_value`).
+    invalid : numpy.ndarray of bool, shape (N, 8)
+        True where the value is present but not in `ATTRIBUTES_VALUES`.
+    """
+    if not isinstance(attributes, list):
+        values = np.asarray(attributes)
+        if values.dtype.names is None and values.dtype.kind in "biuf":
+            attribute_columns(values)  # shape check
+            return _value_masks(values, missing_value)
+        attributes = attribute_columns(values)
+
+    columns = attributes
+    n = len(columns[0])
+    missing = np.empty((n, len(columns)), dtype=bool, order="F")
+    invalid = np.empty((n, len(columns)), dtype=bool, order="F")
+    for j, col in enumerate(columns):
+        missing[:, j], invalid[:, j] = _value_masks(np.asarray(col), missing_value)
+    return missing, invalid
+
+
+
+def valid_mask(attributes, missing_value=None) -> np.ndarray:
+    """
+    Return a boolean mask of the rows with eight complete, in-range answers.
+
+    Parameters
+    ----------
+    attributes : array-like
+        An (N, 8) array or a structured array with the eight attribute
+        fields (see `attribute_columns`).
+    missing_value : scalar, optional
+        Sentinel marking missing values, see `attribute_masks`.
+
+    Returns
+    -------
+    numpy.ndarray of bool, shape (N,)
+        True for the rows that `validate` would keep.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from smellscapy.surveys import valid_mask
+    >>> valid_mask(np.array([[3, 3, 3, 3, 3, 3, 3, 3], [3, 3, 9, 3, 3, 3, 3, 3]]))
+    array([ True, False])
+    """
+    missing, invalid = attribute_masks(attributes, missing_value)
+    return ~(missing | invalid).any(axis=1)
+
+
+
+class ValidationResult(namedtuple("ValidationResult", ["data", "excluded"])):
+    """
+    Outcome of `validate`: unpacks as ``(data, excluded)`` whatever the
+    ``errors`` mode, with the `ValidationReport` as ``report``.
+
+    Attributes
+    ----------
+    data : pandas.DataFrame
+        The rows with complete, valid answers.
+    excluded : pandas.DataFrame or None
+        The excluded rows, or None.
+    report : ValidationReport
+        The report of the validation.
+    """
+
+    def __new__(cls, data, excluded, report: ValidationReport):
+        result = super().__new__(cls, data, excluded)
+        result.report = report
+        return result
+
+
+
 def validate(
     df: pd.DataFrame,
-) -> Tuple[pd.DataFrame, Optional[pd.DataFrame]]:
+    errors: str = "raise",
+) -> ValidationResult:
     """ 
     Validate a survey DataFrame for required columns and acceptable value ranges.
 
@@ -40,26 +314,41 @@ def validate(
     survey and ID columns, and that all numeric responses fall within the
     defined set `ATTRIBUTES_VALUES`.
 
+    All checks are computed in a single vectorised pass over the attribute
+    columns, which also produces a `ValidationReport`.
+
     Parameters
     ----------
     df : pandas.DataFrame
         A DataFrame containing survey data. Must include columns listed in
         `ATTRIBUTES_COLUMN_NAMES`.
+    errors : {"raise", "collect"}, optional
+        With ``"raise"`` (default), out-of-range values raise a
+        `ValidationError`. With ``"collect"``, rows with out-of-range values
+        are excluded like rows with missing values.
 
     Returns
     -------
-    df : pandas.DataFrame
-        A DataFrame containing only valid rows with complete data.
-    excl_df : pandas.DataFrame
-        A DataFrame containing rows removed due to missing values.
+    ValidationResult
+        Unpacks as ``(df, excl_df)`` in both modes, with the
+        `ValidationReport` as its ``report`` attribute:
+
+        df : pandas.DataFrame
+            A DataFrame containing only valid rows with complete data. When
+            no row is removed, the input DataFrame itself is returned (no
+            copy); otherwise it is a new DataFrame, not a view of the input.
+        excl_df : pandas.DataFrame or None
+            A DataFrame containing rows removed due to missing values (and,
+            with ``errors="collect"``, out-of-range values), or None.
 
     Raises
     ------
-    Exception "Missing mandatory column/s"
+    ValidationError "Missing mandatory column/s"
         If any required columns are missing
         
-    Exception "Attribute values are not valid" 
-        If any numeric responses fall outside the allowed range.
+    ValidationError "Attribute values are not valid" 
+        If any numeric responses fall outside the allowed range and
+        ``errors="raise"``. The report is available as ``err.report``.
 
 
     Examples
@@ -70,43 +359,49 @@ def validate(
     >>> from smellscapy.surveys import validate
     >>> df = load_example_data()
     >>> df, excl_df = validate(df) # passes without error
+    >>> result = validate(df, errors="collect")
+    >>> df, excl_df = result
+    >>> print(result.report.summary())
+    482 rows checked, all data passed quality checks
 
     """
-    logger.info("Validating data...")
+    if errors not in ("raise", "collect"):
+        raise ValueError(f"errors must be 'raise' or 'collect', got {errors!r}")
 
-    df = df.copy()
-    # verificare che chh,tte le colonne 
-    missing_columns = []
-    for col in ATTRIBUTES_COLUMN_NAMES:
-        if not col in df.columns:
-            missing_columns.append(col)
+    logger.info("Validating data...")
 
+    missing_columns = [col for col in ATTRIBUTES_COLUMN_NAMES if col not in df.columns]
     if missing_columns:
-        raise Exception(f"Missing mandatory column/s: {', '.join(missing_columns)}")
-    
-
-    df_attr = df[ATTRIBUTES_COLUMN_NAMES]
-    df_err = df_attr.applymap(lambda x: x in ATTRIBUTES_VALUES if pd.notna(x) else True)
-    if any(df_err.eq(False).any()):
-        raise Exception("Attribute values are not valid. Please use numbers in range [1, 2, 3, 4, 5]")
-
-    # verificare attributes
-    invalid_indices = []
-    for i, row in df_attr.iterrows():
-        if  row.isna().any():
-            invalid_indices.append(i)
-    
-    if invalid_indices:
-        excl_df = df.iloc[invalid_indices]
-        df = df.drop(df.index[invalid_indices])
-        logger.info(f"Found {len(invalid_indices)} samples with missing data")
-        logger.info(f"Removed {len(invalid_indices)} rows with invalid data")
-    else:
-        excl_df = None
-        logger.info("All data passed quality checks")
+        raise ValidationError(f"Missing mandatory column/s: {', '.join(missing_columns)}")
 
-    return df, excl_df
+    # One pass over the attribute columns (views, no copy of the block)
+    missing, invalid = attribute_masks([df[col].to_numpy() for col in ATTRIBUTES_COLUMN_NAMES])
 
+    report = ValidationReport.from_masks(df.index, missing, invalid)
 
+    if report.invalid_rows.size:
+        logger.info(report.summary())
+        if errors == "raise":
+            raise ValidationError(
+                "Attribute values are not valid. Please use numbers in range [1, 2, 3, 4, 5]",
+                report=report,
+            )
+        excluded = report.excluded_rows
+    else:
+        excluded = report.missing_rows
 
+    if excluded.size:
+        keep = np.ones(report.n_rows, dtype=bool)
+        keep[excluded] = False
+        # rows are selected by position, so duplicate index labels are
+        # fine; take() returns new frames rather than slices of `df`, so
+        # that columns can be added to them without SettingWithCopyWarning
+        excl_df = df.take(np.flatnonzero(~keep))
+        df = df.take(np.flatnonzero(keep))
+        logger.info(f"Found {report.missing_rows.size} samples with missing data")
+        logger.info(f"Removed {excluded.size} rows with invalid data")
+    else:
+        excl_df = None
+        logger.info("All data passed quality checks")
 
+    return ValidationResult(df, excl_df, report)
@@ -0,0 +1,119 @@
+import pytest
+
+import pandas as pd
+import numpy as np
+
+from smellscapy.databases.DataExample import load_example_data
+from smellscapy.calculations import calculate_scores, scores_from_array
+from smellscapy.surveys import validate
+from smellscapy.analysis.descriptive_analysis import descriptive_statistics
+from smellscapy.analysis.accumulators import StatisticsAccumulator, merge_moments
+
+
+@pytest.fixture
+def scored_df():
+    df, _ = validate(load_example_data())
+    return calculate_scores(df)
+
+
+@pytest.fixture
+def large_df():
+    rng = np.random.default_rng(11)
+    scores = scores_from_array(rng.integers(1, 6, size=(20_000, 8)))
+    df = pd.DataFrame(scores, columns=["pleasantness_score", "presence_score"])
+    df["site"] = rng.choice(["A", "B", "C"], size=len(df))
+    df["wave"] = rng.integers(1, 4, size=len(df))
+    return df
+
+
+def _moments(x):
+    dev = x - x.mean()
+    return {"count": np.float64(x.size), "mean": x.mean(), "m2": (dev ** 2).sum(),
+            "m3": (dev ** 3).sum(), "m4": (dev ** 4).sum()}
+
+
+
+class TestMergeMoments:
+
+    def test_pairwise_merge(self):
+        rng = np.random.default_rng(0)
+        a, b = rng.normal(size=300), rng.exponential(size=700)
+        merged = merge_moments(_moments(a), _moments(b))
+        expected = _moments(np.concatenate([a, b]))
+        for key, value in expected.items():
+            np.testing.assert_allclose(merged[key], value, rtol=1e-10)
+
+
+    def test_empty_side(self):
+        empty = {key: np.float64(0.0) for key in ("count", "mean", "m2", "m3", "m4")}
+        x = _moments(np.array([1.0, 2.0, 4.0]))
+        assert merge_moments(empty, x) == pytest.approx(x)
+        assert merge_moments(x, empty) == pytest.approx(x)
+
+
+
+class TestStatisticsAccumulator:
+
+    def test_chunks_match_descriptive_statistics(self, scored_df):
+        acc = StatisticsAccumulator()
+        for start in range(0, len(scored_df), 7):
+            acc.update(scored_df.iloc[start:start + 7])
+        pd.testing.assert_frame_equal(acc.result(), descriptive_statistics(scored_df), atol=1e-12)
+
+
+    @pytest.mark.parametrize("group_by_col", ["site", ["site", "wave"]])
+    def test_grouped_merge(self, large_df, group_by_col):
+        parts = [large_df.iloc[start:start + 4000] for start in range(0, len(large_df), 4000)]
+        accumulators = [StatisticsAccumulator(group_by_col).update(part) for part in parts]
+        acc = accumulators[0]
+        for other in accumulators[1:]:
+            acc.merge(other)
+        expected = descriptive_statistics(large_df, group_by_col=group_by_col)
+        result = acc.result()
+        assert result["subgroup"].tolist() == expected["subgroup"].tolist()
+        np.testing.assert_allclose(
+            result[["pleasantness_score", "presence_score"]].to_numpy(),
+            expected[["pleasantness_score", "presence_score"]].to_numpy(),
+            atol=1e-10,
+        )
+
+
+    def test_serialisation(self, large_df):
+        acc = StatisticsAccumulator(["site", "wave"]).update(large_df)
+        data = acc.to_bytes()
+        assert len(data) < 10_000
+        restored = StatisticsAccumulator.from_bytes(data)
+        assert restored.groups == acc.groups
+        pd.testing.assert_frame_equal(restored.result(), acc.result())
+
+
+    def test_empty(self):
+        s = StatisticsAccumulator().result()
+        assert s.loc["count"].tolist() == [0.0, 0.0]
+        assert s.loc["mean"].isna().all()
+
+
+    def test_empty_result_then_update(self, large_df):
+        acc = StatisticsAccumulator("site")
+        acc.result()
+        assert len(acc) == 0
+        result = acc.update(large_df).result()
+        assert result["subgroup"].unique().tolist() == ["A", "B", "C"]
+        pd.testing.assert_frame_equal(result, StatisticsAccumulator("site").update(large_df).result())
+
+
+    def test_missing_group_keys(self, scored_df):
+        # ResearcherID is missing for some rows, which are left out of the groups
+        expected = descriptive_statistics(scored_df, group_by_col="ResearcherID")
+        chunks = [scored_df.iloc[start:start + 50] for start in range(0, len(scored_df), 50)]
+        merged = StatisticsAccumulator("ResearcherID")
+        for chunk in chunks:
+            merged.merge(StatisticsAccumulator("ResearcherID").update(chunk))
+        for acc in (StatisticsAccumulator("ResearcherID").update(scored_df), merged):
+            result = acc.result()
+            assert result["subgroup"].tolist() == expected["subgroup"].tolist()
+            np.testing.assert_allclose(
+                result[["pleasantness_score", "presence_score"]].to_numpy(),
+                expected[["pleasantness_score", "presence_score"]].to_numpy(),
+                atol=1e-10,
+            )
@@ -0,0 +1,122 @@
+import pytest
+
+import pandas as pd
+import numpy as np
+
+from smellscapy.databases.DataExample import load_example_data
+from smellscapy.calculations import calculate_scores, scores_from_array
+from smellscapy.surveys import validate
+from smellscapy.lattice import ScoreLattice
+from smellscapy.analysis.descriptive_analysis import (
+    STATISTICS_INDEX,
+    counting_statistics,
+    descriptive_statistics,
+    statistics_from_counts,
+)
+
+
+@pytest.fixture
+def scored_df():
+    df, _ = validate(load_example_data())
+    return calculate_scores(df)
+
+
+class TestDescriptiveStatistics:
+
+    def test_matches_pandas_reductions(self, scored_df):
+        scores = scored_df[["pleasantness_score", "presence_score"]]
+        expected = scores.describe()
+        expected.loc["median"] = scores.median()
+        expected.loc["variance"] = scores.var()
+        expected.loc["skewness"] = scores.skew()
+        expected.loc["kurtosis"] = scores.kurtosis()
+        pd.testing.assert_frame_equal(descriptive_statistics(scored_df), expected, atol=1e-12)
+
+
+    def test_grouped_matches_per_group(self, scored_df):
+        s = descriptive_statistics(scored_df, group_by_col="Smell source")
+        assert list(s.columns) == ["type", "pleasantness_score", "presence_score", "subgroup"]
+        for name, group in scored_df.groupby("Smell source"):
+            rows = s[s["subgroup"] == name].set_index("type")[["pleasantness_score", "presence_score"]]
+            rows.index.name = None
+            pd.testing.assert_frame_equal(rows, descriptive_statistics(group), atol=1e-12)
+
+
+    def test_multiple_keys(self, scored_df):
+        s = descriptive_statistics(scored_df, group_by_col=["Smell source", "LocationID"])
+        n_groups = scored_df.groupby(["Smell source", "LocationID"]).ngroups
+        assert len(s) == n_groups * len(STATISTICS_INDEX)
+        assert all(isinstance(name, tuple) for name in s["subgroup"])
+
+
+    def test_no_side_effects(self, scored_df, tmp_path, monkeypatch, capsys):
+        monkeypatch.chdir(tmp_path)
+        descriptive_statistics(scored_df, group_by_col="Smell source")
+        assert capsys.readouterr().out == ""
+        assert list(tmp_path.iterdir()) == []
+
+
+    def test_sinks(self, scored_df, tmp_path):
+        received = []
+        path = tmp_path / "stats.csv"
+        s = descriptive_statistics(scored_df, path=path, writer=received.append)
+        assert received[0] is s
+        pd.testing.assert_frame_equal(pd.read_csv(path, index_col=0), s)
+
+
+
+class TestCountingStatistics:
+
+    def test_matches_descriptive_statistics(self, scored_df):
+        expected = descriptive_statistics(scored_df)
+        pd.testing.assert_frame_equal(counting_statistics(scored_df), expected, atol=1e-12)
+
+
+    # ResearcherID is missing for some rows, which are left out of the groups
+    @pytest.mark.parametrize("group_by_col", ["Smell source", ["Smell source", "LocationID"], "ResearcherID",
+                                              ["Smell source", "ResearcherID"]])
+    def test_grouped(self, scored_df, group_by_col):
+        expected = descriptive_statistics(scored_df, group_by_col=group_by_col)
+        result = counting_statistics(scored_df, group_by_col=group_by_col)
+        assert result["type"].tolist() == expected["type"].tolist()
+        assert result["subgroup"].tolist() == expected["subgroup"].tolist()
+        np.testing.assert_allclose(
+            result[["pleasantness_score", "presence_score"]].to_numpy(),
+            expected[["pleasantness_score", "presence_score"]].to_numpy(),
+            atol=1e-12,
+        )
+
+
+    def test_lattice_and_attributes(self, scored_df):
+        expected = counting_statistics(scored_df[["pleasantness_score", "presence_score"]])
+        pd.testing.assert_frame_equal(counting_statistics(scored_df), expected)
+        pd.testing.assert_frame_equal(counting_statistics(ScoreLattice.from_frame(scored_df)), expected)
+
+
+    def test_off_lattice_scores(self):
+        rng = np.random.default_rng(3)
+        df = pd.DataFrame({"pleasantness_score": rng.normal(size=500), "presence_score": rng.uniform(size=500)})
+        df.iloc[::50, 0] = np.nan
+        pd.testing.assert_frame_equal(counting_statistics(df), descriptive_statistics(df), atol=1e-12)
+
+
+    def test_small_samples(self):
+        scores = scores_from_array(np.array([[1, 2, 3, 4, 5, 1, 2, 3], [5, 4, 3, 2, 1, 5, 4, 3]]))
+        df = pd.DataFrame(scores, columns=["pleasantness_score", "presence_score"])
+        pd.testing.assert_frame_equal(counting_statistics(df), descriptive_statistics(df), atol=1e-12)
+
+
+
+class TestStatisticsFromCounts:
+
+    def test_value_counts(self, scored_df):
+        tables = {col: scored_df[col].value_counts() for col in ["pleasantness_score", "presence_score"]}
+        expected = descriptive_statistics(scored_df)
+        pd.testing.assert_frame_equal(statistics_from_counts(tables), expected, atol=1e-12)
+
+
+    def test_pairs_with_repeated_values(self):
+        result = statistics_from_counts({"x": ([0.5, -0.25, 0.5], [1, 2, 3])})
+        expected = pd.Series([-0.25, -0.25, 0.5, 0.5, 0.5, 0.5], name="x").describe()
+        assert list(result.index) == STATISTICS_INDEX
+        np.testing.assert_allclose(result["x"].iloc[:8], expected.to_numpy())
@@ -0,0 +1,81 @@
+import pytest
+
+import numpy as np
+
+from smellscapy.databases.DataExample import load_example_data
+from smellscapy.calculations import calculate_scores
+from smellscapy.surveys import validate
+from smellscapy.plotting.hdr import hdr_levels
+from smellscapy.analysis.hdr_geometry import GEOMETRY_COLUMNS, group_hdr_geometry, hdr_geometry, hdr_masks, hdr_overlap
+
+
+@pytest.fixture
+def grid():
+    xi = np.linspace(-1, 1, 401)
+    return np.meshgrid(xi, xi)
+
+
+@pytest.fixture
+def cube(grid):
+    XX, YY = grid
+    rng = np.random.default_rng(3)
+    densities = []
+    for cx, cy, s in rng.uniform([-0.5, -0.5, 0.05], [0.5, 0.5, 0.3], size=(5, 3)):
+        densities.append(np.exp(-((XX - cx) ** 2 + (YY - cy) ** 2) / (2 * s ** 2)))
+    densities.append(np.full_like(XX, np.nan))
+    return np.stack(densities)
+
+
+
+class TestHDRGeometry:
+
+    def test_masks(self, cube):
+        masks, thresholds = hdr_masks(cube, 0.5)
+        for Z, mask, thr in zip(cube[:-1], masks, thresholds):
+            assert thr == hdr_levels(Z, 0.5).thresholds
+            np.testing.assert_array_equal(mask, Z >= thr)
+        assert np.isnan(thresholds[-1]) and not masks[-1].any()
+
+        masks, thresholds = hdr_masks(cube, 0.5, method="histogram")
+        for Z, mask, thr in zip(cube[:-1], masks, thresholds):
+            assert thr == hdr_levels(Z, 0.5, method="histogram").thresholds
+            np.testing.assert_array_equal(mask, Z >= thr)
+        assert np.isnan(thresholds[-1]) and not masks[-1].any()
+
+
+    def test_ellipse(self, grid):
+        XX, YY = grid
+        theta = np.radians(30)
+        u = (XX - 0.1) * np.cos(theta) + (YY + 0.2) * np.sin(theta)
+        v = -(XX - 0.1) * np.sin(theta) + (YY + 0.2) * np.cos(theta)
+        masks = np.stack([(u / 0.6) ** 2 + (v / 0.3) ** 2 <= 1, np.zeros_like(XX, dtype=bool)])
+        table = hdr_geometry(masks, XX, YY, ["ellipse", "empty"])
+        assert list(table.columns) == GEOMETRY_COLUMNS
+        expected = [np.pi * 0.6 * 0.3, 0.1, -0.2, 0.6, 0.3, 30.0]
+        np.testing.assert_allclose(table.loc["ellipse"].to_numpy(), expected, rtol=1e-2, atol=1e-3)
+        assert table.loc["empty"].isna().all()
+
+
+    def test_overlap(self, cube, grid):
+        XX, YY = grid
+        masks, _ = hdr_masks(cube, 0.5)
+        intersection, jaccard = hdr_overlap(masks, XX, YY)
+        cell = (XX[0, 1] - XX[0, 0]) * (YY[1, 0] - YY[0, 0])
+        for i in range(5):
+            for j in range(5):
+                both = np.count_nonzero(masks[i] & masks[j])
+                assert intersection.iloc[i, j] == pytest.approx(both * cell)
+                assert jaccard.iloc[i, j] == pytest.approx(both / np.count_nonzero(masks[i] | masks[j]))
+        assert np.isnan(jaccard.iloc[-1, -1])
+        assert (jaccard.iloc[:-1, -1] == 0).all()
+
+
+    def test_group_hdr_geometry(self):
+        df, _ = validate(load_example_data())
+        df = calculate_scores(df)
+        geometry, intersection, jaccard = group_hdr_geometry(df, "Smell source", eval_n=80)
+        labels = sorted(df["Smell source"].dropna().unique(), key=str)
+        assert list(geometry.index) == labels and list(jaccard.columns) == labels
+        np.testing.assert_allclose(np.diag(intersection), geometry["area"])
+        np.testing.assert_allclose(jaccard, jaccard.T)
+        np.testing.assert_allclose(np.diag(jaccard), 1.0)
@@ -0,0 +1,144 @@
+import os
+
+import pytest
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+from smellscapy import __version__
+from smellscapy.databases.DataExample import load_example_data
+from smellscapy.surveys import validate
+from smellscapy.calculations import calculate_scores
+from smellscapy.plotting.density import plot_density
+from smellscapy.plotting.cache import DISK_CACHE_TAG, DiskCache, KDECache, content_key
+from smellscapy.plotting.utils import KDE_CACHE, kde1d, kde_on_grid
+
+
+@pytest.fixture
+def kde_cache():
+    max_bytes = KDE_CACHE.max_bytes
+    KDE_CACHE.clear()
+    yield KDE_CACHE
+    KDE_CACHE.resize(max_bytes)
+    KDE_CACHE.clear()
+
+
+@pytest.fixture
+def samples():
+    rng = np.random.default_rng(4)
+    return rng.normal(0, 0.3, size=(2, 500))
+
+
+
+class TestContentKey:
+
+    def test_depends_on_content_only(self):
+        a = np.arange(12, dtype=np.float64).reshape(3, 4)
+        assert content_key(a, "x", 1) == content_key(np.asfortranarray(a), "x", 1)
+        assert content_key(a) != content_key(a.astype(np.float32))
+        assert content_key(a) != content_key(a.reshape(4, 3))
+        assert content_key({"tol": 1e-6, "dtype": np.float32}) == content_key({"dtype": np.float32, "tol": 1e-6})
+        assert content_key({"tol": 1e-6}) != content_key({"tol": 1e-7})
+
+
+
+class TestKDECache:
+
+    def test_lru_eviction(self):
+        cache = KDECache(max_bytes=3 * 80)
+        for key in "abc":
+            cache.put(key, np.zeros(10))
+        cache.get("a")
+        cache.put("d", np.zeros(10))
+        assert "b" not in cache and "a" in cache
+        info = cache.info()
+        assert (info.hits, info.misses, info.evictions, info.entries, info.nbytes) == (1, 0, 1, 3, 240)
+
+
+    def test_read_only_and_cap(self):
+        cache = KDECache(max_bytes=100)
+        stored = cache.put("a", np.zeros(10))
+        with pytest.raises(ValueError):
+            stored[0] = 1.0
+        cache.put("big", np.zeros(100))
+        assert "big" not in cache
+        cache.resize(0)
+        assert len(cache) == 0
+
+
+
+class TestDiskCache:
+
+    def test_shared_between_caches(self, tmp_path):
+        writer, reader = KDECache(), KDECache()
+        writer.enable_disk(tmp_path)
+        reader.enable_disk(tmp_path)
+        writer.put("k", np.arange(5.0))
+        value = reader.get("k")
+        assert isinstance(value, np.memmap) and not value.flags.writeable
+        np.testing.assert_array_equal(value, np.arange(5.0))
+        assert reader.info().disk_hits == 1
+        assert reader.get("k") is value
+        assert [p.name for p in tmp_path.iterdir()] == [f"{DISK_CACHE_TAG}-k.npy"]
+
+
+    def test_size_eviction(self, tmp_path):
+        disk = DiskCache(tmp_path, max_bytes=3 * (128 + 800))
+        for i, key in enumerate("abcd"):
+            disk.put(key, np.zeros(100))
+            os.utime(tmp_path / f"{DISK_CACHE_TAG}-{key}.npy", (i, i))
+        disk.put("e", np.zeros(100))
+        assert sorted(p.stem for p in tmp_path.iterdir()) == [f"{DISK_CACHE_TAG}-{key}" for key in "cde"]
+        assert disk.nbytes <= disk.max_bytes
+
+
+    def test_unreadable_file(self, tmp_path):
+        disk = DiskCache(tmp_path)
+        (tmp_path / f"{DISK_CACHE_TAG}-bad.npy").write_bytes(b"not an array")
+        assert disk.get("bad") is None
+        assert not (tmp_path / f"{DISK_CACHE_TAG}-bad.npy").exists()
+
+
+    def test_other_versions_not_served(self, tmp_path):
+        disk = DiskCache(tmp_path, max_bytes=2 * (128 + 800))
+        np.save(tmp_path / "0.0.1-1-k.npy", np.ones(100))
+        os.utime(tmp_path / "0.0.1-1-k.npy", (0, 0))
+        assert DISK_CACHE_TAG.startswith(__version__)
+        assert disk.get("k") is None
+        disk.put("k", np.zeros(100))
+        np.testing.assert_array_equal(disk.get("k"), np.zeros(100))
+        disk.put("j", np.zeros(100))
+        assert not (tmp_path / "0.0.1-1-k.npy").exists()  # evicted first
+
+
+
+class TestKDEOnGridCache:
+
+    def test_hit(self, kde_cache, samples):
+        xi = np.linspace(-1, 1, 50)
+        XX, YY = np.meshgrid(xi, xi)
+        first = kde_on_grid(samples[0], samples[1], XX, YY)
+        second = kde_on_grid(samples[0].copy(), samples[1].copy(), XX.copy(), YY.copy())
+        assert second is first
+        assert kde_cache.info().hits == 1
+        kde_on_grid(samples[0], samples[1], XX, YY, backend="exact")
+        kde1d(samples[0], xi)
+        kde1d(samples[0], xi, bw=0.3)
+        assert kde_cache.info().misses == 4
+
+
+    def test_disabled(self, kde_cache, samples):
+        kde_cache.resize(0)
+        xi = np.linspace(-1, 1, 50)
+        assert kde1d(samples[0], xi) is not kde1d(samples[0], xi)
+
+
+    def test_restyled_plot_computes_nothing(self, kde_cache):
+        df, _ = validate(load_example_data())
+        df = calculate_scores(df)
+        plot_density(df, group_by_col="Smell source", eval_n=60, savefig=False)
+        misses = kde_cache.info().misses
+        plot_density(df, group_by_col="Smell source", eval_n=60, palette="Set2", xlabel="P", savefig=False)
+        plt.close("all")
+        assert kde_cache.info().misses == misses
+        assert kde_cache.info().hits > 0
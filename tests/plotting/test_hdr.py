@@ -0,0 +1,117 @@
+import pytest
+
+import numpy as np
+
+from smellscapy.plotting.hdr import hdr_levels, hdr_membership, sample_hdr, sample_hdr_area, sample_hdr_overlap
+from smellscapy.plotting.utils import grid_cell_area, hdr_threshold_from_grid, kde_on_grid
+
+
+@pytest.fixture
+def density():
+    xi = np.linspace(-1, 1, 81)
+    XX, YY = np.meshgrid(xi, xi)
+    Z = np.exp(-(XX ** 2 + 2 * YY ** 2) / 0.1) + 0.5 * np.exp(-((XX - 0.5) ** 2 + YY ** 2) / 0.02)
+    return np.round(Z, 3)  # with ties
+
+
+
+def sorted_threshold(Z, p):
+    zsorted = np.sort(Z.ravel())[::-1]
+    cum = np.cumsum(zsorted)
+    return zsorted[min(np.searchsorted(cum, p * cum[-1]), zsorted.size - 1)]
+
+
+
+class TestHDRLevels:
+
+    def test_same_as_one_sort_per_probability(self, density):
+        probs = [0.25, 0.5, 0.75, 0.95]
+        levels = hdr_levels(density, probs, cell_area=0.5)
+        np.testing.assert_array_equal(levels.thresholds, [sorted_threshold(density, p) for p in probs])
+        assert np.all(np.diff(levels.thresholds) < 0)
+        for p, thr, mass, area in zip(probs, levels.thresholds, levels.mass, levels.area):
+            inside = density >= thr
+            assert mass >= p
+            assert mass == pytest.approx(density[inside].sum() / density.sum())
+            assert area == 0.5 * inside.sum()
+
+
+    def test_scalar_and_degenerate(self, density):
+        levels = hdr_levels(density, 0.5)
+        assert levels.thresholds.shape == ()
+        Z = density.copy()
+        Z[:5] = np.nan
+        assert hdr_levels(Z, 0.5).thresholds == sorted_threshold(np.nan_to_num(Z), 0.5)
+        assert np.isnan(hdr_levels(np.zeros((4, 4)), [0.5, 0.9]).thresholds).all()
+        assert np.isnan(hdr_levels(np.full((4, 4), np.nan), 0.5).area)
+
+
+    def test_hdr_threshold_from_grid(self, density):
+        thr, zmax = hdr_threshold_from_grid(density, 0.5, (-1, 1), (-1, 1))
+        assert thr == sorted_threshold(density, 0.5)
+        assert zmax == density.max()
+
+
+    def test_histogram_same_as_sort(self, density):
+        probs = np.array([0.1, 0.25, 0.5, 0.75, 0.95, 1.0])
+        rng = np.random.default_rng(1)
+        for Z, bins in [(density, 64), (density, 4096), (rng.gamma(0.3, size=(300, 300)), 128)]:
+            exact = hdr_levels(Z, probs, cell_area=0.1)
+            fast = hdr_levels(Z, probs, cell_area=0.1, method="histogram", bins=bins)
+            np.testing.assert_allclose(fast.thresholds, exact.thresholds, rtol=0, atol=Z.max() / bins)
+            np.testing.assert_allclose(fast.mass, exact.mass, atol=1e-3)
+            assert np.all(fast.mass >= probs - 1e-12)
+            np.testing.assert_array_equal(fast.area, 0.1 * np.count_nonzero(Z >= fast.thresholds[:, None, None], axis=(1, 2)))
+        thr, _ = hdr_threshold_from_grid(density, 0.5, (-1, 1), (-1, 1), method="histogram")
+        assert thr == sorted_threshold(density, 0.5)
+        assert np.isnan(hdr_levels(np.zeros((80, 80)), 0.5, method="histogram").thresholds)
+        assert hdr_levels(np.ones((80, 80)), 0.5, method="histogram", bins=16).area == 6400  # ties included
+        with pytest.raises(ValueError):
+            hdr_levels(density, 0.5, method="select")
+
+
+
+class TestSampleHDR:
+
+    @pytest.fixture
+    def lattice_samples(self):
+        rng = np.random.default_rng(2)
+        xy = np.round(rng.normal(0, 0.25, size=(2, 2000)), 1)
+        xy[0, :3] = np.nan
+        return xy
+
+
+    def test_levels_and_membership(self, lattice_samples):
+        x, y = lattice_samples
+        hdr = sample_hdr(x, y, [0.5, 0.8])
+        finite = np.isfinite(x)
+        np.testing.assert_allclose(hdr.density, hdr.kde(hdr.points), rtol=1e-9)
+        f = hdr.density[hdr.inverse[finite]]
+        for p, thr in zip(hdr.probs, hdr.thresholds):
+            assert np.mean(f >= thr) >= p
+            assert np.mean(f > thr) < p
+        member = hdr_membership(hdr)
+        assert member.shape == (2000, 2)
+        assert not member[:3].any()
+        np.testing.assert_array_equal(member[finite], f[:, None] >= hdr.thresholds)
+
+
+    def test_area_and_overlap_match_grid(self, lattice_samples):
+        x, y = lattice_samples
+        xi = np.linspace(-2, 2, 300)
+        XX, YY = np.meshgrid(xi, xi)
+        cell = grid_cell_area(XX.shape, (-2, 2), (-2, 2))
+        a = sample_hdr(x, y, [0.5, 0.8])
+        b = sample_hdr(x + 0.2, y, [0.5, 0.8])
+        Za = kde_on_grid(x[3:], y[3:], XX, YY)
+        Zb = kde_on_grid(x[3:] + 0.2, y[3:], XX, YY)
+        inside_a = Za >= a.thresholds[:, None, None]
+        inside_b = Zb >= b.thresholds[:, None, None]
+
+        area = sample_hdr_area(a, n_draws=20000)
+        np.testing.assert_allclose(area, cell * inside_a.sum(axis=(1, 2)), rtol=0.03)
+        intersection, jaccard = sample_hdr_overlap(a, b, n_draws=20000)
+        both = (inside_a & inside_b).sum(axis=(1, 2))
+        np.testing.assert_allclose(intersection, cell * both, rtol=0.05)
+        np.testing.assert_allclose(jaccard, both / (inside_a | inside_b).sum(axis=(1, 2)), rtol=0.05)
+
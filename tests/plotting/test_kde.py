@@ -0,0 +1,336 @@
+import pytest
+
+import numpy as np
+from scipy.stats import gaussian_kde
+
+from smellscapy.plotting.kde import (
+    BINNED_MIN_SAMPLES,
+    binned_kde,
+    fit_kde,
+    grid_step,
+    linear_binning,
+    _KDE_BACKENDS,
+    binned_kde_groups,
+    group_covariances,
+    kde_backends,
+    register_kde_backend,
+    resolve_backend,
+    scattered_backend,
+    support_nodes,
+    tiled_kde,
+    truncated_kde,
+    unique_points,
+)
+from smellscapy.calculations import scores_from_array
+from smellscapy.plotting.utils import kde1d, kde_on_grid, kde_on_grid_groups
+
+
+@pytest.fixture
+def samples():
+    rng = np.random.default_rng(5)
+    cov = [[0.04, 0.015], [0.015, 0.03]]
+    return rng.multivariate_normal([0.1, -0.05], cov, size=3000).T
+
+
+@pytest.fixture
+def grid():
+    xi = np.linspace(-1, 1, 121)
+    yi = np.linspace(-1, 1, 101)
+    return xi, yi, *np.meshgrid(xi, yi, indexing="xy")
+
+
+
+class TestBinnedKDE:
+
+    def test_linear_binning_keeps_mass_and_mean(self, samples):
+        binned = linear_binning(samples, [-1, -1], [0.01, 0.01], (201, 201))
+        assert binned.sum() == pytest.approx(samples.shape[1])
+        nodes = -1 + 0.01 * np.arange(201)
+        assert (binned.sum(axis=1) @ nodes) / binned.sum() == pytest.approx(samples[0].mean())
+
+
+    def test_close_to_exact(self, samples, grid):
+        xi, yi, XX, YY = grid
+        exact = kde_on_grid(samples[0], samples[1], XX, YY, backend="exact")
+        binned = kde_on_grid(samples[0], samples[1], XX, YY, backend="binned")
+        assert binned.shape == exact.shape
+        assert np.abs(binned - exact).max() < 1e-2 * exact.max()
+
+
+    def test_samples_outside_grid(self, grid):
+        xi, yi, XX, YY = grid
+        rng = np.random.default_rng(1)
+        x, y = rng.normal(0.9, 0.2, 2000), rng.normal(0, 0.2, 2000)
+        exact = kde_on_grid(x, y, XX, YY, backend="exact")
+        binned = kde_on_grid(x, y, XX, YY, backend="binned")
+        assert np.abs(binned - exact).max() < 1e-2 * exact.max()
+
+
+    def test_1d(self, samples):
+        xi = np.linspace(-1, 1, 200)
+        exact = kde1d(samples[0], xi, backend="exact")
+        binned = kde1d(samples[0], xi, backend="binned")
+        assert np.abs(binned - exact).max() < 1e-2 * exact.max()
+
+
+    def test_same_covariance_as_gaussian_kde(self, samples):
+        xi = np.linspace(-1, 1, 101)
+        kde = gaussian_kde(samples)
+        density = binned_kde(kde.dataset, [xi, xi], kde.covariance)
+        assert density.sum() * grid_step(xi) ** 2 == pytest.approx(1.0, abs=1e-3)
+
+
+
+class TestGroupedKDE:
+
+    @pytest.fixture
+    def groups(self):
+        rng = np.random.default_rng(8)
+        sizes = [400, 60, 2, 5, 1500]
+        centres = [(-0.5, 0.2), (0.3, 0.3), (0.0, 0.0), (0.6, -0.6), (0.1, -0.2)]
+        x = np.concatenate([rng.normal(cx, 0.15, n) for (cx, _), n in zip(centres, sizes)])
+        y = np.concatenate([rng.normal(cy, 0.1, n) for (_, cy), n in zip(centres, sizes)])
+        codes = np.repeat(np.arange(len(sizes)), sizes)
+        order = rng.permutation(codes.size)
+        return x[order], y[order], codes[order]
+
+
+    def test_group_covariances(self, groups):
+        x, y, codes = groups
+        dataset = np.vstack([x, y])
+        covariances, counts = group_covariances(dataset, codes, 6)
+        assert counts.tolist() == [400, 60, 2, 5, 1500, 0]
+        for g in (0, 1, 3, 4):
+            np.testing.assert_allclose(covariances[g], gaussian_kde(dataset[:, codes == g]).covariance, rtol=1e-10)
+        assert np.isnan(covariances[5]).all()
+
+
+    def test_same_as_binned_kde(self, groups, grid):
+        x, y, codes = groups
+        xi, yi, XX, YY = grid
+        dataset = np.vstack([x, y])
+        covariances, _ = group_covariances(dataset, codes, 5)
+        cube = binned_kde_groups(dataset, codes, 5, [xi, yi], covariances, max_bytes=1)
+        for g in (0, 1, 4):
+            expected = binned_kde(dataset[:, codes == g], [xi, yi], covariances[g])
+            # kernels are truncated at a common, wider support
+            np.testing.assert_allclose(cube[g], expected, atol=1e-5 * expected.max())
+
+
+    def test_kde_on_grid_groups(self, groups, grid):
+        x, y, codes = groups
+        xi, yi, XX, YY = grid
+        binned = kde_on_grid_groups(x, y, codes, XX, YY, backend="binned")
+        looped = kde_on_grid_groups(x, y, codes, XX, YY, backend="exact")
+        assert binned.shape == looped.shape == (5, *YY.shape)
+        assert np.isnan(binned[2]).all() and np.isnan(looped[2]).all()
+        for g in (0, 1, 3, 4):
+            exact = kde_on_grid(x[codes == g], y[codes == g], XX, YY, backend="exact")
+            np.testing.assert_array_equal(looped[g], exact)
+            if g != 3:
+                # 5 samples: the kernel is too narrow for this coarse grid
+                assert np.abs(binned[g] - exact).max() < 1e-2 * exact.max()
+
+
+    def test_auto_lattice_groups_stay_exact(self, grid):
+        xi, yi, XX, YY = grid
+        rng = np.random.default_rng(8)
+        answers = rng.integers(1, 6, size=(200, 8))
+        x, y = scores_from_array(answers[rng.integers(0, 200, size=2 * BINNED_MIN_SAMPLES)]).T
+        codes = rng.integers(0, 3, size=x.size)
+        auto = kde_on_grid_groups(x, y, codes, XX, YY)
+        for g in range(3):
+            exact = kde_on_grid(x[codes == g], y[codes == g], XX, YY, backend="exact")
+            np.testing.assert_allclose(auto[g], exact, rtol=0, atol=1e-5 * exact.max())
+        assert np.isnan(kde_on_grid_groups(x, y, np.full(x.size, -1), XX, YY, n_groups=2)).all()
+
+
+
+class TestTiledKDE:
+
+    def test_matches_exact(self, samples, grid):
+        xi, yi, XX, YY = grid
+        exact = kde_on_grid(samples[0], samples[1], XX, YY, backend="exact")
+        tiled = kde_on_grid(samples[0], samples[1], XX, YY, backend="tiled", max_bytes=64 * 1024)
+        np.testing.assert_allclose(tiled, exact, rtol=1e-9, atol=1e-12 * exact.max())
+
+
+    def test_float32(self, samples, grid):
+        xi, yi, XX, YY = grid
+        exact = kde_on_grid(samples[0], samples[1], XX, YY, backend="exact")
+        tiled = kde_on_grid(samples[0], samples[1], XX, YY, backend="tiled", dtype=np.float32)
+        assert tiled.dtype == np.float32
+        assert np.abs(tiled - exact).max() < 1e-4 * exact.max()
+
+
+    @pytest.mark.parametrize("max_bytes", [1, 8 * 7, 8 * 3000, 2 ** 30])
+    def test_tile_size_does_not_change_result(self, samples, max_bytes):
+        kde = gaussian_kde(samples[:, :500], weights=np.arange(1, 501))
+        points = samples[:, 500:800]
+        np.testing.assert_allclose(
+            tiled_kde(kde.dataset, points, kde.covariance, kde.weights, max_bytes=max_bytes),
+            kde(points), rtol=1e-9,
+        )
+
+
+    def test_1d(self, samples):
+        xi = np.linspace(-1, 1, 200)
+        exact = kde1d(samples[0], xi, backend="exact")
+        np.testing.assert_allclose(kde1d(samples[0], xi, backend="tiled", max_bytes=4096), exact, rtol=1e-9)
+
+
+
+class TestTruncatedKDE:
+
+    @pytest.mark.parametrize("tol", [1e-3, 1e-6, 1e-9])
+    def test_error_below_tolerance(self, grid, tol):
+        xi, yi, XX, YY = grid
+        rng = np.random.default_rng(3)
+        x, y = rng.normal(0.2, 0.08, (2, 200))
+        kde = gaussian_kde(np.vstack([x, y]))
+        exact = kde_on_grid(x, y, XX, YY, backend="exact", dedup="never")
+        truncated = kde_on_grid(x, y, XX, YY, backend="truncated", dedup="never", tol=tol)
+        peak = 1 / np.sqrt((2 * np.pi) ** 2 * np.linalg.det(kde.covariance))
+        assert np.abs(truncated - exact).max() <= tol * peak
+
+
+    def test_zero_outside_support(self, grid):
+        xi, yi, XX, YY = grid
+        dataset = np.array([[0.5, 0.52, 0.55, 0.6], [0.5, 0.45, 0.55, 0.5]])
+        density = truncated_kde(dataset, [xi, yi], 1e-4 * np.eye(2))
+        assert density.shape == (len(xi), len(yi))
+        assert density[xi < 0.3].max() == 0.0
+        assert density[:, yi > 0.7].max() == 0.0
+        assert density.sum() * grid_step(xi) * grid_step(yi) == pytest.approx(1.0, rel=1e-2)
+
+
+    def test_samples_outside_grid(self):
+        xi = np.linspace(-1, 1, 50)
+        density = truncated_kde([[5.0, 6.0], [5.0, 6.0]], [xi, xi], 1e-2 * np.eye(2))
+        assert not density.any()
+
+
+    def test_1d(self, samples):
+        xi = np.linspace(-1, 1, 200)
+        exact = kde1d(samples[0], xi, backend="exact")
+        assert np.abs(kde1d(samples[0], xi, backend="truncated") - exact).max() < 1e-5 * exact.max()
+
+
+
+class TestBackendSelection:
+
+    def test_auto(self):
+        assert resolve_backend("auto", BINNED_MIN_SAMPLES, BINNED_MIN_SAMPLES, 300 ** 2, True, 100) == "binned"
+        assert resolve_backend("auto", BINNED_MIN_SAMPLES, BINNED_MIN_SAMPLES, 300 ** 2, False) == "tiled"
+        assert resolve_backend("auto", 40, 40, 300 ** 2, True, 100) == "truncated"
+        assert resolve_backend("auto", 40, 40, 300 ** 2, True, 300 ** 2 // 4) == "tiled"
+
+
+    def test_auto_lattice_stays_exact(self):
+        # many rows on few distinct points: the deduplicated KDE is cheap to evaluate exactly
+        assert resolve_backend("auto", 20 * BINNED_MIN_SAMPLES, 300, 300 ** 2, True, 100) == "truncated"
+        assert resolve_backend("auto", 20 * BINNED_MIN_SAMPLES, 300, 300 ** 2, True, 300 ** 2) == "tiled"
+        rng = np.random.default_rng(7)
+        answers = rng.integers(1, 6, size=(300, 8))
+        x, y = scores_from_array(answers[rng.integers(0, 300, size=2 * BINNED_MIN_SAMPLES)]).T
+        xi = np.linspace(-1, 1, 60)
+        XX, YY = np.meshgrid(xi, xi)
+        exact = kde_on_grid(x, y, XX, YY, backend="exact")
+        # the binned KDE would be off by about 1e-3
+        np.testing.assert_allclose(kde_on_grid(x, y, XX, YY), exact, rtol=0, atol=1e-5 * exact.max())
+
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            resolve_backend("fast", 10, 10, 100, True)
+        with pytest.raises(ValueError):
+            resolve_backend("binned", 10, 10, 100, False)
+        with pytest.raises(ValueError):
+            resolve_backend("truncated", 10, 10, 100, False)
+        for backend in ("binned", "truncated"):
+            assert resolve_backend(scattered_backend(backend), 10, 10, 100, False) == "tiled"
+        assert [scattered_backend(b) for b in ("auto", "exact", "tiled")] == ["auto", "exact", "tiled"]
+
+
+    def test_support_nodes(self):
+        assert support_nodes(np.diag([1e-4, 4e-4]), [0.01, 0.01], tol=np.exp(-2)) == 6 * 10
+
+
+    def test_register_backend(self, samples, grid):
+        xi, yi, XX, YY = grid
+        calls = []
+
+        def constant(kde, points, grids, value=1.0, **options):
+            calls.append(grids is not None)
+            return np.full(points.shape[1], value)
+
+        register_kde_backend("constant", constant)
+        try:
+            assert "constant" in kde_backends()
+            with pytest.raises(ValueError):
+                register_kde_backend("constant", constant)
+            ZZ = kde_on_grid(samples[0], samples[1], XX, YY, backend="constant", value=2.0)
+            assert ZZ.shape == YY.shape and (ZZ == 2.0).all()
+            assert calls == [True]
+        finally:
+            _KDE_BACKENDS.pop("constant")
+
+
+    @pytest.mark.parametrize("backend", ["exact", "tiled", "truncated", "binned"])
+    def test_grid_orientation(self, backend):
+        xi = np.linspace(-1, 1, 81)
+        yi = np.linspace(-0.5, 1, 61)
+        XX, YY = np.meshgrid(xi, yi)
+        rng = np.random.default_rng(0)
+        x, y = rng.normal(0.6, 0.1, 400), rng.normal(-0.2, 0.05, 400)
+        ZZ = kde_on_grid(x, y, XX, YY, backend=backend)
+        row, col = np.unravel_index(ZZ.argmax(), ZZ.shape)
+        assert abs(XX[row, col] - 0.6) < 0.1 and abs(YY[row, col] + 0.2) < 0.1
+
+
+    def test_irregular_grid_falls_back(self, samples):
+        xi = np.array([-1.0, -0.5, 0.0, 0.2, 1.0])
+        XX, YY = np.meshgrid(xi, xi)
+        exact = gaussian_kde(samples)(np.vstack([XX.ravel(), YY.ravel()])).reshape(YY.shape)
+        np.testing.assert_allclose(kde_on_grid(samples[0], samples[1], XX, YY), exact, rtol=1e-9, atol=1e-12 * exact.max())
+        assert grid_step(xi) is None
+
+
+
+class TestUniquePoints:
+
+    @pytest.fixture
+    def lattice_samples(self):
+        rng = np.random.default_rng(2)
+        return scores_from_array(rng.integers(2, 5, size=(5000, 8))).T
+
+
+    def test_unique_points(self):
+        points, counts = unique_points(np.array([[0.0, 1.0, 0.0, 0.0], [2.0, 3.0, 2.0, 1.0]]))
+        found = {tuple(p): c for p, c in zip(points.T, counts)}
+        assert found == {(0.0, 2.0): 2, (1.0, 3.0): 1, (0.0, 1.0): 1}
+
+
+    @pytest.mark.parametrize("bw_method", [None, "silverman", 0.4])
+    def test_same_covariance(self, lattice_samples, bw_method):
+        full = gaussian_kde(lattice_samples, bw_method=bw_method)
+        collapsed = fit_kde(lattice_samples, bw_method=bw_method)
+        assert collapsed.n < full.n // 2
+        np.testing.assert_allclose(collapsed.covariance, full.covariance, rtol=1e-12)
+
+
+    def test_same_density(self, lattice_samples, grid):
+        xi, yi, XX, YY = grid
+        x, y = lattice_samples
+        collapsed = kde_on_grid(x, y, XX, YY, backend="exact")
+        full = kde_on_grid(x, y, XX, YY, backend="exact", dedup="never")
+        np.testing.assert_allclose(collapsed, full, rtol=1e-10, atol=1e-12 * full.max())
+        np.testing.assert_allclose(kde1d(x, xi, backend="exact"), kde1d(x, xi, backend="exact", dedup="never"), rtol=1e-10)
+
+
+    def test_binned_with_weights(self, lattice_samples, grid):
+        xi, yi, XX, YY = grid
+        x, y = lattice_samples
+        collapsed = kde_on_grid(x, y, XX, YY, backend="binned")
+        full = kde_on_grid(x, y, XX, YY, backend="binned", dedup="never")
+        np.testing.assert_allclose(collapsed, full, atol=1e-10 * full.max())
@@ -0,0 +1,88 @@
+import os
+
+import pytest
+
+import numpy as np
+
+from smellscapy.databases.DataExample import load_example_data
+from smellscapy.surveys import validate
+from smellscapy.calculations import calculate_scores
+from smellscapy.plotting.dynamic import plot_dynamic
+from smellscapy.plotting.parallel import resolve_n_jobs, run_kde_jobs
+from smellscapy.plotting.utils import KDE_CACHE, kde_on_grid, kde_on_grid_groups, kde_on_grid_many
+
+
+@pytest.fixture
+def no_cache():
+    max_bytes = KDE_CACHE.max_bytes
+    KDE_CACHE.resize(0)
+    yield
+    KDE_CACHE.resize(max_bytes)
+    KDE_CACHE.clear()
+
+
+@pytest.fixture
+def grid():
+    xi = np.linspace(-1, 1, 40)
+    return np.meshgrid(xi, xi)
+
+
+@pytest.fixture
+def samples():
+    rng = np.random.default_rng(5)
+    return rng.normal(0, 0.3, size=(2, 900))
+
+
+
+class TestResolveNJobs:
+
+    def test_values(self):
+        assert resolve_n_jobs(None) == 1
+        assert resolve_n_jobs(1) == 1
+        assert resolve_n_jobs(3) == 3
+        assert resolve_n_jobs(-1) == (os.cpu_count() or 1)
+        assert resolve_n_jobs(-10 ** 6) == 1
+        with pytest.raises(ValueError):
+            resolve_n_jobs(0)
+
+
+
+class TestParallelKDE:
+
+    def test_same_as_serial_in_order(self, no_cache, samples, grid):
+        XX, YY = grid
+        selections = [np.arange(600, 900), np.arange(0, 300), np.arange(2), np.arange(900) % 7 == 0]
+        parallel = kde_on_grid_many(samples[0], samples[1], selections, XX, YY, n_jobs=2)
+        assert parallel[2] is None
+        for density, rows in zip(parallel, selections):
+            if density is not None:
+                expected = kde_on_grid(samples[0][rows], samples[1][rows], XX, YY)
+                np.testing.assert_array_equal(density, expected)
+
+
+    def test_run_kde_jobs(self, samples, grid):
+        XX, YY = grid
+        assert run_kde_jobs(samples[0], samples[1], [], XX, YY, 2).shape == (0, *XX.shape)
+        out = run_kde_jobs(samples[0], samples[1], [np.arange(10), np.arange(5, 50)], XX, YY, 2)
+        np.testing.assert_array_equal(out[1], kde_on_grid(samples[0][5:50], samples[1][5:50], XX, YY))
+
+
+    def test_groups(self, no_cache, samples, grid):
+        XX, YY = grid
+        codes = np.arange(samples.shape[1]) % 4
+        serial = kde_on_grid_groups(samples[0], samples[1], codes, XX, YY, backend="tiled")
+        parallel = kde_on_grid_groups(samples[0], samples[1], codes, XX, YY, backend="tiled", n_jobs=2)
+        np.testing.assert_array_equal(serial, parallel)
+
+
+    def test_dynamic(self, no_cache):
+        df, _ = validate(load_example_data())
+        df = calculate_scores(df)
+        time_col = "How long have you been in your office without leaving?"
+        kwargs = dict(group_by_col="Smell source", eval_n=40, show=False)
+        serial = plot_dynamic(df, time_col, **kwargs)
+        parallel = plot_dynamic(df, time_col, n_jobs=2, **kwargs)
+        assert [f.name for f in serial.frames] == [f.name for f in parallel.frames]
+        for a, b in zip(serial.frames, parallel.frames):
+            for ta, tb in zip(a.data, b.data):
+                np.testing.assert_array_equal(np.asarray(ta.z, dtype=float), np.asarray(tb.z, dtype=float))
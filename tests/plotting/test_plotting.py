@@ -102,3 +102,11 @@ class TestPlotFunctions:
         image_snapshot(img, 'tests/__snapshots__/simple_density_smellsource.png')
         
 
+
+    @pytest.mark.parametrize("kde_backend", ["binned", "truncated"])
+    def test_plot_simple_density_sample_hdr_grid_backend(self, processed_df, kde_backend):
+        with patch.object(plt, "show"):
+            fig, ax = plot_simple_density(processed_df, hdr_mode="sample", kde_backend=kde_backend,
+                                          group_by_col="Smell source", savefig=False)
+        assert ax.collections
+        plt.close(fig)
@@ -3,7 +3,8 @@ import pytest
 import pandas as pd
 import numpy as np
 
-from smellscapy.calculations import calculate_pleasantness, calculate_presence
+from smellscapy.calculations import calculate_pleasantness, calculate_presence, calculate_scores, scores_from_array
+from smellscapy.surveys import ATTRIBUTES_COLUMN_NAMES, validate
 
 
 @pytest.fixture
@@ -46,5 +47,93 @@ class TestCalculatePresence:
         np.testing.assert_allclose(df['presence_score'].values, expected_values, rtol=1e-6, atol=1e-8)
 
 
+
+class TestCalculateScores:
+
+    def test_calculate_scores(self, sample_df):
+        df = calculate_scores(sample_df)
+
+        np.testing.assert_allclose(df['pleasantness_score'].values, calculate_pleasantness(sample_df)['pleasantness_score'].values)
+        np.testing.assert_allclose(df['presence_score'].values, calculate_presence(sample_df)['presence_score'].values)
+        assert 'pleasantness_score' not in sample_df.columns
+
+
+    def test_calculate_scores_float32(self, sample_df):
+        df = calculate_scores(sample_df, dtype=np.float32)
+        expected = calculate_scores(sample_df)
+
+        assert df['pleasantness_score'].dtype == np.float32
+        assert df['presence_score'].dtype == np.float32
+        np.testing.assert_allclose(df['presence_score'].values, expected['presence_score'].values, atol=1e-6)
+
+
+    def test_calculate_scores_inplace(self, sample_df):
+        expected = calculate_scores(sample_df)
+        df = sample_df.copy()
+
+        assert calculate_scores(df, inplace=True) is None
+        np.testing.assert_allclose(df['pleasantness_score'].values, expected['pleasantness_score'].values)
+        np.testing.assert_allclose(df['presence_score'].values, expected['presence_score'].values)
+
+
+    @pytest.mark.filterwarnings("error")
+    def test_inplace_after_validate(self, sample_df):
+        raw = sample_df.astype({"pleasant": float})
+        raw.loc[[2, 5], "pleasant"] = np.nan
+        df, excl_df = validate(raw)
+        assert len(df) == 8 and len(excl_df) == 2
+
+        assert calculate_scores(df, inplace=True) is None
+        column = df["pleasantness_score"].to_numpy()
+        calculate_scores(df, inplace=True)  # overwrites the existing columns
+        assert np.shares_memory(column, df["pleasantness_score"].to_numpy())
+        np.testing.assert_allclose(df["pleasantness_score"].values,
+                                   calculate_scores(sample_df.drop(index=[2, 5]))["pleasantness_score"].values)
+
+
+    def test_calculate_scores_out(self, sample_df):
+        expected = calculate_scores(sample_df)
+        out = np.zeros((len(sample_df), 2))
+
+        res = calculate_scores(sample_df, out=out)
+        assert res is out
+        assert 'pleasantness_score' not in sample_df.columns
+        np.testing.assert_allclose(out[:, 0], expected['pleasantness_score'].values)
+        np.testing.assert_allclose(out[:, 1], expected['presence_score'].values)
+
+        with pytest.raises(ValueError):
+            calculate_scores(sample_df, out=np.zeros((3, 2)))
+
+
+    def test_wrappers_inplace(self, sample_df):
+        df = sample_df.copy()
+        assert calculate_pleasantness(df, inplace=True) is None
+        assert calculate_presence(df, inplace=True) is None
+        assert {'pleasantness_score', 'presence_score'} <= set(df.columns)
+
+
+
+class TestScoresFromArray:
+
+    def test_plain_array(self, sample_df):
+        expected = calculate_scores(sample_df)[['pleasantness_score', 'presence_score']].to_numpy()
+        scores = scores_from_array(sample_df[ATTRIBUTES_COLUMN_NAMES].to_numpy())
+
+        assert scores.shape == (10, 2)
+        np.testing.assert_allclose(scores, expected)
+
+
+    def test_structured_array(self, sample_df):
+        expected = calculate_scores(sample_df)[['pleasantness_score', 'presence_score']].to_numpy()
+        records = sample_df.to_records(index=False)
+
+        np.testing.assert_allclose(scores_from_array(records), expected)
+
+
+    def test_wrong_shape(self):
+        with pytest.raises(ValueError):
+            scores_from_array(np.ones((4, 7)))
+
+
 if __name__ == "__main__":
     pytest.main()
\ No newline at end of file
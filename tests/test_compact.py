@@ -0,0 +1,130 @@
+import pytest
+
+import pandas as pd
+import numpy as np
+
+from smellscapy.databases.DataExample import load_example_data
+from smellscapy.calculations import calculate_scores
+from smellscapy.surveys import ATTRIBUTES_COLUMN_NAMES, ValidationError
+from smellscapy.compact import CompactSurvey, MISSING_CODE, INVALID_CODE, encode_attributes
+
+
+@pytest.fixture
+def sample_df():
+    """Create a sample DataFrame with survey data."""
+    return pd.DataFrame(
+        {
+            "RecordID": [1, 2, 3, 4, 5, 6, 7, 8, 9, 10],
+            "LocationID": ["Bolzano"] * 5 + ["Trento"] * 5,
+            "pleasant": [4, 4, 3, 3, 3, 3, 2, 2, 3, 2],
+            "present": [3, 3, 3, 3, 3, 3, 4, 4, 3, 4],
+            "light": [3, 4, 3, 3, 3, 3, 4, 2, 2, 4],
+            "engaging": [2, 3, 2, 3, 2, 3, 3, 3, 3, 4],
+            "unpleasant": [2, 2, 2, 3, 2, 3, 3, 4, 3, 4],
+            "absent": [3, 3, 2, 3, 3, 4, 2, 2, 2, 2],
+            "overpowering": [2, 2, 2, 3, 2, 2, 4, 4, 2, 2],
+            "detached": [2, 2, 3, 3, 2, 3, 3, 4, 3, 3],
+            "Smell source": ["Food", "Food", "No smell", "Food", "No smell", "Food", "Food", "No smell", "Food", "Food"],
+        }
+    )
+
+
+
+class TestCompactSurvey:
+
+    def test_encode_attributes(self, sample_df):
+        df = sample_df.astype({'pleasant': float})
+        df.loc[2, 'pleasant'] = None
+        df.loc[5, 'absent'] = 9
+
+        codes = encode_attributes(df)
+        assert codes.dtype == np.uint8
+        assert codes.shape == (10, 8)
+        assert codes[2, 0] == MISSING_CODE
+        assert codes[5, ATTRIBUTES_COLUMN_NAMES.index('absent')] == INVALID_CODE
+        assert codes[0].tolist() == [4, 3, 3, 2, 2, 3, 2, 2]
+
+
+    def test_round_trip(self, sample_df):
+        survey = CompactSurvey.from_frame(sample_df)
+
+        assert isinstance(survey.metadata['LocationID'].dtype, pd.CategoricalDtype)
+        assert isinstance(survey.metadata['Smell source'].dtype, pd.CategoricalDtype)
+        pd.testing.assert_frame_equal(
+            survey.to_frame().astype({col: "int64" for col in ATTRIBUTES_COLUMN_NAMES}),
+            sample_df.astype({"LocationID": "category", "Smell source": "category"}),
+        )
+        # identity comparison: the generated __eq__ would compare the arrays
+        assert survey == survey and survey != CompactSurvey.from_frame(sample_df)
+
+
+    def test_validate_and_scores(self, sample_df):
+        df = sample_df.astype({'pleasant': float})
+        df.loc[2, 'pleasant'] = None
+        survey = CompactSurvey.from_frame(df)
+
+        kept, excluded = survey.validate()
+        assert len(kept) == 9
+        assert list(excluded.index) == [2]
+
+        expected = calculate_scores(df)
+        scores = survey.scores()
+        assert np.isnan(scores[2]).all()
+        np.testing.assert_allclose(np.delete(scores, 2, axis=0)[:, 0], expected['pleasantness_score'].drop(2))
+
+        survey = CompactSurvey.from_frame(sample_df.replace({'absent': {4: 7}}))
+        with pytest.raises(ValidationError):
+            survey.validate()
+        report = survey.validate(errors="collect").report
+        assert list(report.labels(report.invalid_rows)) == [5]
+
+
+    def test_load_example_data(self):
+        df = load_example_data()
+        survey = load_example_data(compact=True)
+
+        assert len(survey) == 482
+        assert survey.attributes.flags['C_CONTIGUOUS']
+        assert survey.memory_usage() * 5 < df.memory_usage(deep=True).sum()
+        np.testing.assert_allclose(
+            survey.scores()[:, 1],
+            calculate_scores(df)['presence_score'].to_numpy(),
+        )
+
+
+    def test_from_csv_chunks(self, tmp_path):
+        df = load_example_data()
+        path = tmp_path / "survey.csv"
+        df.to_csv(path, sep=";", index=False)
+
+        survey = CompactSurvey.from_csv(path, chunksize=50)
+        assert len(survey) == 482
+        assert list(survey.index) == list(range(482))
+        assert set(survey.metadata['Smell source'].cat.categories) == set(df['Smell source'].unique())
+        pd.testing.assert_series_equal(
+            survey.to_frame()['Smell source'].astype(object), df['Smell source']
+        )
+
+
+    def test_concat_categories(self, sample_df, tmp_path):
+        df = sample_df.assign(Location=["a", "b", "a", "c", "c", "b", np.nan, np.nan, np.nan, "d"])
+        path = tmp_path / "survey.csv"
+        df.to_csv(path, sep=";", index=False)
+
+        # the third chunk of 3 rows has no location and is read as float
+        survey = CompactSurvey.from_csv(path, chunksize=3)
+        location = survey.metadata["Location"]
+        assert isinstance(location.dtype, pd.CategoricalDtype)
+        assert list(location.cat.categories) == ["a", "b", "c", "d"]
+        pd.testing.assert_series_equal(location.astype(object), df["Location"].astype(object))
+
+
+    def test_empty(self, tmp_path):
+        survey = CompactSurvey.concat([])
+        assert len(survey) == 0 and survey.attributes.shape == (0, 8)
+        assert list(survey.to_frame().columns) == ATTRIBUTES_COLUMN_NAMES
+
+        path = tmp_path / "survey.csv"
+        load_example_data().iloc[:0].to_csv(path, sep=";", index=False)
+        assert len(CompactSurvey.from_csv(path)) == 0
+        assert len(CompactSurvey.from_csv(path, nrows=0)) == 0
@@ -0,0 +1,96 @@
+import pytest
+
+import pandas as pd
+import numpy as np
+
+from smellscapy.databases.DataExample import load_example_data
+from smellscapy.calculations import SCORE_COLUMN_NAMES, calculate_scores, scores_from_array
+from smellscapy.surveys import validate
+from smellscapy.compact import CompactSurvey
+from smellscapy.analysis.descriptive_analysis import descriptive_statistics
+from smellscapy.lattice import (
+    MISSING_COORD,
+    N_LEVELS,
+    ScoreLattice,
+    level_values,
+)
+
+
+@pytest.fixture
+def responses():
+    rng = np.random.default_rng(7)
+    return rng.integers(1, 6, size=(2000, 8))
+
+
+
+class TestScoreLattice:
+
+    def test_scores_match_calculations(self, responses):
+        lattice = ScoreLattice.from_attributes(responses)
+        expected = scores_from_array(responses)
+        assert lattice.coords.dtype == np.int8
+        assert lattice.nbytes == 4 * len(responses)
+        np.testing.assert_allclose(lattice.pleasantness, expected[:, 0], atol=1e-12)
+        np.testing.assert_allclose(lattice.presence, expected[:, 1], atol=1e-12)
+
+
+    def test_from_scores_round_trip(self, responses):
+        lattice = ScoreLattice.from_attributes(responses)
+        scores = scores_from_array(responses, dtype=np.float32)
+        recovered = ScoreLattice.from_scores(scores[:, 0], scores[:, 1])
+        np.testing.assert_array_equal(recovered.coords, lattice.coords)
+
+
+    def test_from_scores_off_lattice(self):
+        with pytest.raises(ValueError):
+            ScoreLattice.from_scores([0.01], [0.0])
+
+
+    def test_missing_rows(self):
+        attributes = np.array([[1, 2, 3, 4, 5, 1, 2, 3], [1, 2, 3, 4, 5, 1, 2, 9]])
+        lattice = ScoreLattice.from_attributes(attributes)
+        assert lattice.valid.tolist() == [True, False]
+        assert (lattice.coords[1] == MISSING_COORD).all()
+        assert np.isnan(lattice.pleasantness[1])
+        assert lattice.keys()[1] == -1
+
+
+    def test_keys_are_exact(self, responses):
+        lattice = ScoreLattice.from_attributes(responses)
+        keys, counts = lattice.counts()
+        assert counts.sum() == len(responses)
+        assert keys.max() < N_LEVELS ** 2
+        points = ScoreLattice.points(keys)
+        scores = np.column_stack([lattice.pleasantness, lattice.presence])
+        assert len(np.unique(scores.round(9), axis=0)) == len(keys)
+        np.testing.assert_allclose(np.unique(points.round(9), axis=0), np.unique(scores.round(9), axis=0))
+
+
+    def test_level_values_distinct(self):
+        assert len(np.unique(level_values().round(9))) == N_LEVELS
+
+
+
+class TestLatticeIntegration:
+
+    def test_from_frame(self):
+        df, _ = validate(load_example_data())
+        scored = calculate_scores(df)
+        by_attributes = ScoreLattice.from_frame(df)
+        by_scores = ScoreLattice.from_frame(scored[SCORE_COLUMN_NAMES])
+        np.testing.assert_array_equal(by_attributes.coords, by_scores.coords)
+        pd.testing.assert_frame_equal(by_attributes.to_frame(), scored[SCORE_COLUMN_NAMES], atol=1e-12)
+
+
+    def test_compact_lattice_with_metadata(self):
+        survey = CompactSurvey.from_frame(load_example_data())
+        frame = survey.lattice().to_frame(survey.metadata)
+        assert list(frame.columns[-2:]) == SCORE_COLUMN_NAMES
+        assert "Smell source" in frame.columns
+
+
+    def test_descriptive_statistics(self):
+        df, _ = validate(load_example_data())
+        expected = descriptive_statistics(calculate_scores(df))
+        result = descriptive_statistics(ScoreLattice.from_attributes(df))
+        pd.testing.assert_frame_equal(result, expected, atol=1e-12)
@@ -0,0 +1,78 @@
+import pytest
+
+import pandas as pd
+import numpy as np
+
+from smellscapy.databases.DataExample import load_example_data
+from smellscapy.calculations import calculate_scores, scores_from_array
+from smellscapy.surveys import ATTRIBUTES_COLUMN_NAMES
+from smellscapy.patterns import (
+    MISSING_PATTERN,
+    N_PATTERNS,
+    decode_patterns,
+    encode_patterns,
+    pattern_counts,
+    pattern_score_table,
+    scores_from_patterns,
+)
+
+
+@pytest.fixture
+def responses():
+    rng = np.random.default_rng(42)
+    return rng.integers(1, 6, size=(1000, 8))
+
+
+
+class TestPatterns:
+
+    def test_round_trip(self, responses):
+        codes = encode_patterns(responses)
+        assert codes.dtype == np.uint32
+        assert codes.max() < N_PATTERNS
+        np.testing.assert_array_equal(decode_patterns(codes), responses)
+
+
+    def test_extreme_codes(self):
+        codes = encode_patterns(np.array([[1] * 8, [5] * 8]))
+        assert codes.tolist() == [0, N_PATTERNS - 1]
+
+
+    def test_missing(self, responses):
+        values = responses.astype(float)
+        values[3, 2] = np.nan
+        values[7, 0] = 6
+
+        codes = encode_patterns(values)
+        assert codes[3] == MISSING_PATTERN
+        assert codes[7] == MISSING_PATTERN
+        assert np.isnan(scores_from_patterns(codes)[[3, 7]]).all()
+
+
+    def test_scores_lookup(self, responses):
+        np.testing.assert_allclose(
+            scores_from_patterns(encode_patterns(responses)),
+            scores_from_array(responses),
+        )
+
+
+    def test_score_table(self):
+        table = pattern_score_table()
+        assert table.shape == (N_PATTERNS + 1, 2)
+        assert not table.flags.writeable
+        assert np.isnan(table[MISSING_PATTERN]).all()
+        assert pattern_score_table(np.float32).dtype == np.float32
+
+
+    def test_dataframe_and_counts(self):
+        df = load_example_data()
+        codes = encode_patterns(df)
+        unique, counts = pattern_counts(codes)
+
+        assert counts.sum() == len(df)
+        assert len(unique) == len(df[ATTRIBUTES_COLUMN_NAMES].drop_duplicates())
+        np.testing.assert_allclose(
+            scores_from_patterns(codes)[:, 0],
+            calculate_scores(df)['pleasantness_score'].to_numpy(),
+        )
+        np.testing.assert_array_equal(load_example_data(compact=True).patterns(), codes)
@@ -0,0 +1,60 @@
+import pytest
+
+import pandas as pd
+import numpy as np
+from importlib import resources
+
+from smellscapy.databases.DataExample import load_example_data
+from smellscapy.surveys import validate
+from smellscapy.calculations import calculate_pleasantness, calculate_presence
+from smellscapy.pipeline import iter_scored_chunks
+
+
+@pytest.fixture
+def example_csv():
+    data_resource = resources.files("smellscapy.data").joinpath("DataExample.csv")
+    with resources.as_file(data_resource) as f:
+        yield f
+
+
+@pytest.fixture
+def csv_with_missing(tmp_path):
+    df = load_example_data()
+    df.loc[[3, 150, 151], 'pleasant'] = None
+    df.loc[400, 'absent'] = 7
+    path = tmp_path / "survey.csv"
+    df.to_csv(path, sep=";", index=False)
+    return path
+
+
+
+class TestIterScoredChunks:
+
+    def test_matches_in_memory_workflow(self, example_csv):
+        chunks = list(iter_scored_chunks(example_csv, chunksize=100))
+
+        df, _ = validate(load_example_data())
+        df = calculate_presence(calculate_pleasantness(df))
+
+        assert len(chunks) == 5
+        assert chunks[-1].n_read == 482
+        assert chunks[-1].n_kept == 482
+        assert chunks[-1].n_excluded == 0
+
+        streamed = pd.concat([c.data for c in chunks])
+        np.testing.assert_allclose(streamed['pleasantness_score'], df['pleasantness_score'])
+        np.testing.assert_allclose(streamed['presence_score'], df['presence_score'])
+
+
+    def test_running_excluded_counts(self, csv_with_missing):
+        chunks = list(iter_scored_chunks(csv_with_missing, chunksize=100, errors="collect"))
+
+        assert [c.n_excluded for c in chunks] == [1, 3, 3, 3, 4]
+        assert chunks[-1].n_kept == 478
+        assert list(chunks[1].excluded.index) == [150, 151]
+        assert list(chunks[4].report.labels(chunks[4].report.invalid_rows)) == [400]
+
+
+    def test_raise_on_invalid_values(self, csv_with_missing):
+        with pytest.raises(Exception, match="Attribute values are not valid"):
+            list(iter_scored_chunks(csv_with_missing, chunksize=100))
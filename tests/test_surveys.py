@@ -7,6 +7,10 @@ import numpy as np
 from smellscapy.surveys import (
     ATTRIBUTES_VALUES, 
     ATTRIBUTES_COLUMN_NAMES, 
+    ValidationError,
+    ValidationResult,
+    attribute_masks,
+    valid_mask,
     validate
 )
 
@@ -96,6 +100,107 @@ class TestDataFrameValidation:
         assert excl_df.shape[0] == 2 # 2 rows removed
 
 
+    def test_missing_data_non_default_index(self, sample_df):
+        df = sample_df.copy()
+        df.index = df.index[::-1] + 100
+        df.loc[107, 'pleasant'] = None
+
+        df, excl_df = validate(df)
+        assert df.shape[0] == 9
+        assert list(excl_df.index) == [107]
+        assert 107 not in df.index
+
+
+    def test_missing_data_duplicate_index(self, sample_df):
+        df = sample_df.copy()
+        df.index = [0, 0, 1, 1, 2, 2, 3, 3, 4, 4]
+        df.iloc[3, df.columns.get_loc('pleasant')] = None
+
+        df, excl_df = validate(df)
+        assert list(df.index) == [0, 0, 1, 2, 2, 3, 3, 4, 4]
+        assert list(excl_df.index) == [1]
+        assert excl_df['RecordID'].tolist() == [4]
+
+
+
+
+class TestValidationReport:
+
+    def test_report_collect(self, sample_df):
+        df = sample_df.copy()
+        df.loc[2, 'pleasant'] = 999
+        df.loc[5, 'absent'] = -3
+        df.loc[7, 'absent'] = None
+
+        result = validate(df, errors="collect")
+        df, excl_df = result
+        report = result.report
+
+        assert not report.is_valid
+        assert report.n_rows == 10
+        np.testing.assert_array_equal(report.invalid_rows, [2, 5])
+        np.testing.assert_array_equal(report.missing_rows, [7])
+        np.testing.assert_array_equal(report.invalid_by_column['pleasant'], [2])
+        np.testing.assert_array_equal(report.invalid_by_column['absent'], [5])
+        np.testing.assert_array_equal(report.missing_by_column['absent'], [7])
+        assert report.counts.loc['absent', 'invalid'] == 1
+        assert report.counts.loc['absent', 'missing'] == 1
+        assert report.counts['invalid'].sum() == 2
+        assert list(excl_df.index) == [2, 5, 7]
+        assert df.shape[0] == 7
+
+
+    def test_report_on_raise(self, sample_df):
+        df = sample_df.copy()
+        df.loc[2, 'pleasant'] = 999
+
+        with pytest.raises(ValidationError) as err:
+            validate(df)
+        assert list(err.value.report.labels(err.value.report.invalid_rows)) == [2]
+
+
+    def test_report_valid(self, sample_df):
+        result = validate(sample_df, errors="collect")
+        _, excl_df = result
+        report = result.report
+        assert report.is_valid
+        assert excl_df is None
+        assert "all data passed" in report.summary()
+
+
+    def test_same_shape_in_both_modes(self, sample_df):
+        for errors in ("raise", "collect"):
+            result = validate(sample_df, errors=errors)
+            assert isinstance(result, ValidationResult) and len(result) == 2
+            df, excl_df = result
+            assert df is result.data and excl_df is None
+            assert result.report.is_valid
+
+
+
+
+class TestArrayValidation:
+
+    def test_valid_mask(self, sample_df):
+        values = sample_df[ATTRIBUTES_COLUMN_NAMES].to_numpy(dtype=float)
+        values[2, 0] = np.nan
+        values[5, 5] = 7
+
+        mask = valid_mask(values)
+        assert mask.tolist() == [True, True, False, True, True, False, True, True, True, True]
+
+        missing, invalid = attribute_masks(values)
+        assert missing.sum() == 1 and missing[2, 0]
+        assert invalid.sum() == 1 and invalid[5, 5]
+
+
+    def test_valid_mask_structured(self, sample_df):
+        records = sample_df.to_records(index=False)
+        assert valid_mask(records).all()
+
+        with pytest.raises(ValidationError, match="Missing mandatory column/s: pleasant"):
+            valid_mask(sample_df.drop(columns=['pleasant']).to_records(index=False))
+
 
 if __name__ == "__main__":
     pytest.main()
\ No newline at end of file